@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Frames/s of YoloDetector.detect_batch at batch sizes 1, 4 and 8 on CPU.
+
+    python3 benchmarks/bench_detect_batch.py [--frames 64] [--model yolov8n.pt]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # force CPU
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from vision_app.config import Config, apply_ultralytics_settings
+from vision_app.detection.yolo_detector import YoloDetector
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=64)
+    ap.add_argument("--model", default=Config.MODEL_PATH)
+    ap.add_argument("--sizes", default="1,4,8")
+    args = ap.parse_args()
+
+    apply_ultralytics_settings()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    detector = YoloDetector(args.model, max_batch=max(sizes))
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(max(sizes))]
+
+    detector.detect_batch(frames[:1])  # warm-up
+    for bs in sizes:
+        batch = frames[:bs]
+        runs = max(1, args.frames // bs)
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            detector.detect_batch(batch)
+        dt = time.perf_counter() - t0
+        print(f"batch={bs:<2}  frames={runs * bs:<4}  {runs * bs / dt:7.2f} frames/s  {1000 * dt / runs:8.1f} ms/batch")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-field and time-to-complete of LM Studio analyses, streamed
+(LMSTUDIO_STREAM=1, early close) vs the blocking request.
+
+    python3 benchmarks/bench_lmstudio_stream.py snapshot.jpg [--runs 10]
+
+Uses LMSTUDIO_URL / LMSTUDIO_MODEL from the environment.
+"""
+import argparse
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision_app.config import Config
+from vision_app.analysis import lmstudio_analyzer
+from vision_app.utils.io_service import get_io_service
+from vision_app.utils.stats import LatencyWindow
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("image")
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+
+    with open(args.image, "rb") as f:
+        b64 = base64.b64encode(f.read()).decode("ascii")
+
+    lmstudio_analyzer.analyze_with_lmstudio(b64)  # warm-up (model load, connection)
+    try:
+        for stream in (False, True):
+            Config.LMSTUDIO_STREAM = stream
+            first, complete, failed = LatencyWindow(), LatencyWindow(), 0
+            for _ in range(args.runs):
+                res = lmstudio_analyzer.analyze_with_lmstudio(b64)
+                timing = res.get("timing")
+                if res.get("status") != "ok" or not timing:
+                    failed += 1
+                    continue
+                first.add(timing["first_field_ms"] / 1000)
+                complete.add(timing["complete_ms"] / 1000)
+            f, c = first.summary(), complete.summary()
+            print(f"{'stream' if stream else 'blocking':<9} ok={f['count']:<3} failed={failed:<3} "
+                  f"first_field p50={f.get('p50_ms', '-')}ms p95={f.get('p95_ms', '-')}ms  "
+                  f"complete p50={c.get('p50_ms', '-')}ms p95={c.get('p95_ms', '-')}ms")
+    finally:
+        get_io_service().stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Skip ratio, recall and CPU cost of the motion gate: plain frame differencing
+(MOTION_BG_ALPHA=1, no noise adaptation) vs the running-average background.
+
+The synthetic scene has sensor noise, a slow exposure drift and a person-sized
+block that walks slowly through it for part of the run, so the ideal gate
+skips every frame without the walker and none with it. --video uses a real
+clip instead (no ground truth: only skip ratio and cost are reported).
+
+    python3 benchmarks/bench_motion.py [--frames 600] [--noise 6] [--video clip.mp4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from vision_app.config import Config
+from vision_app.detection.motion import MotionDetector
+
+def synthetic(n, noise, drift, speed, rng):
+    """Yields (frame, walker_visible)."""
+    w, h = Config.FRAME_SIZE
+    base = cv2.GaussianBlur(rng.integers(40, 200, (h, w, 3), dtype=np.uint8), (0, 0), 6)
+    start, stop = n // 3, 2 * n // 3
+    bw, bh = w // 16, h // 5
+    for i in range(n):
+        gain = 1.0 + drift * np.sin(2 * np.pi * i / n)
+        frame = cv2.convertScaleAbs(base, alpha=gain)
+        visible = start <= i < stop
+        if visible:
+            x = int((i - start) * speed) % (w - bw)
+            frame[h // 2:h // 2 + bh, x:x + bw] = (30, 30, 160)
+        if noise:
+            frame = cv2.add(frame, rng.normal(0, noise, frame.shape).astype(np.int16), dtype=cv2.CV_8U)
+        yield frame, visible
+
+def from_video(path, n):
+    cap = cv2.VideoCapture(path)
+    w, h = Config.FRAME_SIZE
+    for _ in range(n):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        yield cv2.resize(frame, (w, h)), None
+    cap.release()
+
+def run(name, detector, frames):
+    moved = hits = still = false_alarms = 0
+    spent = 0.0
+    for frame, truth in frames:
+        t0 = time.perf_counter()
+        changed = detector.changed(frame)
+        spent += time.perf_counter() - t0
+        if truth is True:
+            moved += 1
+            hits += changed
+        elif truth is False:
+            still += 1
+            false_alarms += changed
+    st = detector.stats()
+    line = f"{name:<12} skip={st['skip_ratio']:.3f}  {1e6 * spent / max(1, st['frames']):7.1f} us/frame"
+    if moved or still:
+        line += f"  recall={hits / max(1, moved):.3f}  false_alarms={false_alarms / max(1, still):.3f}"
+    print(line + f"  noise={st['noise']}  pixel_thresh={st['pixel_thresh']}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=600)
+    ap.add_argument("--noise", type=float, default=6.0, help="sensor noise sigma (synthetic)")
+    ap.add_argument("--drift", type=float, default=0.15, help="exposure drift amplitude (synthetic)")
+    ap.add_argument("--speed", type=float, default=4.0, help="walker speed in pixels per sample (synthetic)")
+    ap.add_argument("--video", help="use a recorded clip instead of the synthetic scene")
+    args = ap.parse_args()
+
+    cases = [
+        ("frame-diff", lambda: MotionDetector(alpha=1.0, noise_k=0)),
+        ("background", lambda: MotionDetector()),
+    ]
+    for name, make in cases:
+        if args.video:
+            frames = from_video(args.video, args.frames)
+        else:
+            frames = synthetic(args.frames, args.noise, args.drift, args.speed, np.random.default_rng(0))
+        # Decoding / synthesis is not part of the measured cost
+        run(name, make(), list(frames))
+
+if __name__ == "__main__":
+    main()
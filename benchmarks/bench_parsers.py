@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Throughput of the prose fallback parser (extract_vision_objects +
+extract_vision_actions) against the multi-pass regex version it replaced,
+on a corpus of LM Studio answers.
+
+The corpus is a JSONL file with one answer per line (a JSON string, or an
+object with "summary" or "content"), the prose answers recorded in an event
+store, or, by default, a generated set of typical answers. Also reports how
+many answers the two parsers label differently with the alias table off.
+
+    python3 benchmarks/bench_parsers.py [--corpus answers.jsonl | --events-db events.db] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision_app.analysis import parsers
+
+# --- the previous implementation, for comparison -------------------------------------------------
+
+NEGATIVE_PATTERNS = [r"\bno (animal|animals)\b", r"\bnone visible\b", r"\bnot visible\b", r"\bno .* present\b"]
+
+def old_norm_item(s):
+    if not s:
+        return ""
+    s = re.sub(r"\(.*?\)", "", s)
+    s = s.lower()
+    s = re.sub(r"[^a-z0-9 _\-]", "", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    s = re.sub(r"^(a|an|the)\s+", "", s)
+    return s
+
+def old_head_noun_phrase(s):
+    s = old_norm_item(s)
+    s = re.split(r"\s*[:\-]\s*| is | are | with | of ", s, maxsplit=1)[0]
+    return " ".join(s.split()[:3])
+
+def old_dedupe_and_filter(items):
+    out, seen = [], set()
+    for it in items:
+        if not it or len(it) <= 1:
+            continue
+        if any(re.search(p, it.lower()) for p in NEGATIVE_PATTERNS):
+            continue
+        it = re.sub(r"\s+", " ", it).strip()
+        if it not in seen:
+            seen.add(it)
+            out.append(it)
+    return out
+
+HEADING_RE = re.compile(r"^\s*#{1,6}\s*(.+?):?\s*$", re.IGNORECASE)
+BULLET_RE = re.compile(r"^\s*[-*•]\s+(.*\S)\s*$")
+NUM_RE = re.compile(r"^\s*\d+[.)]\s+(.*\S)\s*$")
+
+def old_collect_section(lines, start_idx):
+    items = []
+    for line in lines[start_idx + 1:]:
+        if HEADING_RE.match(line.rstrip()):
+            break
+        m = BULLET_RE.match(line) or NUM_RE.match(line)
+        if m:
+            items.append(m.group(1))
+    return items
+
+def old_extract_vision_objects(text):
+    if not text:
+        return []
+    lines, raw = text.splitlines(), []
+    for idx, line in enumerate(lines):
+        m = HEADING_RE.match(line)
+        if m and "object" in (m.group(1) or "").strip().lower():
+            raw = old_collect_section(lines, idx)
+            break
+    if not raw:
+        current = "other"
+        for line in lines:
+            hm = HEADING_RE.match(line)
+            if hm:
+                t = (hm.group(1) or "").strip().lower()
+                current = "actions" if "action" in t else ("objects" if "object" in t else "other")
+                continue
+            bm = BULLET_RE.match(line) or NUM_RE.match(line)
+            if bm and current in ("objects", "other"):
+                raw.append(bm.group(1))
+    normed = [re.sub(r"\s+", "_", old_head_noun_phrase(x)) for x in raw if x]
+    return old_dedupe_and_filter(normed)
+
+def old_extract_vision_actions(text):
+    if not text:
+        return []
+    lines, raw = text.splitlines(), []
+    for idx, line in enumerate(lines):
+        m = HEADING_RE.match(line)
+        if m and "action" in (m.group(1) or "").strip().lower():
+            raw = old_collect_section(lines, idx)
+            break
+    if not raw:
+        lowered = text.lower()
+        raw += [m.group(1).strip() for m in re.finditer(r"\bappears to be ([a-z][a-z\s\-]+?)(?:[.,;\n]|$)", lowered)]
+        raw += [m.group(1).strip() for m in re.finditer(r"\bis ([a-z]+ing)(?:[^\w]|$)", lowered)]
+    normed = [re.sub(r"\s+", "_", old_head_noun_phrase(x)) for x in raw if x]
+    drop = {"home_office", "study_area", "daytime", "lighting", "wearing"}
+    return [c for c in old_dedupe_and_filter(normed) if c not in drop]
+
+# --- corpus ---------------------------------------------------------------------------------------
+
+OBJECTS = ["person", "cat", "desk", "office chair", "laptop (open)", "coffee mug", "bookshelf", "window",
+           "potted plant", "backpack", "the sofa", "a lamp", "monitor with cables", "door: closed",
+           "car is parked", "bicycle", "dog bed", "no animals visible", "kitchen table", "keys"]
+ACTIONS = ["sitting at the desk", "typing on a laptop", "walking", "standing near the door",
+           "sleeping on the sofa", "drinking coffee", "looking at a phone", "none visible"]
+
+def generated(n, rng):
+    out = []
+    for i in range(n):
+        objs = rng.sample(OBJECTS, rng.randint(3, 9))
+        acts = rng.sample(ACTIONS, rng.randint(1, 3))
+        style = i % 3
+        if style == 0:
+            body = ["### Objects:"] + [f"- {o.capitalize()}" for o in objs] + ["", "### Actions:"]
+            body += [f"{k + 1}. {a.capitalize()}" for k, a in enumerate(acts)]
+            body += ["", "### Scene:", "An indoor home office in daytime lighting."]
+        elif style == 1:
+            body = ["The image shows a room with the following items:"] + [f"* {o}" for o in objs]
+            body += [f"A person appears to be {acts[0]}.", f"The cat is {rng.choice(['sleeping', 'eating'])} nearby."]
+        else:
+            body = [f"In this frame, a person is {rng.choice(['walking', 'standing', 'sitting'])} next to "
+                    f"the {objs[0]}. There is also a {objs[1]} and a {objs[2]}.",
+                    f"It appears to be {rng.choice(['daytime', 'evening'])}; lighting is dim."]
+        out.append("\n".join(body))
+    return out
+
+def load_corpus(args):
+    if args.corpus:
+        texts = []
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                texts.append(item if isinstance(item, str) else item.get("summary") or item.get("content") or "")
+        return [t for t in texts if t]
+    if args.events_db:
+        db = sqlite3.connect(args.events_db)
+        rows = db.execute("SELECT payload FROM events ORDER BY id DESC LIMIT ?", (args.limit,)).fetchall()
+        db.close()
+        texts = []
+        for (payload,) in rows:
+            vision = json.loads(payload).get("vision") or {}
+            if vision.get("status") == "ok" and not vision.get("parsed") and vision.get("summary"):
+                texts.append(vision["summary"])
+        return texts
+    return generated(args.limit, random.Random(0))
+
+def bench(name, objects_fn, actions_fn, texts, repeat, clear=None):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        if clear:
+            clear()  # measure parsing, not the per-text result cache
+        for t in texts:
+            objects_fn(t)
+            actions_fn(t)
+    dt = time.perf_counter() - t0
+    n = repeat * len(texts)
+    print(f"{name:<8} {n / dt:10.0f} answers/s  {1e6 * dt / n:7.1f} us/answer")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", help="JSONL file of recorded answers")
+    ap.add_argument("--events-db", help="event store file; uses its prose (non-JSON) answers")
+    ap.add_argument("--limit", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    texts = load_corpus(args)
+    if not texts:
+        sys.exit("Empty corpus")
+    print(f"{len(texts)} answers, {sum(map(len, texts)) / len(texts):.0f} chars on average")
+
+    bench("old", old_extract_vision_objects, old_extract_vision_actions, texts, args.repeat)
+    bench("new", parsers.extract_vision_objects, parsers.extract_vision_actions, texts, args.repeat,
+          clear=parsers.parse_vision_text.cache_clear)
+
+    parsers.set_aliases({})
+    differ = sum(1 for t in texts
+                 if (parsers.extract_vision_objects(t), parsers.extract_vision_actions(t))
+                 != (old_extract_vision_objects(t), old_extract_vision_actions(t)))
+    parsers.set_aliases(None)
+    # Expected differences: negatives such as "no animals visible" are now filtered before the "_" join
+    print(f"{differ} of {len(texts)} answers labelled differently without aliases")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Process CPU time per decoded frame: OpenCV (cv2.VideoCapture) vs PyAV,
+plus the PyAV keyframe-only and reduced-resolution modes.
+
+    python3 benchmarks/bench_rtsp_decode.py rtsp://cam/stream [--frames 300] [--size 640,360]
+
+Works on any URL or file FFmpeg can open. Keyframe-only stops after --frames
+keyframes, so on a live stream it takes roughly GOP times longer.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+def bench_opencv(url, frames, size):
+    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open {url}")
+    n = 0
+    c0 = time.process_time()
+    while n < frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if size:
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        n += 1
+    cpu = time.process_time() - c0
+    cap.release()
+    return n, cpu
+
+def bench_pyav(url, frames, size, threads, keyframes_only=False, gray=False):
+    import av
+    container = av.open(url, options={"rtsp_transport": "tcp"})
+    stream = container.streams.video[0]
+    stream.thread_type = "AUTO"
+    stream.codec_context.thread_count = threads
+    if keyframes_only:
+        stream.codec_context.skip_frame = "NONKEY"
+    kwargs = {"width": size[0], "height": size[1]} if size else {}
+    n = 0
+    c0 = time.process_time()
+    for frame in container.decode(stream):
+        frame.to_ndarray(format="gray" if gray else "bgr24", **kwargs)
+        n += 1
+        if n >= frames:
+            break
+    cpu = time.process_time() - c0
+    container.close()
+    return n, cpu
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("url")
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--size", default=None, help="w,h output size (default: native)")
+    ap.add_argument("--threads", type=int, default=2)
+    args = ap.parse_args()
+    size = tuple(int(v) for v in args.size.split(",")) if args.size else None
+
+    runs = [
+        ("opencv", lambda: bench_opencv(args.url, args.frames, size)),
+        ("pyav", lambda: bench_pyav(args.url, args.frames, size, args.threads)),
+        ("pyav gray", lambda: bench_pyav(args.url, args.frames, size, args.threads, gray=True)),
+        ("pyav keyframes", lambda: bench_pyav(args.url, args.frames, size, args.threads, keyframes_only=True)),
+    ]
+    for name, run in runs:
+        try:
+            n, cpu = run()
+        except Exception as e:
+            print(f"{name:<15} failed: {e}")
+            continue
+        per = 1000 * cpu / n if n else float("nan")
+        print(f"{name:<15} frames={n:<5} cpu={cpu:6.2f}s  {per:6.2f} ms cpu/frame")
+
+if __name__ == "__main__":
+    main()
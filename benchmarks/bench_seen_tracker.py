@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+SeenTracker update / snapshot cost with a large open-vocabulary label set,
+against the dict-based tracker it replaced (every update marked all records
+absent and rebuilt the dict for the TTL; every snapshot copied all records).
+
+    python3 benchmarks/bench_seen_tracker.py [--labels 10000] [--updates 20000] [--per-update 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from vision_app.analysis.tracker import SeenTracker
+
+class DictSeenTracker:
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def update(self, labels_now):
+        now = time.time()
+        with self._lock:
+            for v in self.data.values():
+                v["present"] = False
+            for lab in labels_now:
+                rec = self.data.setdefault(lab, {"count": 0, "last_seen": 0.0, "present": False})
+                rec["count"] += 1
+                rec["last_seen"] = now
+                rec["present"] = True
+            if self.ttl is not None:
+                cutoff = now - self.ttl
+                self.data = {k: v for k, v in self.data.items() if v["last_seen"] >= cutoff}
+
+    def snapshot(self):
+        with self._lock:
+            return {k: dict(v) for k, v in self.data.items()}
+
+def run(name, tracker, batches, snapshot_every):
+    update_s = snapshot_s = 0.0
+    snapshots = 0
+    for i, labels in enumerate(batches):
+        t0 = time.perf_counter()
+        tracker.update(labels)
+        update_s += time.perf_counter() - t0
+        if i % snapshot_every == 0:
+            # A TUI redraw usually takes a few snapshots between updates
+            t0 = time.perf_counter()
+            for _ in range(3):
+                tracker.snapshot()
+            snapshot_s += time.perf_counter() - t0
+            snapshots += 3
+    print(f"{name:<8} update {1e6 * update_s / len(batches):8.1f} us   "
+          f"snapshot {1e6 * snapshot_s / max(1, snapshots):9.1f} us   labels={len(tracker.snapshot())}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--labels", type=int, default=10000)
+    ap.add_argument("--updates", type=int, default=20000)
+    ap.add_argument("--per-update", type=int, default=5)
+    ap.add_argument("--snapshot-every", type=int, default=10, help="updates between TUI redraws")
+    ap.add_argument("--ttl", type=float, default=3600)
+    args = ap.parse_args()
+
+    # Zipf-like tag frequencies: a few common labels, a long tail of rare VLM tags
+    rng = np.random.default_rng(0)
+    vocab = [f"tag-{i}" for i in range(args.labels)]
+    weights = 1.0 / np.arange(1, args.labels + 1)
+    picks = rng.choice(args.labels, size=(args.updates, args.per_update), p=weights / weights.sum())
+    batches = [[vocab[j] for j in row] for row in picks]
+
+    # Fill the vocabulary first so both trackers start at full size
+    warm = [vocab[i:i + 100] for i in range(0, args.labels, 100)]
+    for name, make in (("dict", DictSeenTracker), ("array", SeenTracker)):
+        tracker = make(ttl=args.ttl)
+        for labels in warm:
+            tracker.update(labels)
+        run(name, tracker, batches, args.snapshot_every)
+
+if __name__ == "__main__":
+    main()
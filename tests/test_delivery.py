@@ -0,0 +1,49 @@
+import time
+from vision_app.config import Config
+from vision_app.outputs.delivery import WebhookDelivery, WebhookSpool
+
+class FlakyPost:
+    def __init__(self, failures):
+        self.failures = failures
+        self.posted = []
+
+    def __call__(self, payload):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("webhook down")
+        self.posted.append(payload)
+
+def test_failed_event_is_spooled_and_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "WEBHOOK_RETRY_BASE_S", 0.0)
+    post = FlakyPost(failures=1)
+    delivery = WebhookDelivery(post_fn=post, queue_size=10, batch_max=1, batch_window_s=0,
+                               spool_path=str(tmp_path / "spool.db"))
+    delivery.start()
+    delivery.submit({"id": 1})
+    deadline = time.monotonic() + 5
+    while not post.posted and time.monotonic() < deadline:
+        time.sleep(0.02)
+    delivery.stop()
+    delivery.join(2)
+
+    assert post.posted == [{"id": 1}]
+    assert (delivery.failed, delivery.retried, delivery.dropped) == (1, 1, 0)
+
+def test_spooled_retry_backs_off_on_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "WEBHOOK_RETRY_BASE_S", 10.0)
+    monkeypatch.setattr(Config, "WEBHOOK_RETRY_MAX_S", 60.0)
+    delivery = WebhookDelivery(post_fn=FlakyPost(failures=5), spool_path=str(tmp_path / "spool.db"))
+    delivery.spool.add([{"id": 1}], attempts=1, next_try=0)
+
+    delivery._retry_spooled()
+    assert delivery.spool.due(10) == []  # rescheduled, not due now
+    [(_, attempts, event)] = delivery.spool.due(10, now=time.time() + 21)
+    assert (attempts, event) == (2, {"id": 1})
+    delivery.spool.close()
+
+def test_spool_keeps_newest_rows(tmp_path):
+    spool = WebhookSpool(str(tmp_path / "spool.db"), max_rows=2)
+    spool.add([{"id": i} for i in range(3)], attempts=0, next_try=0)
+    assert [e for _, _, e in spool.due(10)] == [{"id": 1}, {"id": 2}]
+    assert spool.dropped == 1
+    spool.close()
@@ -0,0 +1,72 @@
+import numpy as np
+from vision_app import main
+from vision_app.analysis.mot import MultiObjectTracker
+from vision_app.sampling import AdaptiveSampler
+
+FRAME = np.zeros((48, 64, 3), np.uint8)
+
+class FakeMotion:
+    def __init__(self):
+        self.moving = True
+        self.regions = []
+
+    def changed(self, frame_bgr, gray=None):
+        return self.moving
+
+class FakeDetector:
+    def __init__(self):
+        self.objects = []
+
+    def detect_regions(self, frames, regions_list):
+        return [{"summary": "", "objects": [dict(o) for o in self.objects]} for _ in frames]
+
+def _camera(max_age_s=0.1, min_hits=2):
+    ctx = main.CameraContext("cam")
+    ctx.motion = FakeMotion()
+    ctx.mot = MultiObjectTracker(max_age_s=max_age_s, high_conf=0.6, min_hits=min_hits)
+    return ctx
+
+def _tick(ctx, detector, ts, sampler=None):
+    packet = {"camera": ctx.id, "frame": FRAME, "gray": None, "ts": ts}
+    return main.detect_packets([packet], detector, {ctx.id: ctx}, sampler)[0]
+
+def _cat(conf):
+    return {"label": "cat", "confidence": conf, "box": [10, 10, 30, 30]}
+
+def test_sampler_returns_to_idle_after_scene_empties():
+    ctx, detector = _camera(), FakeDetector()
+    sampler = AdaptiveSampler(idle_fps=0.5, active_fps=1, burst_fps=2, idle_after_s=0, burst_hold_s=0,
+                              max_load=1e9, max_temp_c=1e9)
+
+    detector.objects = [_cat(0.9)]
+    assert _tick(ctx, detector, 1.0, sampler) is not None
+    sampler.interval()
+    assert sampler.mode == "burst"
+
+    # Motion without objects, then no motion at all: the track ages out
+    detector.objects = []
+    _tick(ctx, detector, 1.05, sampler)
+    assert len(ctx.mot.tracks) == 1
+    ctx.motion.moving = False
+    _tick(ctx, detector, 1.5, sampler)
+    assert ctx.mot.tracks == {}
+    sampler.interval()
+    assert sampler.mode == "idle"
+
+def test_tentative_track_dropped_on_first_empty_frame():
+    ctx, detector = _camera(max_age_s=10), FakeDetector()
+    detector.objects = [_cat(0.55)]
+    assert _tick(ctx, detector, 1.0) is None  # tentative: not due yet
+    assert len(ctx.mot.tracks) == 1
+
+    detector.objects = []
+    _tick(ctx, detector, 2.0)
+    assert ctx.mot.tracks == {}
+
+def test_tentative_track_due_after_second_hit():
+    ctx, detector = _camera(max_age_s=10), FakeDetector()
+    detector.objects = [_cat(0.55)]
+    _tick(ctx, detector, 1.0)
+    result = _tick(ctx, detector, 2.0)
+    assert result is not None
+    assert result["tracks_due"] == [{"track_id": result["objects"][0]["track_id"], "reason": "new"}]
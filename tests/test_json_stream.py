@@ -0,0 +1,34 @@
+import json
+from vision_app.analysis.json_stream import JsonFieldStream
+
+ANSWER = {"objects_present": ["cat", "sofa"], "actions": [], "summary_text": "A cat {sleeps}, \"curled\" up."}
+
+def test_fields_complete_as_chunks_arrive():
+    text = json.dumps(ANSWER)
+    stream, seen = JsonFieldStream(), []
+    for i in range(0, len(text), 7):
+        new = stream.feed(text[i:i + 7])
+        seen += list(new)
+    assert seen == ["objects_present", "actions", "summary_text"]
+    assert stream.done
+    assert stream.fields == ANSWER
+    assert stream.result() == ANSWER
+
+def test_objects_available_before_summary():
+    stream = JsonFieldStream()
+    assert stream.feed('{"objects_present": ["person"], "summary_text": "A pers') == {"objects_present": ["person"]}
+    assert stream.has("objects_present") and not stream.has("summary_text")
+    assert stream.result() is None
+    assert stream.feed('on at the door."}') == {"summary_text": "A person at the door."}
+
+def test_preamble_and_code_fence_are_skipped():
+    stream = JsonFieldStream()
+    stream.feed('Result [json]: "x"\n```json\n{"objects_present": ["cat"]}\n```')
+    assert stream.result() == {"objects_present": ["cat"]}
+    assert stream.feed('{"ignored": 1}') == {}
+
+def test_no_object_in_stream():
+    stream = JsonFieldStream()
+    stream.feed("I cannot see anything in this image.")
+    assert not stream.done
+    assert stream.result() is None
@@ -0,0 +1,29 @@
+from vision_app.analysis.mot import MultiObjectTracker
+
+def _cat(conf, box=(100, 100, 200, 200)):
+    return {"label": "cat", "confidence": conf, "box": list(box)}
+
+def test_high_confidence_detection_is_due_at_once():
+    mot = MultiObjectTracker(high_conf=0.6, min_hits=2)
+    objects = [_cat(0.9)]
+    mot.update(objects, 1.0)
+    assert mot.due_for_analysis(1.0) == {objects[0]["track_id"]: "new"}
+
+def test_lone_low_confidence_detection_produces_due_track():
+    # Between CONF_MIN and TRACK_HIGH_CONF: tentative first, due once confirmed
+    mot = MultiObjectTracker(high_conf=0.6, min_hits=2)
+    first = [_cat(0.55)]
+    mot.update(first, 1.0)
+    assert "track_id" in first[0]
+    assert mot.due_for_analysis(1.0) == {}
+
+    second = [_cat(0.55, (102, 101, 203, 201))]
+    mot.update(second, 2.0)
+    assert second[0]["track_id"] == first[0]["track_id"]
+    assert mot.due_for_analysis(2.0) == {second[0]["track_id"]: "new"}
+
+def test_lone_low_confidence_detection_with_min_hits_one():
+    mot = MultiObjectTracker(high_conf=0.6, min_hits=1)
+    objects = [_cat(0.55)]
+    mot.update(objects, 1.0)
+    assert mot.due_for_analysis(1.0) == {objects[0]["track_id"]: "new"}
@@ -0,0 +1,32 @@
+import random
+import pytest
+from benchmarks import bench_parsers as old
+from vision_app.analysis import parsers
+
+@pytest.fixture
+def no_aliases():
+    parsers.set_aliases({})
+    yield
+    parsers.set_aliases(None)
+
+def _old(text):
+    # The old parser joined words with "_" before its negative filter, so "no animals visible" slipped through
+    objects, actions = old.old_extract_vision_objects(text), old.old_extract_vision_actions(text)
+    keep = lambda labels: [x for x in labels if not parsers.is_negative_phrase(x.replace("_", " "))]
+    return keep(objects), keep(actions)
+
+def test_parse_vision_text_matches_old_parser(no_aliases):
+    for text in old.generated(300, random.Random(0)):
+        assert (parsers.extract_vision_objects(text), parsers.extract_vision_actions(text)) == _old(text), text
+
+def test_heading_sections(no_aliases):
+    text = "### Objects:\n- A cat (grey)\n- The sofa\n- No animals visible\n\n### Actions:\n1. Sleeping on the sofa\n"
+    assert parsers.parse_vision_text(text) == (("cat", "sofa"), ("sleeping_on_the",))
+    assert list(map(list, parsers.parse_vision_text(text))) == list(_old(text))
+
+def test_aliases_apply_to_prose_labels():
+    parsers.set_aliases({"kitten": "cat"})
+    try:
+        assert parsers.extract_vision_objects("* Kitten\n* cat\n* lamp") == ["cat", "lamp"]
+    finally:
+        parsers.set_aliases(None)
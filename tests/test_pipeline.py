@@ -0,0 +1,20 @@
+from vision_app.pipeline import RingBuffer
+
+def test_ring_buffer_drops_oldest_when_full():
+    dropped = []
+    buf = RingBuffer("test", maxlen=2, on_drop=dropped.append)
+    for i in range(4):
+        buf.put(i)
+    assert dropped == [0, 1]
+    assert [buf.get(0), buf.get(0), buf.get(0)] == [2, 3, None]
+    assert buf.stats() == {"depth": 0, "capacity": 2, "put": 4, "dropped": 2}
+
+def test_ring_buffer_latest_discards_older_items():
+    dropped = []
+    buf = RingBuffer("test", maxlen=3, on_drop=dropped.append)
+    for i in range(3):
+        buf.put(i)
+    assert buf.latest(0) == 2
+    assert dropped == [0, 1]
+    assert buf.depth() == 0
+    assert buf.latest(0.01) is None
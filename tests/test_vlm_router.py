@@ -0,0 +1,74 @@
+import asyncio
+from vision_app.analysis import vlm_router
+from vision_app.analysis.vlm_router import Endpoint, VLMRouter
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeService:
+    def __init__(self, status):
+        self.status = status
+        self.probes = []
+
+    def get_session(self, name, limit=None):
+        return self
+
+    def get(self, url, timeout=None):
+        self.probes.append(url)
+        return FakeResponse(self.status)
+
+def _router(monkeypatch, status):
+    service = FakeService(status)
+    monkeypatch.setattr(vlm_router, "get_io_service", lambda: service)
+    a, b = Endpoint("http://a:1234", "m"), Endpoint("http://b:1234", "m")
+    return VLMRouter([a, b], policy="least_outstanding", fail_threshold=2, probe_s=0), a, b, service
+
+def _fail(router, ep):
+    router.begin(ep)
+    router.end(ep, 0.0, failed=True)
+
+def test_endpoint_trips_after_consecutive_failures(monkeypatch):
+    router, a, b, _ = _router(monkeypatch, 200)
+    router.probe_s = 60
+    _fail(router, a)
+    assert a.state == "closed"
+    _fail(router, a)
+    assert (a.state, a.trips) == ("open", 1)
+
+    async def picks():
+        return [router.pick() for _ in range(3)]
+    assert asyncio.run(picks()) == [b, b, b]
+
+def test_probe_closes_healthy_endpoint(monkeypatch):
+    router, a, b, service = _router(monkeypatch, 200)
+    _fail(router, a)
+    _fail(router, a)
+
+    async def run():
+        router.pick()  # open_until has passed: schedules the probe
+        assert a.probing
+        await asyncio.sleep(0)
+    asyncio.run(run())
+    assert service.probes == ["http://a:1234/v1/models"]
+    assert (a.state, a.failures, a.trips, a.probing) == ("closed", 0, 0, False)
+
+def test_failed_probe_trips_again_with_longer_delay(monkeypatch):
+    router, a, _, _ = _router(monkeypatch, 503)
+    router.probe_s = 0.5
+    _fail(router, a)
+    _fail(router, a)
+    a.open_until = 0.0
+
+    async def run():
+        router.pick()
+        await asyncio.sleep(0)
+    asyncio.run(run())
+    assert (a.state, a.trips, a.probing) == ("open", 2, False)
+    assert a.open_until - vlm_router.time.monotonic() > 0.5  # probe_s doubled
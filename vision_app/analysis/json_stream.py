@@ -0,0 +1,89 @@
+import json
+
+class JsonFieldStream:
+    """
+    Incremental reader for one streamed JSON object. feed() takes text
+    chunks as they arrive and returns the top-level fields completed by that
+    chunk, so callers can act on e.g. objects_present before summary_text
+    has been generated. Text before the first "{" (code fences, prose) is ignored.
+    """
+    def __init__(self):
+        self.text = []
+        self.fields = {}
+        self.done = False
+        self._buf = ""
+        self._pos = 0          # scan position in _buf
+        self._start = -1       # index of the opening "{"
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._member = None    # start index of the current top-level "key": value
+
+    def _close_member(self, end, new):
+        raw = self._buf[self._member:end].strip()
+        self._member = None
+        if not raw:
+            return
+        try:
+            field = json.loads("{" + raw + "}")
+        except json.JSONDecodeError:
+            return
+        self.fields.update(field)
+        new.update(field)
+
+    def feed(self, chunk):
+        if self.done or not chunk:
+            return {}
+        self.text.append(chunk)
+        self._buf += chunk
+        new = {}
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._start < 0:
+                # Brackets, braces and quotes in a preamble like 'Result [json]:' do not count
+                if c == "{":
+                    self._start = i
+                    self._depth = 1
+                continue
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_str = False
+                continue
+            if c == '"':
+                self._in_str = True
+                if self._depth == 1 and self._member is None:
+                    self._member = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._member is not None:
+                        self._close_member(i, new)
+                    self.done = True
+                    self._pos = i + 1
+                    return new
+            elif c == "," and self._depth == 1 and self._member is not None:
+                self._close_member(i, new)
+        self._pos = len(buf)
+        return new
+
+    def has(self, *keys):
+        return all(k in self.fields for k in keys)
+
+    def result(self):
+        """The complete object, or None when the stream did not contain one."""
+        if not self.done:
+            return None
+        try:
+            return json.loads(self._buf[self._start:self._pos])
+        except json.JSONDecodeError:
+            return None
+
+    def content(self):
+        return "".join(self.text)
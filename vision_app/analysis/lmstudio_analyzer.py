@@ -1,18 +1,119 @@
 import aiohttp
 import asyncio
 import base64
+import contextlib
 import json
 import logging
+import time
 from ..config import Config
 from ..utils.helpers import build_api_url, safe_trim, extract_choice_content
+from ..utils.io_service import get_io_service
+from ..utils.stats import LatencyWindow
+from .json_stream import JsonFieldStream
+from .vlm_router import get_router
 
 logger = logging.getLogger(__name__)
 
-async def analyze_with_lmstudio_async(b64_image):
-    if not (Config.LMSTUDIO_URL and Config.LMSTUDIO_MODEL):
+REQUIRED_FIELDS = ("objects_present", "actions_present", "summary_text")
+
+# Request start -> first JSON field parsed / full answer, for the blocking and streamed paths
+_timing = {
+    "blocking": {"first_field": LatencyWindow(256), "complete": LatencyWindow(256)},
+    "stream": {"first_field": LatencyWindow(256), "complete": LatencyWindow(256)},
+}
+
+def timing_stats():
+    return {f"{mode}_{k}": w.summary() for mode, windows in _timing.items()
+            for k, w in windows.items() if w.count}
+
+def _parse_content(content):
+    if not content:
+        return None
+    # 1) liefst: pure JSON
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # 2) fallback: JSON-blok eruit vissen
+        start = content.find("{")
+        end = content.rfind("}")
+        if start != -1 and end != -1 and end > start:
+            try:
+                return json.loads(content[start:end+1])
+            except json.JSONDecodeError:
+                return None
+    return None
+
+async def _stream_json_call(session, url, headers, payload, t0, on_partial=None):
+    """
+    Streamed (SSE) variant of the JSON request. Fields are parsed as they
+    complete and passed to on_partial; the request is closed as soon as the
+    object (or all REQUIRED_FIELDS) is complete. Returns (status, parsed, text, timing).
+    """
+    parser = JsonFieldStream()
+    first_field = None
+    async with session.post(url, headers={**headers, "Accept": "text/event-stream"},
+                            json={**payload, "stream": True},
+                            timeout=aiohttp.ClientTimeout(total=Config.LMSTUDIO_TIMEOUT)) as resp:
+        if resp.status // 100 != 2:
+            return resp.status, None, await resp.text(), None
+
+        async for raw in resp.content:
+            line = raw.decode("utf-8", "replace").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            choices = chunk.get("choices") or [{}]
+            new = parser.feed((choices[0].get("delta") or {}).get("content"))
+            if new:
+                if first_field is None:
+                    first_field = time.perf_counter() - t0
+                if on_partial is not None:
+                    try:
+                        on_partial(dict(parser.fields))
+                    except Exception as e:
+                        logger.debug(f"Partial result callback failed: {e}")
+            if parser.done or parser.has(*REQUIRED_FIELDS):
+                # Dropping the connection also stops generation on the server
+                resp.close()
+                break
+
+    complete = time.perf_counter() - t0
+    parsed = parser.result() or (dict(parser.fields) if parser.has(*REQUIRED_FIELDS) else None)
+    if parsed is None:
+        parsed = _parse_content(parser.content())
+    timing = {"streamed": True, "first_field_ms": round(1000 * (first_field or complete), 1),
+              "complete_ms": round(1000 * complete, 1)}
+    return resp.status, parsed, parser.content(), timing
+
+def _session_scope(session):
+    """Uses the given pooled session, or a throwaway one if none was passed."""
+    if session is not None:
+        return contextlib.nullcontext(session)
+    return aiohttp.ClientSession()
+
+def _http_error(status, text):
+    # 5xx / 429 count against the endpoint's circuit breaker, other errors do not
+    return {"status": "error", "error": f"HTTP {status}", "body": safe_trim(text),
+            "backend_error": status >= 500 or status == 429}
+
+async def analyze_with_lmstudio_async(b64_image, session=None, on_partial=None, endpoint=None):
+    """
+    With LMSTUDIO_STREAM the answer is streamed and on_partial(fields) is
+    called as objects_present / actions_present / summary_text complete.
+    endpoint (a vlm_router.Endpoint) overrides LMSTUDIO_URL / LMSTUDIO_MODEL.
+    """
+    base_url = endpoint.url if endpoint else Config.LMSTUDIO_URL
+    model = endpoint.model if endpoint else Config.LMSTUDIO_MODEL
+    if not (base_url and model):
         return {"status": "disabled", "reason": "LMSTUDIO_URL or LMSTUDIO_MODEL not set"}
 
-    url = build_api_url(Config.LMSTUDIO_URL, "chat/completions")
+    url = build_api_url(base_url, "chat/completions")
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
     # Let op: nu vragen we expliciet om 3 velden in de JSON
@@ -40,7 +141,7 @@ async def analyze_with_lmstudio_async(b64_image):
     ]
 
     payload_openai = {
-        "model": Config.LMSTUDIO_MODEL,
+        "model": model,
         "stream": False,
         "temperature": 0.0,
         "top_p": 0.1,
@@ -52,50 +153,49 @@ async def analyze_with_lmstudio_async(b64_image):
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload_openai, timeout=60) as resp:
-                text = await resp.text()
-                if resp.status // 100 != 2:
-                    return {
-                        "status": "error",
-                        "error": f"HTTP {resp.status}",
-                        "body": safe_trim(text),
-                    }
+        async with _session_scope(session) as session:
+            t0 = time.perf_counter()
+            if Config.LMSTUDIO_STREAM:
+                mode = "stream"
+                status, parsed, text, timing = await _stream_json_call(session, url, headers, payload_openai,
+                                                                       t0, on_partial)
+                content = text
+                if status // 100 != 2:
+                    return _http_error(status, text)
+            else:
+                mode = "blocking"
+                async with session.post(url, headers=headers, json=payload_openai,
+                                        timeout=aiohttp.ClientTimeout(total=Config.LMSTUDIO_TIMEOUT)) as resp:
+                    text = await resp.text()
+                    if resp.status // 100 != 2:
+                        return _http_error(resp.status, text)
 
                 data = json.loads(text)
                 content = extract_choice_content(data)
+                parsed = _parse_content(content)
+                elapsed_ms = round(1000 * (time.perf_counter() - t0), 1)
+                timing = {"streamed": False, "first_field_ms": elapsed_ms, "complete_ms": elapsed_ms}
 
-                parsed = None
-                if content:
-                    # 1) liefst: pure JSON
-                    try:
-                        parsed = json.loads(content)
-                    except json.JSONDecodeError:
-                        # 2) fallback: JSON-blok eruit vissen
-                        start = content.find("{")
-                        end = content.rfind("}")
-                        if start != -1 and end != -1 and end > start:
-                            try:
-                                parsed = json.loads(content[start:end+1])
-                            except json.JSONDecodeError:
-                                parsed = None
-
-                if isinstance(parsed, dict) and \
-                   "objects_present" in parsed and "actions_present" in parsed and "summary_text" in parsed:
-                    # schoon de tags nog op als je wilt (optioneel)
-                    # hier laat ik ze zoals LM Studio ze geeft
-                    return {
-                        "status": "ok",
-                        "parsed": parsed,
-                        "summary": parsed.get("summary_text"),
-                    }
-
-                # Als JSON-pad niet werkt, val terug op je bestaande fallback
-                return await _fallback_vision_call(url, headers, b64_image, text)
+            if isinstance(parsed, dict) and all(k in parsed for k in REQUIRED_FIELDS):
+                # schoon de tags nog op als je wilt (optioneel)
+                # hier laat ik ze zoals LM Studio ze geeft
+                _timing[mode]["first_field"].add(timing["first_field_ms"] / 1000)
+                _timing[mode]["complete"].add(timing["complete_ms"] / 1000)
+                return {
+                    "status": "ok",
+                    "parsed": parsed,
+                    "summary": parsed.get("summary_text"),
+                    "timing": timing,
+                }
+
+            # Als JSON-pad niet werkt, val terug op je bestaande fallback
+            if not Config.LMSTUDIO_FALLBACK:
+                return {"status": "error", "error": "invalid JSON answer", "body": safe_trim(content or text)}
+            return await _fallback_vision_call(url, headers, b64_image, text, session=session, model=model)
 
     except Exception as e:
         logger.warning(f"LM Studio request exception: {repr(e)}")
-        return {"status": "error", "error": f"Request exception: {repr(e)}"}
+        return {"status": "error", "error": f"Request exception: {repr(e)}", "backend_error": True}
 
 
 async def obsolete_analyze_with_lmstudio_async(b64_image):
@@ -166,9 +266,9 @@ async def obsolete_analyze_with_lmstudio_async(b64_image):
         logger.warning(f"LM Studio request exception: {repr(e)}")
         return {"status": "error", "error": f"Request exception: {repr(e)}"}
 
-async def _fallback_vision_call(url, headers, b64_image, prev_error_body=None):
+async def _fallback_vision_call(url, headers, b64_image, prev_error_body=None, session=None, model=None):
     payload_fallback = {
-        "model": Config.LMSTUDIO_MODEL, "stream": False, "temperature": 0.2, "max_tokens": 400,
+        "model": model or Config.LMSTUDIO_MODEL, "stream": False, "temperature": 0.2, "max_tokens": 400,
         "messages": [
             {"role": "system", "content": "You are a concise vision assistant."},
             {"role": "user", "content": [
@@ -178,11 +278,12 @@ async def _fallback_vision_call(url, headers, b64_image, prev_error_body=None):
         ],
     }
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload_fallback, timeout=60) as resp:
+        async with _session_scope(session) as session:
+            async with session.post(url, headers=headers, json=payload_fallback,
+                                    timeout=aiohttp.ClientTimeout(total=Config.LMSTUDIO_TIMEOUT)) as resp:
                 text = await resp.text()
                 if resp.status // 100 != 2:
-                    return {"status": "error", "error": f"HTTP {resp.status}", "body": safe_trim(text)}
+                    return _http_error(resp.status, text)
 
                 data = json.loads(text)
                 content = extract_choice_content(data)
@@ -194,11 +295,40 @@ async def _fallback_vision_call(url, headers, b64_image, prev_error_body=None):
 
     except Exception as e:
         logger.warning(f"Fallback vision call exception: {repr(e)}")
-        return {"status": "error", "error": f"Fallback request exception: {repr(e)}"}
+        return {"status": "error", "error": f"Fallback request exception: {repr(e)}", "backend_error": True}
 
-def analyze_with_lmstudio(b64_image):
+async def _analyze_pooled(b64_image, on_partial=None):
+    router = get_router()
+    if not router.endpoints:
+        return {"status": "disabled", "reason": "LMSTUDIO_URL or LMSTUDIO_MODEL not set"}
+    endpoint = router.pick()
+    if endpoint is None:
+        return {"status": "error", "error": "no healthy LM Studio endpoint"}
+
+    session = get_io_service().get_session(f"lmstudio:{endpoint.name}", limit=Config.LMSTUDIO_CONN_LIMIT)
+    router.begin(endpoint)
+    t0 = time.monotonic()
+    result = None
     try:
-        return asyncio.run(analyze_with_lmstudio_async(b64_image))
-    except RuntimeError:
-        logger.exception("Asyncio loop issue while analyzing with LM Studio")
-        return {"status": "error", "error": "asyncio loop problem"}
+        result = await analyze_with_lmstudio_async(b64_image, session=session, on_partial=on_partial,
+                                                   endpoint=endpoint)
+    finally:
+        router.end(endpoint, time.monotonic() - t0, failed=result is None or bool(result.get("backend_error")))
+    result["endpoint"] = endpoint.name
+    return result
+
+def submit_analysis(b64_image, on_partial=None):
+    """
+    Queues an analysis on the shared I/O loop without blocking.
+    Returns a concurrent.futures.Future resolving to the vision dict.
+    on_partial runs on the I/O loop thread and must not block.
+    """
+    return get_io_service().submit(_analyze_pooled(b64_image, on_partial))
+
+def analyze_with_lmstudio(b64_image, on_partial=None):
+    try:
+        # JSON call + optional fallback call, each bounded by LMSTUDIO_TIMEOUT
+        return submit_analysis(b64_image, on_partial).result(timeout=2 * Config.LMSTUDIO_TIMEOUT + 5)
+    except Exception as e:
+        logger.warning(f"LM Studio analysis failed: {repr(e)}")
+        return {"status": "error", "error": f"Request exception: {repr(e)}"}
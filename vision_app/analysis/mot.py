@@ -0,0 +1,191 @@
+import itertools
+import threading
+import numpy as np
+from ..config import Config
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter <= 0:
+        return 0.0
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def _to_xywh(box):
+    x1, y1, x2, y2 = box
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+class KalmanBoxFilter:
+    """
+    Constant-velocity Kalman filter over (cx, cy, w, h), noise scaled by box height.
+    """
+    _H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+    def __init__(self, box):
+        z = _to_xywh(box)
+        self.x = np.concatenate([z, np.zeros(4)])
+        h = max(z[3], 1.0)
+        self.P = np.diag(np.square([h / 10, h / 10, h / 10, h / 10, h / 16, h / 16, h / 16, h / 16]))
+
+    def predict(self, dt):
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        h = max(self.x[3], 1.0)
+        q_pos, q_vel = (h / 20) ** 2 * max(dt, 1e-3), (h / 160) ** 2 * max(dt, 1e-3)
+        Q = np.diag([q_pos] * 4 + [q_vel] * 4)
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+
+    def update(self, box):
+        z = _to_xywh(box)
+        h = max(self.x[3], 1.0)
+        R = np.diag(np.square([h / 20] * 4))
+        S = self._H @ self.P @ self._H.T + R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self._H @ self.x)
+        self.P = (np.eye(8) - K @ self._H) @ self.P
+
+    def box(self):
+        cx, cy, w, h = self.x[:4]
+        w, h = max(w, 1.0), max(h, 1.0)
+        return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+
+class Track:
+    __slots__ = ("id", "label", "confidence", "kf", "hits", "confirmed", "first_seen", "last_seen", "last_ts",
+                 "analyzed_at", "analyzed_box", "analyzed_label")
+
+    def __init__(self, track_id, obj, ts, confirmed=True):
+        self.id = track_id
+        self.label = obj["label"]
+        self.confidence = obj["confidence"]
+        self.kf = KalmanBoxFilter(obj["box"])
+        self.hits = 1
+        self.confirmed = confirmed
+        self.first_seen = ts
+        self.last_seen = ts
+        self.last_ts = ts
+        self.analyzed_at = None
+        self.analyzed_box = None
+        self.analyzed_label = None
+
+    def box(self):
+        return [int(v) for v in self.kf.box()]
+
+
+class MultiObjectTracker:
+    """
+    ByteTrack-style box tracker: Kalman prediction, greedy IoU matching of
+    high-confidence detections first, then low-confidence ones against the
+    tracks that are still unmatched. Gives every object a persistent track_id
+    and decides when a track is worth an LM Studio call / webhook.
+
+    Unmatched detections below high_conf (but above CONF_MIN) start a
+    tentative track, which is confirmed after min_hits consecutive hits and
+    dropped on its first miss, so weak one-frame flickers are not analyzed.
+    """
+    _ids = itertools.count(1)  # unique across cameras
+
+    def __init__(self, iou_min=None, max_age_s=None, high_conf=None,
+                 reanalyze_s=None, change_iou=None, min_hits=None):
+        self.iou_min = Config.TRACK_IOU_MIN if iou_min is None else iou_min
+        self.max_age_s = Config.TRACK_MAX_AGE_S if max_age_s is None else max_age_s
+        self.high_conf = Config.TRACK_HIGH_CONF if high_conf is None else high_conf
+        self.reanalyze_s = Config.TRACK_REANALYZE_S if reanalyze_s is None else reanalyze_s
+        self.change_iou = Config.TRACK_CHANGE_IOU if change_iou is None else change_iou
+        self.min_hits = Config.TRACK_MIN_HITS if min_hits is None else min_hits
+        self.tracks = {}
+        self._lock = threading.Lock()
+
+    def _match(self, tracks, objects, idxs):
+        pairs = []
+        for ti, t in enumerate(tracks):
+            tb = t.kf.box()
+            for di in idxs:
+                if objects[di]["label"] != t.label:
+                    continue
+                iou = _iou(tb, objects[di]["box"])
+                if iou >= self.iou_min:
+                    pairs.append((iou, ti, di))
+
+        matched, used_t, used_d = [], set(), set()
+        for iou, ti, di in sorted(pairs, reverse=True):
+            if ti in used_t or di in used_d:
+                continue
+            used_t.add(ti)
+            used_d.add(di)
+            matched.append((tracks[ti], di))
+        return matched, [t for i, t in enumerate(tracks) if i not in used_t], [d for d in idxs if d not in used_d]
+
+    def update(self, objects, ts):
+        """
+        Associates detections (with "box") to tracks and writes "track_id"
+        into each matched or newly created object. Returns the live tracks.
+        """
+        with self._lock:
+            tracks = list(self.tracks.values())
+            for t in tracks:
+                t.kf.predict(ts - t.last_ts)
+                t.last_ts = ts
+
+            boxed = [i for i, o in enumerate(objects) if o.get("box")]
+            high = [i for i in boxed if objects[i]["confidence"] >= self.high_conf]
+            low = [i for i in boxed if objects[i]["confidence"] < self.high_conf]
+
+            matched, rest, new_high = self._match(tracks, objects, high)
+            matched_low, missed, new_low = self._match(rest, objects, low)
+
+            for t, di in matched + matched_low:
+                obj = objects[di]
+                t.kf.update(obj["box"])
+                t.confidence = obj["confidence"]
+                t.hits += 1
+                t.last_seen = ts
+                t.confirmed = t.confirmed or t.hits >= self.min_hits
+                obj["track_id"] = t.id
+
+            for t in missed:
+                if not t.confirmed:
+                    del self.tracks[t.id]
+
+            for di in new_high + new_low:
+                t = Track(next(self._ids), objects[di], ts, confirmed=di in new_high or self.min_hits <= 1)
+                self.tracks[t.id] = t
+                objects[di]["track_id"] = t.id
+
+            for tid in [tid for tid, t in self.tracks.items() if ts - t.last_seen > self.max_age_s]:
+                del self.tracks[tid]
+            return list(self.tracks.values())
+
+    def _reason(self, t, ts):
+        if t.analyzed_at is None:
+            return "new"
+        if t.label != t.analyzed_label or _iou(t.box(), t.analyzed_box) < self.change_iou:
+            return "changed"
+        if self.reanalyze_s > 0 and ts - t.analyzed_at >= self.reanalyze_s:
+            return "interval"
+        return None
+
+    def due_for_analysis(self, ts):
+        """
+        Returns {track_id: reason} for tracks seen at ts that need a new LM
+        Studio analysis (new, significantly changed, or re-analysis interval
+        elapsed), and marks them analyzed.
+        """
+        due = {}
+        with self._lock:
+            for t in self.tracks.values():
+                if t.last_seen != ts or not t.confirmed:
+                    continue
+                reason = self._reason(t, ts)
+                if reason:
+                    due[t.id] = reason
+                    t.analyzed_at = ts
+                    t.analyzed_box = t.box()
+                    t.analyzed_label = t.label
+        return due
+
+    def clear(self):
+        with self._lock:
+            self.tracks.clear()
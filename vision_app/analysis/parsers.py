@@ -1,103 +1,159 @@
+import json
+import logging
 import re
+from functools import lru_cache
+from ..config import Config
+
+logger = logging.getLogger(__name__)
 
 NEGATIVE_PATTERNS = [r"\bno (animal|animals)\b", r"\bnone visible\b", r"\bnot visible\b", r"\bno .* present\b"]
+NEGATIVE_RE = re.compile("|".join(NEGATIVE_PATTERNS))
+
+# Scene descriptions the VLM tends to report as actions
+DROP_ACTIONS = frozenset({"home_office", "study_area", "daytime", "lighting", "wearing"})
+
+# Built-in spellings of the YOLO classes; VISION_ALIASES / VISION_ALIASES_FILE add to them
+DEFAULT_ALIASES = {"people": "person", "persons": "person", "cats": "cat", "kitten": "cat"}
+
+# Heading, bullet or numbered item in one match: group 1 = heading text, group 2 = item
+LINE_RE    = re.compile(r"^\s*(?:#{1,6}\s*(.+?):?|[-*•]\s+(.*\S)|\d+[.)]\s+(.*\S))\s*$")
+
+PARENS_RE  = re.compile(r"\(.*?\)")
+STRIP_RE   = re.compile(r"[^a-z0-9 _\-]")
+HEAD_RE    = re.compile(r"\s*[:\-]\s*| is | are | with | of ")
+APPEARS_RE = re.compile(r"\bappears to be ([a-z][a-z\s\-]+?)(?:[.,;\n]|$)")
+ING_RE     = re.compile(r"\bis ([a-z]+ing)(?:[^\w]|$)")
 
 def norm_item(s: str) -> str:
     """Lowercase, remove parentheses, non-alphanum chars, and articles."""
     if not s:
         return ""
-    s = re.sub(r"\(.*?\)", "", s)
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9 _\-]", "", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    s = re.sub(r"^(a|an|the)\s+", "", s)
+    if "(" in s:
+        s = PARENS_RE.sub("", s)
+    s = " ".join(STRIP_RE.sub("", s.lower()).split())
+    for article in ("a ", "an ", "the "):
+        if s.startswith(article):
+            return s[len(article):]
     return s
 
 def head_noun_phrase(s: str) -> str:
     """Extract a short head noun phrase from a sentence."""
-    s = norm_item(s)
-    parts = re.split(r"\s*[:\-]\s*| is | are | with | of ", s, maxsplit=1)
-    s = parts[0]
-    words = s.split()
-    return " ".join(words[:3])
+    s = HEAD_RE.split(norm_item(s), maxsplit=1)[0]
+    return " ".join(s.split()[:3])
 
 def is_negative_phrase(s: str) -> bool:
-    s = (s or "").lower()
-    return any(re.search(p, s) for p in NEGATIVE_PATTERNS)
+    return NEGATIVE_RE.search((s or "").lower()) is not None
+
+def _load_aliases():
+    table = dict(DEFAULT_ALIASES)
+    if Config.VISION_ALIASES_FILE:
+        try:
+            with open(Config.VISION_ALIASES_FILE, "r", encoding="utf-8") as f:
+                table.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load VISION_ALIASES_FILE: {e}")
+    for entry in (Config.VISION_ALIASES or "").split(","):
+        alias, sep, canonical = entry.partition("=")
+        if sep and alias.strip() and canonical.strip():
+            table[alias.strip()] = canonical.strip()
+    # Keys and values in label form: "Sofa Bed" and "sofa_bed" are the same alias
+    return {_label(k): _label(v) for k, v in table.items() if _label(k) and _label(v)}
 
-def dedupe_and_filter(items):
+def _label(s):
+    return "_".join(norm_item(str(s)).split())
+
+_aliases = None
+
+def set_aliases(table):
+    """Replaces the alias table ({alias: canonical}); None reloads it from the config."""
+    global _aliases
+    _aliases = None if table is None else {_label(k): _label(v) for k, v in table.items()}
+    canonical_label.cache_clear()
+    parse_vision_text.cache_clear()
+
+@lru_cache(maxsize=Config.VISION_ALIAS_CACHE)
+def canonical_label(label: str) -> str:
+    """Maps a label (e.g. "people", "Cats") to its canonical form via the alias table."""
+    global _aliases
+    if _aliases is None:
+        _aliases = _load_aliases()
+    key = _label(label)
+    return _aliases.get(key, key)
+
+def normalize_labels(labels):
+    """Canonical, de-duplicated labels in first-seen order."""
     out, seen = [], set()
-    for it in items:
-        if not it or len(it) <= 1:
-            continue
-        if is_negative_phrase(it):
+    for lab in labels or []:
+        c = canonical_label(lab) if isinstance(lab, str) else None
+        if c and c not in seen:
+            seen.add(c)
+            out.append(c)
+    return out
+
+def _finish(raw, drop=frozenset()):
+    out, seen = [], set()
+    for item in raw:
+        phrase = head_noun_phrase(item)
+        if len(phrase) <= 1 or is_negative_phrase(phrase):
             continue
-        it = re.sub(r"\s+", " ", it).strip()
-        if it not in seen:
-            seen.add(it)
-            out.append(it)
+        label = canonical_label(phrase.replace(" ", "_"))
+        if label not in seen and label not in drop:
+            seen.add(label)
+            out.append(label)
     return out
 
-HEADING_RE = re.compile(r"^\s*#{1,6}\s*(.+?):?\s*$", re.IGNORECASE)
-BULLET_RE  = re.compile(r"^\s*[-*•]\s+(.*\S)\s*$")
-NUM_RE     = re.compile(r"^\s*\d+[.)]\s+(.*\S)\s*$")
-
-def _collect_section(lines, start_idx):
-    items, i = [], start_idx + 1
-    while i < len(lines):
-        line = lines[i].rstrip()
-        if HEADING_RE.match(line):
-            break
-        m = BULLET_RE.match(line) or NUM_RE.match(line)
-        if m:
-            items.append(m.group(1))
-        i += 1
-    return items
+@lru_cache(maxsize=64)
+def parse_vision_text(text: str):
+    """
+    Extracts (objects, actions) from a prose LM Studio answer in one pass
+    over its lines.
 
-def extract_vision_objects(text: str):
+    Objects are the items under the first heading that mentions "object";
+    without one, every item outside "action" sections. Actions are the items
+    under the first heading that mentions "action"; without one, "appears to
+    be ..." and "is ...ing" phrases in the text. Items are reduced to a short
+    head noun phrase, negatives ("none visible") dropped, and labels mapped
+    through the alias table. Cached per text: the objects and actions
+    extractors usually run on the same answer back to back.
+    """
     if not text:
-        return []
-    lines, raw = text.splitlines(), []
-    for idx, line in enumerate(lines):
-        m = HEADING_RE.match(line)
-        if m and "object" in (m.group(1) or "").strip().lower():
-            raw = _collect_section(lines, idx)
-            break
-    if not raw:
-        current = "other"
-        for line in lines:
-            hm = HEADING_RE.match(line)
-            if hm:
-                t = (hm.group(1) or "").strip().lower()
-                if "action" in t: current = "actions"
-                elif "object" in t: current = "objects"
-                else: current = "other"
-                continue
-            bm = BULLET_RE.match(line) or NUM_RE.match(line)
-            if bm and current in ("objects", "other"):
-                raw.append(bm.group(1))
-
-    normed = [head_noun_phrase(x) for x in raw if x]
-    normed = [re.sub(r"\s+", "_", z) for z in normed]
-    return dedupe_and_filter(normed)
+        return (), ()
+    obj_items, act_items, loose = [], [], []
+    obj_state = act_state = 0  # 0 = section not seen yet, 1 = collecting, 2 = done
+    section = "other"
+    for line in text.splitlines():
+        if not line or line.isspace():
+            continue
+        m = LINE_RE.match(line)
+        if m is None:
+            continue
+        heading = m.group(1)
+        if heading is not None:
+            title = heading.strip().lower()
+            obj_state = 2 if obj_state == 1 else (1 if obj_state == 0 and "object" in title else obj_state)
+            act_state = 2 if act_state == 1 else (1 if act_state == 0 and "action" in title else act_state)
+            section = "actions" if "action" in title else ("objects" if "object" in title else "other")
+            continue
+        item = m.group(2) or m.group(3)
+        if obj_state == 1:
+            obj_items.append(item)
+        if act_state == 1:
+            act_items.append(item)
+        if section != "actions":
+            loose.append(item)
 
-def extract_vision_actions(text: str):
-    if not text:
-        return []
-    lines, raw = text.splitlines(), []
-    for idx, line in enumerate(lines):
-        m = HEADING_RE.match(line)
-        if m and "action" in (m.group(1) or "").strip().lower():
-            raw = _collect_section(lines, idx)
-            break
-    if not raw:
+    objects = _finish(obj_items or loose)
+    if not act_items:
         lowered = text.lower()
-        raw += [m.group(1).strip() for m in re.finditer(r"\bappears to be ([a-z][a-z\s\-]+?)(?:[.,;\n]|$)", lowered)]
-        raw += [m.group(1).strip() for m in re.finditer(r"\bis ([a-z]+ing)(?:[^\w]|$)", lowered)]
+        if "appears to be" in lowered:
+            act_items += [m.group(1).strip() for m in APPEARS_RE.finditer(lowered)]
+        if "ing" in lowered:
+            act_items += [m.group(1).strip() for m in ING_RE.finditer(lowered)]
+    actions = _finish(act_items, DROP_ACTIONS)
+    return tuple(objects), tuple(actions)
 
-    normed = [head_noun_phrase(x) for x in raw if x]
-    normed = [re.sub(r"\s+", "_", z) for z in normed]
+def extract_vision_objects(text: str):
+    return list(parse_vision_text(text or "")[0])
 
-    DROP = {"home_office", "study_area", "daytime", "lighting", "wearing"}
-    out = [c for c in dedupe_and_filter(normed) if c not in DROP]
-    return out
+def extract_vision_actions(text: str):
+    return list(parse_vision_text(text or "")[1])
@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from ..config import Config
+from ..utils.stats import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first; detections without track info (TRACKING=0) rank with changed tracks
+PRIORITY = {"new": 0, "changed": 1, "interval": 2}
+DEFAULT_PRIORITY = 1
+
+def item_priority(item):
+    reasons = [t.get("reason") for t in (item.get("result") or {}).get("tracks_due") or []]
+    return min((PRIORITY.get(r, DEFAULT_PRIORITY) for r in reasons), default=DEFAULT_PRIORITY)
+
+def _merge_tracks(newer, older):
+    """Carries the due tracks of a replaced request over to the one that replaces it."""
+    result = newer.get("result") or {}
+    due = {t["track_id"]: t for t in (older.get("result") or {}).get("tracks_due") or []}
+    due.update({t["track_id"]: t for t in result.get("tracks_due") or []})
+    if due:
+        result["tracks_due"] = sorted(due.values(), key=lambda t: (PRIORITY.get(t.get("reason"), DEFAULT_PRIORITY), t["track_id"]))
+
+class VisionScheduler:
+    """
+    Runs analyze_fn over detection packets on `slots` threads, one per
+    LM Studio server slot. Pending requests are served best priority first
+    (new tracks, then changed, then periodic re-analysis), oldest first
+    within a priority. Requests whose frame is older than deadline_s when a
+    slot frees up are dropped. When the queue is full a request replaces
+    the pending one from the same camera (keeping its due tracks); without
+    one, the least urgent request is dropped.
+
+    put() has the RingBuffer signature so it can sit behind the detection stage.
+    """
+    def __init__(self, analyze_fn, slots=None, maxlen=None, deadline_s=None):
+        self.analyze_fn = analyze_fn
+        self.slots = max(1, Config.LMSTUDIO_SLOTS if slots is None else slots)
+        self.maxlen = max(1, Config.VISION_QUEUE if maxlen is None else maxlen)
+        self.deadline_s = Config.VISION_DEADLINE_S if deadline_s is None else deadline_s
+        self._pending = []  # (priority, ts, enqueued_mono, item)
+        self._cond = threading.Condition()
+        self.stop_event = threading.Event()
+        self._threads = [threading.Thread(target=self._run, name=f"vision-{i}", daemon=True)
+                         for i in range(self.slots)]
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.processed = 0
+        self.errors = 0
+        self.expired = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.wait = LatencyWindow(256)       # queued -> slot
+        self.inference = LatencyWindow(256)  # analyze_fn duration
+
+    def put(self, item):
+        entry = (item_priority(item), item.get("ts") or time.time(), time.monotonic(), item)
+        with self._cond:
+            self.submitted += 1
+            if len(self._pending) >= self.maxlen:
+                same = [i for i, e in enumerate(self._pending) if e[3].get("camera") == item.get("camera")]
+                if same:
+                    old = self._pending.pop(same[0])
+                    _merge_tracks(item, old[3])
+                    # Keeps the queue position (enqueue time) and best priority of the request it replaces
+                    entry = (min(entry[0], old[0]), entry[1], old[2], item)
+                    self.coalesced += 1
+                else:
+                    worst = max(range(len(self._pending)), key=lambda i: (self._pending[i][0], -self._pending[i][1]))
+                    if (self._pending[worst][0], -self._pending[worst][1]) < (entry[0], -entry[1]):
+                        self.dropped += 1
+                        return
+                    del self._pending[worst]
+                    self.dropped += 1
+            self._pending.append(entry)
+            self._cond.notify()
+
+    def _next(self):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._pending or self.stop_event.is_set(), 0.5):
+                return None
+            if self.stop_event.is_set():
+                return None
+            now = time.time()
+            if self.deadline_s > 0:
+                live = [e for e in self._pending if now - e[1] <= self.deadline_s]
+                self.expired += len(self._pending) - len(live)
+                self._pending = live
+                if not live:
+                    return None
+            best = min(range(len(self._pending)), key=lambda i: self._pending[i][:2])
+            entry = self._pending.pop(best)
+            self.in_flight += 1
+        self.wait.add(time.monotonic() - entry[2])
+        return entry[3]
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            item = self._next()
+            if item is None:
+                continue
+            t0 = time.monotonic()
+            try:
+                self.analyze_fn(item)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"vision stage error: {e}", exc_info=True)
+            finally:
+                self.inference.add(time.monotonic() - t0)
+                with self._cond:
+                    self.in_flight -= 1
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        for t in self._threads:
+            t.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            depth, in_flight = len(self._pending), self.in_flight
+        return {
+            "depth": depth,
+            "capacity": self.maxlen,
+            "in_flight": f"{in_flight}/{self.slots}",
+            "processed": self.processed,
+            "errors": self.errors,
+            "expired": self.expired,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "wait": self.wait.summary(),
+            "inference": self.inference.summary(),
+        }
@@ -1,39 +1,146 @@
+import heapq
+import threading
 from time import time
+import numpy as np
 
 class SeenTracker:
     """
     Tracks detected objects, including their count, last seen time, and current presence.
+
+    Labels are interned to integer slots; counts, last-seen times and the
+    update generation that last saw a label live in NumPy arrays, so an
+    update touches only the labels it reports. Expiry pops a time-ordered
+    heap (stale heap entries are skipped lazily) instead of scanning every
+    label. snapshot() is versioned: it returns the same dict object until the
+    tracker changes, so callers must treat it as read-only. A changed
+    snapshot is a shallow copy of the previous one with only the touched
+    records rebuilt.
     """
-    def __init__(self, ttl=None):
+    def __init__(self, ttl=None, capacity=64):
         self.ttl = ttl
-        self.data = {}  # label -> {count, last_seen, present}
+        self._ids = {}       # label -> slot
+        self._labels = []    # slot -> label (None when free)
+        self._free = []
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._last_seen = np.zeros(capacity, dtype=np.float64)
+        self._seen_gen = np.zeros(capacity, dtype=np.int64)  # == _gen: present in the latest update
+        self._expiry = []    # (last_seen, slot) heap, may hold outdated entries
+        self._gen = 0
+        self._present = []   # slots present in the latest update
+        self._dirty = set()  # slots changed since the last snapshot
+        self._removed = set()  # labels expired since the last snapshot
+        self.version = 0
+        self._snapshot = (-1, {})
+        self._lock = threading.Lock()  # updated by pipeline workers, read by the TUI
+
+    def _slot(self, label):
+        slot = self._ids.get(label)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+            self._labels[slot] = label
+        else:
+            slot = len(self._labels)
+            self._labels.append(label)
+            if slot >= len(self._count):
+                grow = len(self._count)
+                self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+                self._last_seen = np.concatenate([self._last_seen, np.zeros(grow, dtype=np.float64)])
+                self._seen_gen = np.concatenate([self._seen_gen, np.zeros(grow, dtype=np.int64)])
+        self._count[slot] = 0
+        self._seen_gen[slot] = 0
+        self._ids[label] = slot
+        return slot
+
+    def _expire(self, now):
+        if self.ttl is None:
+            return
+        cutoff = now - self.ttl
+        heap = self._expiry
+        expired = False
+        while heap and heap[0][0] < cutoff:
+            ts, slot = heapq.heappop(heap)
+            label = self._labels[slot]
+            if label is None or self._last_seen[slot] != ts:
+                continue  # freed already, or seen again later
+            del self._ids[label]
+            self._labels[slot] = None
+            self._free.append(slot)
+            self._dirty.discard(slot)
+            self._removed.add(label)
+            expired = True
+        if expired:
+            self.version += 1
+        # Outdated entries pile up for labels seen every update; rebuild once they dominate
+        if len(heap) > 4 * len(self._ids) + 64:
+            self._expiry = [(self._last_seen[s], s) for s in self._ids.values()]
+            heapq.heapify(self._expiry)
 
     def update(self, labels_now):
         """
         Updates the tracker with the latest set of detected labels.
         """
         now = time()
-        for v in self.data.values():
-            v["present"] = False
-
-        for lab in labels_now:
-            rec = self.data.setdefault(lab, {"count": 0, "last_seen": 0.0, "present": False})
-            rec["count"] += 1
-            rec["last_seen"] = now
-            rec["present"] = True
-
-        if self.ttl is not None:
-            cutoff = now - self.ttl
-            self.data = {k: v for k, v in self.data.items() if v["last_seen"] >= cutoff}
+        with self._lock:
+            previous = self._present
+            self._gen += 1
+            self._present = []
+            for lab in labels_now:
+                slot = self._slot(lab)
+                self._count[slot] += 1
+                if self._seen_gen[slot] != self._gen:
+                    self._seen_gen[slot] = self._gen
+                    self._present.append(slot)
+                    if self.ttl is not None:
+                        heapq.heappush(self._expiry, (now, slot))
+                self._last_seen[slot] = now
+            if self._present or previous:
+                # Labels present last time are no longer present unless seen again
+                self._dirty.update(previous)
+                self._dirty.update(self._present)
+                self.version += 1
+            self._expire(now)
 
     def clear(self):
         """
         Resets the tracker's memory.
         """
-        self.data.clear()
+        with self._lock:
+            self._ids.clear()
+            self._labels.clear()
+            self._free.clear()
+            self._expiry.clear()
+            self._present = []
+            self._dirty.clear()
+            self._removed.clear()
+            self._snapshot = (-1, {})
+            self.version += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
 
     def snapshot(self):
         """
-        Returns a copy of the current tracking data.
+        Returns {label: {"count", "last_seen", "present"}}. The dict is rebuilt
+        only when the tracker changed since the previous call; otherwise the
+        previous (shared, read-only) object is returned.
         """
-        return {k: dict(v) for k, v in self.data.items()}
+        with self._lock:
+            self._expire(time())
+            version, snap = self._snapshot
+            if version == self.version:
+                return snap
+            snap = dict(snap)
+            for label in self._removed:
+                snap.pop(label, None)
+            for slot in self._dirty:
+                label = self._labels[slot]
+                if label is not None:
+                    snap[label] = {"count": int(self._count[slot]), "last_seen": float(self._last_seen[slot]),
+                                   "present": bool(self._seen_gen[slot] == self._gen)}
+            self._removed.clear()
+            self._dirty.clear()
+            self._snapshot = (self.version, snap)
+            return snap
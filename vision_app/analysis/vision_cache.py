@@ -0,0 +1,139 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+def dhash(frame_bgr, size=8):
+    """64-bit difference hash of a downscaled gray frame."""
+    gray = frame_bgr if frame_bgr.ndim == 2 else cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def phash(frame_bgr, size=8):
+    """64-bit DCT perceptual hash of a downscaled gray frame."""
+    gray = frame_bgr if frame_bgr.ndim == 2 else cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:size, :size].flatten()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+HASHES = {"dhash": dhash, "phash": phash}
+
+class VisionCache:
+    """
+    Caches LM Studio results keyed on a perceptual hash of the frame. A frame
+    whose hash is within max_distance bits (Hamming) of a cached one for the
+    same camera reuses that result. In-memory TTL + LRU, optional SQLite file.
+    """
+    def __init__(self, max_entries=None, ttl_s=None, max_distance=None, db_path=None, algo=None):
+        self.max_entries = Config.VISION_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_s = Config.VISION_CACHE_TTL_S if ttl_s is None else ttl_s
+        self.max_distance = Config.VISION_CACHE_MAX_DIST if max_distance is None else max_distance
+        self.hash_fn = HASHES[(algo or Config.VISION_CACHE_HASH).lower()]
+        self.entries = OrderedDict()  # (camera, hash) -> {"result", "ts", "elapsed"}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_s = 0.0
+
+        self._db = None
+        db_path = db_path if db_path is not None else Config.VISION_CACHE_DB
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vision_cache ("
+            " camera TEXT, hash TEXT, ts REAL, elapsed REAL, result TEXT,"
+            " PRIMARY KEY (camera, hash))"
+        )
+        cutoff = time.time() - self.ttl_s
+        self._db.execute("DELETE FROM vision_cache WHERE ts < ?", (cutoff,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT camera, hash, ts, elapsed, result FROM vision_cache ORDER BY ts DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for camera, h, ts, elapsed, result in reversed(rows):
+            self.entries[(camera, int(h, 16))] = {"result": json.loads(result), "ts": ts, "elapsed": elapsed}
+        logger.info(f"Vision cache: loaded {len(rows)} entries from {path}")
+
+    def frame_hash(self, frame_bgr):
+        return self.hash_fn(frame_bgr)
+
+    def lookup(self, frame_hash, camera=None):
+        """
+        Returns a copy of the closest cached result within max_distance, or None.
+        """
+        now = time.time()
+        best_key, best_d = None, self.max_distance + 1
+        with self._lock:
+            for key, e in list(self.entries.items()):
+                if now - e["ts"] > self.ttl_s:
+                    del self.entries[key]
+                    continue
+                if key[0] != camera:
+                    continue
+                d = (key[1] ^ frame_hash).bit_count()
+                if d < best_d:
+                    best_key, best_d = key, d
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            e = self.entries[best_key]
+            self.entries.move_to_end(best_key)
+            self.hits += 1
+            self.saved_s += e["elapsed"]
+            result = copy.deepcopy(e["result"])
+        result["cache"] = {"hit": True, "distance": best_d, "age_s": round(now - e["ts"], 1)}
+        return result
+
+    def store(self, frame_hash, result, elapsed, camera=None):
+        if not result or result.get("status") != "ok":
+            return
+        now = time.time()
+        entry = {"result": copy.deepcopy(result), "ts": now, "elapsed": elapsed}
+        with self._lock:
+            key = (camera, frame_hash)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO vision_cache (camera, hash, ts, elapsed, result) VALUES (?, ?, ?, ?, ?)",
+                        (camera, f"{frame_hash:016x}", now, elapsed, json.dumps(entry["result"])),
+                    )
+                    self._db.execute("DELETE FROM vision_cache WHERE ts < ?", (now - self.ttl_s,))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Vision cache persist failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "saved_llm_s": round(self.saved_s, 1),
+            }
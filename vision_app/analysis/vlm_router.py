@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+import aiohttp
+from ..config import Config
+from ..utils.helpers import build_api_url
+from ..utils.io_service import get_io_service
+from ..utils.stats import LatencyWindow, Histogram
+from ..metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+class Endpoint:
+    """One OpenAI-compatible VLM server, with its load, health and latency state."""
+    def __init__(self, url, model):
+        self.url = url.rstrip("/")
+        self.model = model
+        self.name = urlparse(self.url).netloc or self.url
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0   # consecutive
+        self.trips = 0
+        self.state = "closed"  # closed = healthy, open = circuit broken
+        self.open_until = 0.0
+        self.probing = False
+        self.ewma = None    # smoothed request latency (s)
+        self.latency = LatencyWindow(256)
+        self.histogram = Histogram()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency": self.latency.summary(),
+        }
+
+def parse_endpoints(spec=None):
+    """
+    LMSTUDIO_ENDPOINTS: comma-separated "url" or "url|model" entries. Falls
+    back to LMSTUDIO_URL / LMSTUDIO_MODEL when empty. Endpoints are named by
+    host:port, plus "|model" (and "#n") where that alone is ambiguous.
+    """
+    spec = Config.LMSTUDIO_ENDPOINTS if spec is None else spec
+    endpoints = []
+    for entry in (e.strip() for e in spec.split(",")):
+        if not entry:
+            continue
+        url, _, model = entry.partition("|")
+        endpoints.append(Endpoint(url.strip(), model.strip() or Config.LMSTUDIO_MODEL))
+    if not endpoints and Config.LMSTUDIO_URL and Config.LMSTUDIO_MODEL:
+        endpoints.append(Endpoint(Config.LMSTUDIO_URL, Config.LMSTUDIO_MODEL))
+
+    # Names key the stats, HTTP sessions and metric series: one server with several models needs the model in it
+    hosts = [ep.name for ep in endpoints]
+    seen = set()
+    for ep in endpoints:
+        if hosts.count(ep.name) > 1:
+            ep.name = f"{ep.name}|{ep.model}"
+        base, n = ep.name, 1
+        while ep.name in seen:
+            n += 1
+            ep.name = f"{base}#{n}"
+        seen.add(ep.name)
+    return endpoints
+
+class VLMRouter:
+    """
+    Spreads requests over several VLM endpoints. Policy "least_outstanding"
+    picks the endpoint with the fewest requests in flight (ties by latency),
+    "latency" the lowest (outstanding + 1) x smoothed latency. An endpoint
+    that fails fail_threshold times in a row is taken out (circuit open) and
+    probed via GET /v1/models after probe_s, doubling per consecutive trip.
+
+    All methods except stats() must run on the I/O service loop.
+    """
+    def __init__(self, endpoints, policy=None, fail_threshold=None, probe_s=None):
+        self.endpoints = endpoints
+        self.policy = (policy or Config.LMSTUDIO_BALANCE).lower()
+        self.fail_threshold = max(1, Config.LMSTUDIO_BREAKER_FAILS if fail_threshold is None else fail_threshold)
+        self.probe_s = Config.LMSTUDIO_PROBE_S if probe_s is None else probe_s
+
+    def _score(self, ep):
+        if self.policy == "latency":
+            return ((ep.outstanding + 1) * (ep.ewma or 0.0), ep.outstanding)
+        return (ep.outstanding, ep.ewma or 0.0)
+
+    def pick(self):
+        """Returns the endpoint for the next request, or None when all are circuit-broken."""
+        now = time.monotonic()
+        for ep in self.endpoints:
+            if ep.state == "open" and now >= ep.open_until and not ep.probing:
+                ep.probing = True
+                asyncio.get_running_loop().create_task(self._probe(ep))
+        healthy = [ep for ep in self.endpoints if ep.state == "closed"]
+        if not healthy:
+            return None
+        return min(healthy, key=self._score)
+
+    def begin(self, ep):
+        ep.outstanding += 1
+        ep.requests += 1
+
+    def end(self, ep, elapsed, failed):
+        ep.outstanding -= 1
+        if failed:
+            ep.errors += 1
+            ep.failures += 1
+            if ep.state == "closed" and ep.failures >= self.fail_threshold:
+                self._trip(ep)
+            return
+        ep.failures = 0
+        ep.latency.add(elapsed)
+        ep.histogram.add(elapsed)
+        ep.ewma = elapsed if ep.ewma is None else 0.8 * ep.ewma + 0.2 * elapsed
+
+    def _trip(self, ep):
+        ep.trips += 1
+        delay = min(self.probe_s * 2 ** (ep.trips - 1), 300.0)
+        ep.state = "open"
+        ep.open_until = time.monotonic() + delay
+        logger.warning(f"VLM endpoint {ep.name} taken out after {ep.failures} failures, probing in {delay:.1f}s")
+
+    async def _probe(self, ep):
+        try:
+            session = get_io_service().get_session(f"lmstudio:{ep.name}", limit=Config.LMSTUDIO_CONN_LIMIT)
+            async with session.get(build_api_url(ep.url, "models"),
+                                   timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                healthy = resp.status // 100 == 2
+        except Exception as e:
+            logger.debug(f"VLM endpoint {ep.name} probe failed: {e!r}")
+            healthy = False
+        finally:
+            ep.probing = False
+
+        if healthy:
+            ep.state = "closed"
+            ep.failures = 0
+            ep.trips = 0
+            logger.info(f"VLM endpoint {ep.name} is healthy again")
+        else:
+            self._trip(ep)
+
+    def stats(self):
+        return {ep.name: ep.stats() for ep in self.endpoints}
+
+
+_router = None
+
+def get_router():
+    """Returns the process-wide router over the configured endpoints."""
+    global _router
+    if _router is None:
+        _router = VLMRouter(parse_endpoints())
+        metrics = get_metrics()
+        for ep in _router.endpoints:
+            metrics.add_histogram("vlm_request_seconds", ep.histogram, endpoint=ep.name)
+    return _router
+
+def router_stats():
+    return _router.stats() if _router is not None else {}
@@ -0,0 +1,47 @@
+import json
+import logging
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+def _camera_entry(idx, entry):
+    if isinstance(entry, str):
+        entry = {"url": entry}
+    url = entry.get("url")
+    if not url:
+        raise ValueError(f"Camera #{idx + 1} has no url")
+    return {"id": str(entry.get("id") or f"cam{idx + 1}"), "url": url}
+
+def load_cameras():
+    """
+    Returns the multi-camera list as [{"id": ..., "url": ...}].
+
+    CAMERAS_FILE points to a JSON file holding either a list or
+    {"cameras": [...]}, with entries as url strings or {"id", "url"} objects.
+    CAMERAS is a comma-separated list of "url" or "id=url" entries.
+    An empty list means single-source mode (PiCam or RTSP_URL).
+    """
+    raw = []
+    if Config.CAMERAS_FILE:
+        with open(Config.CAMERAS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        raw = data.get("cameras", []) if isinstance(data, dict) else data
+    elif Config.CAMERAS:
+        for entry in Config.CAMERAS.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            cam_id, sep, url = entry.partition("=")
+            if sep and "://" not in cam_id:
+                raw.append({"id": cam_id.strip(), "url": url.strip()})
+            else:
+                raw.append(entry)
+
+    cameras = [_camera_entry(i, e) for i, e in enumerate(raw)]
+    ids = [c["id"] for c in cameras]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"Duplicate camera ids in configuration: {ids}")
+
+    if cameras:
+        logger.info(f"Multi-camera mode: {', '.join(ids)}")
+    return cameras
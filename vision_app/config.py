@@ -4,23 +4,147 @@ class Config:
     RTSP_URL = os.getenv("RTSP_URL")
     MODEL_PATH = os.getenv("YOLO_MODEL", "yolov8n.pt")
     FPS_SAMPLING = int(os.getenv("FPS_SAMPLING", "1"))
+    # Adaptive sampling: idle rate when quiet, burst rate while motion / tracks are present
+    ADAPTIVE_SAMPLING = os.getenv("ADAPTIVE_SAMPLING", "1").lower() in ("1", "true", "yes")
+    FPS_IDLE = float(os.getenv("FPS_IDLE", "0.2"))
+    FPS_BURST = float(os.getenv("FPS_BURST", "2"))
+    IDLE_AFTER_S = float(os.getenv("IDLE_AFTER_S", "30"))
+    BURST_HOLD_S = float(os.getenv("BURST_HOLD_S", "5"))
+    CPU_LOAD_MAX = float(os.getenv("CPU_LOAD_MAX", "0.9"))  # 1-min load average per core
+    CPU_TEMP_MAX_C = float(os.getenv("CPU_TEMP_MAX_C", "75"))
     FRAME_SIZE = tuple(map(int, os.getenv("FRAME_SIZE", "640,480").split(",")))  # (w,h)
     CONF_MIN = float(os.getenv("CONF_MIN", "0.5"))
+    YOLO_MAX_BATCH = int(os.getenv("YOLO_MAX_BATCH", "8"))
+    YOLO_MAX_WAIT_MS = float(os.getenv("YOLO_MAX_WAIT_MS", "0"))  # >0 merges concurrent detect() calls
+    # Inference backend: auto (startup self-benchmark), torch, onnx, openvino
+    YOLO_BACKEND = os.getenv("YOLO_BACKEND", "torch").lower()
+    YOLO_PRECISION = os.getenv("YOLO_PRECISION", "fp32").lower()  # fp32, fp16, int8
+    YOLO_BENCH_RUNS = int(os.getenv("YOLO_BENCH_RUNS", "5"))
+    YOLO_INT8_DATA = os.getenv("YOLO_INT8_DATA", "coco8.yaml")  # calibration set for OpenVINO INT8
+    MODEL_CACHE_DIR = os.path.expanduser(os.getenv("MODEL_CACHE_DIR", "~/.cache/vision_app/models"))
     WEBHOOK = os.getenv("N8N_URL")
-    MOTION_THRESH = float(os.getenv("MOTION_THRESH", "5.0"))
-    REOPEN_EVERY_S = int(os.getenv("REOPEN_EVERY_S", "60"))
+
+    # Box tracking: LM Studio + webhook only fire for new / changed tracks or after TRACK_REANALYZE_S
+    TRACKING = os.getenv("TRACKING", "1").lower() in ("1", "true", "yes")
+    TRACK_IOU_MIN = float(os.getenv("TRACK_IOU_MIN", "0.2"))
+    TRACK_HIGH_CONF = float(os.getenv("TRACK_HIGH_CONF", "0.6"))  # below: second (ByteTrack) association pass only
+    TRACK_MIN_HITS = int(os.getenv("TRACK_MIN_HITS", "2"))  # hits before a track started below TRACK_HIGH_CONF counts
+    TRACK_MAX_AGE_S = float(os.getenv("TRACK_MAX_AGE_S", "10"))
+    TRACK_REANALYZE_S = float(os.getenv("TRACK_REANALYZE_S", "300"))
+    TRACK_CHANGE_IOU = float(os.getenv("TRACK_CHANGE_IOU", "0.3"))  # IoU vs last analyzed box below this = changed
+    # Motion gate: % of 1/8-scale pixels that differ from a running-average background
+    MOTION_THRESH_PCT = float(os.getenv("MOTION_THRESH_PCT", "0.5"))
+    MOTION_THRESH_LEGACY = os.getenv("MOTION_THRESH")  # old mean-diff scale, ignored (warned about at startup)
+    MOTION_BG_ALPHA = float(os.getenv("MOTION_BG_ALPHA", "0.05"))  # background learning rate per sample, 1 = frame diff
+    MOTION_NOISE_K = float(os.getenv("MOTION_NOISE_K", "3.0"))  # pixel threshold = max(MOTION_PIXEL_THRESH, k * noise)
+    # Motion regions: off (full frame), crop (one detector input per region) or tile (regions packed in one input)
+    MOTION_ROI_MODE = os.getenv("MOTION_ROI_MODE", "off").lower()
+    MOTION_PIXEL_THRESH = int(os.getenv("MOTION_PIXEL_THRESH", "25"))  # minimum per-pixel diff on the 1/8 mask
+    MOTION_MIN_AREA = int(os.getenv("MOTION_MIN_AREA", "2"))  # in 1/8-scale pixels
+    MOTION_ROI_PAD = float(os.getenv("MOTION_ROI_PAD", "0.25"))  # fraction of region size per side
+    MOTION_ROI_MIN = int(os.getenv("MOTION_ROI_MIN", "160"))  # minimum crop edge, full-frame pixels
+    MOTION_ROI_MAX = int(os.getenv("MOTION_ROI_MAX", "8"))
+    MOTION_ROI_MAX_COVERAGE = float(os.getenv("MOTION_ROI_MAX_COVERAGE", "0.6"))
+    REOPEN_EVERY_S = int(os.getenv("REOPEN_EVERY_S", "0"))  # planned hot-swap rotation, 0 = only on watchdog trips
     MAX_RECONNECT_ATTEMPTS = int(os.getenv("MAX_RECONNECT_ATTEMPTS", "3"))
     FFMPEG_TIMEOUT = int(os.getenv("FFMPEG_TIMEOUT", "5000000"))  # microseconds
+    RTSP_DECODE_EVERY = int(os.getenv("RTSP_DECODE_EVERY", "1"))  # retrieve only every Nth grabbed frame
+    RTSP_STALL_S = float(os.getenv("RTSP_STALL_S", "5"))  # no new frame for this long = stalled, reopen
+    # Reconnect watchdog (any source)
+    STREAM_STALL_S = float(os.getenv("STREAM_STALL_S", "10"))
+    STREAM_MAX_BAD_FRAMES = int(os.getenv("STREAM_MAX_BAD_FRAMES", "50"))
+    RECONNECT_MAX_BACKOFF_S = float(os.getenv("RECONNECT_MAX_BACKOFF_S", "30"))
+    # RTSP decoder: opencv (cv2.VideoCapture) or pyav
+    STREAM_BACKEND = os.getenv("STREAM_BACKEND", "opencv").lower()
+    PYAV_THREADS = int(os.getenv("PYAV_THREADS", "2"))
+    PYAV_KEYFRAMES_ONLY = os.getenv("PYAV_KEYFRAMES_ONLY", "0").lower() in ("1", "true", "yes")
+    PYAV_SIZE = tuple(map(int, os.getenv("PYAV_SIZE").split(","))) if os.getenv("PYAV_SIZE") else None  # (w,h) output
+    PYAV_LOWRES = int(os.getenv("PYAV_LOWRES", "0"))  # decoder lowres factor 0-3, codec permitting
     DETECTORNAME= os.getenv("DETECTORNAME", "UnnamedDetector")
     # Primair bron kiezen: picam of rtsp
     USE_PICAM = os.getenv("USE_PICAM", "1").lower() in ("1", "true", "yes")
+    # PiCam detection frame size, default FRAME_SIZE; optional full-res main stream size, kept per frame for snapshots
+    PICAM_MAIN_SIZE = tuple(map(int, os.getenv("PICAM_MAIN_SIZE").split(","))) if os.getenv("PICAM_MAIN_SIZE") else None
+    PICAM_SNAPSHOT_SIZE = tuple(map(int, os.getenv("PICAM_SNAPSHOT_SIZE").split(","))) if os.getenv("PICAM_SNAPSHOT_SIZE") else None
+
+    # Multi-camera: comma-separated "url" / "id=url" list, or a JSON file
+    CAMERAS = os.getenv("CAMERAS", "")
+    CAMERAS_FILE = os.getenv("CAMERAS_FILE")
+    CAMERA_ID = os.getenv("CAMERA_ID", "cam0")  # id used in single-source mode
+
+    # Pipeline queues (drop-oldest ring buffers between stages; the webhook queue spills into the spool)
+    CAPTURE_BUFFER = int(os.getenv("CAPTURE_BUFFER", "2"))
+    VISION_QUEUE = int(os.getenv("VISION_QUEUE", "4"))
+    WEBHOOK_QUEUE = int(os.getenv("WEBHOOK_QUEUE", "32"))
 
     # LM Studio (OpenAI-compatible)
     LMSTUDIO_URL = os.getenv("LMSTUDIO_URL", "http://127.0.0.1:1234").rstrip("/")
     LMSTUDIO_MODEL = os.getenv("LMSTUDIO_MODEL", "qwen/qwen2.5-vl-7b")
+    LMSTUDIO_TIMEOUT = float(os.getenv("LMSTUDIO_TIMEOUT", "60"))  # seconds per request
+    # Several OpenAI-compatible servers: "url,url|model,..." (empty = LMSTUDIO_URL / LMSTUDIO_MODEL)
+    LMSTUDIO_ENDPOINTS = os.getenv("LMSTUDIO_ENDPOINTS", "")
+    LMSTUDIO_BALANCE = os.getenv("LMSTUDIO_BALANCE", "least_outstanding")  # or latency
+    LMSTUDIO_BREAKER_FAILS = int(os.getenv("LMSTUDIO_BREAKER_FAILS", "3"))  # consecutive failures before taking a server out
+    LMSTUDIO_PROBE_S = float(os.getenv("LMSTUDIO_PROBE_S", "10"))  # first health probe after a trip
+    LMSTUDIO_SLOTS = int(os.getenv("LMSTUDIO_SLOTS", "2"))  # concurrent requests, match the server's parallel slots
+    VISION_DEADLINE_S = float(os.getenv("VISION_DEADLINE_S", "30"))  # drop queued frames older than this, 0 = never
+    LMSTUDIO_STREAM = os.getenv("LMSTUDIO_STREAM", "1").lower() in ("1", "true", "yes")  # SSE, stop at complete JSON
+    LMSTUDIO_FALLBACK = os.getenv("LMSTUDIO_FALLBACK", "1").lower() in ("1", "true", "yes")  # prose retry on bad JSON
+
+    # HTTP client pools (shared event loop, keep-alive sessions)
+    HTTP_CONN_LIMIT = int(os.getenv("HTTP_CONN_LIMIT", "8"))
+    HTTP_KEEPALIVE_S = float(os.getenv("HTTP_KEEPALIVE_S", "30"))
+    LMSTUDIO_CONN_LIMIT = int(os.getenv("LMSTUDIO_CONN_LIMIT", "4"))
+    WEBHOOK_CONN_LIMIT = int(os.getenv("WEBHOOK_CONN_LIMIT", "4"))
+    WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "15"))  # seconds
+
+    # Webhook delivery: batching and optional SQLite retry spool (off unless WEBHOOK_SPOOL is set)
+    WEBHOOK_BATCH_MAX = int(os.getenv("WEBHOOK_BATCH_MAX", "1"))  # >1 posts {"events": [...]}
+    WEBHOOK_BATCH_WINDOW_MS = float(os.getenv("WEBHOOK_BATCH_WINDOW_MS", "0"))
+    WEBHOOK_SPOOL = os.path.expanduser(os.getenv("WEBHOOK_SPOOL", ""))  # e.g. ~/.cache/vision_app/webhook_spool.db
+    WEBHOOK_SPOOL_MAX = int(os.getenv("WEBHOOK_SPOOL_MAX", "10000"))
+    WEBHOOK_RETRY_BASE_S = float(os.getenv("WEBHOOK_RETRY_BASE_S", "2"))
+    WEBHOOK_RETRY_MAX_S = float(os.getenv("WEBHOOK_RETRY_MAX_S", "300"))
+
+    # LM Studio result cache keyed on a perceptual hash of the frame
+    VISION_CACHE = os.getenv("VISION_CACHE", "1").lower() in ("1", "true", "yes")
+    VISION_CACHE_HASH = os.getenv("VISION_CACHE_HASH", "dhash")  # dhash or phash
+    VISION_CACHE_MAX_DIST = int(os.getenv("VISION_CACHE_MAX_DIST", "4"))  # Hamming bits out of 64
+    VISION_CACHE_TTL_S = float(os.getenv("VISION_CACHE_TTL_S", "120"))
+    VISION_CACHE_SIZE = int(os.getenv("VISION_CACHE_SIZE", "256"))
+    VISION_CACHE_DB = os.getenv("VISION_CACHE_DB")  # optional SQLite file, survives restarts
+
+    # Label aliases for LM Studio tags: "people=person,sofa=couch" and/or a JSON file {"alias": "canonical"}
+    VISION_ALIASES = os.getenv("VISION_ALIASES", "")
+    VISION_ALIASES_FILE = os.getenv("VISION_ALIASES_FILE")
+    VISION_ALIAS_CACHE = int(os.getenv("VISION_ALIAS_CACHE", "4096"))  # LRU size of the label lookup
 
     # Snapshots
     JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "92"))
+    # VLM snapshot encoding: downscale, optional crop to the detected boxes, quality search
+    # between SNAPSHOT_MIN_QUALITY and JPEG_QUALITY to fit SNAPSHOT_MAX_BYTES (0 = fixed JPEG_QUALITY)
+    SNAPSHOT_MAX_EDGE = int(os.getenv("SNAPSHOT_MAX_EDGE", "1024"))
+    SNAPSHOT_CROP = os.getenv("SNAPSHOT_CROP", "0").lower() in ("1", "true", "yes")
+    SNAPSHOT_CROP_MARGIN = float(os.getenv("SNAPSHOT_CROP_MARGIN", "0.25"))
+    SNAPSHOT_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_BYTES", "150000"))
+    SNAPSHOT_MIN_QUALITY = int(os.getenv("SNAPSHOT_MIN_QUALITY", "50"))
+    JPEG_ENCODER = os.getenv("JPEG_ENCODER", "auto")  # auto, simplejpeg, turbojpeg or opencv
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+    SNAPSHOT_STORE_MB = float(os.getenv("SNAPSHOT_STORE_MB", "0"))  # fixed-size ring file, 0 = off
+
+    # Event store: every event in a WAL-mode SQLite file with hourly label counts (off unless EVENT_STORE is set)
+    EVENT_STORE = os.path.expanduser(os.getenv("EVENT_STORE", ""))  # e.g. ~/.cache/vision_app/events.db
+    EVENT_STORE_BATCH_MAX = int(os.getenv("EVENT_STORE_BATCH_MAX", "200"))  # events per transaction
+    EVENT_STORE_FLUSH_MS = float(os.getenv("EVENT_STORE_FLUSH_MS", "500"))
+    EVENT_STORE_QUEUE = int(os.getenv("EVENT_STORE_QUEUE", "5000"))
+    EVENT_RETENTION_DAYS = float(os.getenv("EVENT_RETENTION_DAYS", "30"))  # raw events, 0 = keep forever
+    EVENT_HOURLY_RETENTION_DAYS = float(os.getenv("EVENT_HOURLY_RETENTION_DAYS", "365"))
+    EVENT_STORE_COMPACT_S = float(os.getenv("EVENT_STORE_COMPACT_S", "3600"))
+
+    # Metrics: counters, gauges and per-stage histograms on http://METRICS_HOST:METRICS_PORT/metrics
+    METRICS = os.getenv("METRICS", "1").lower() in ("1", "true", "yes")
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 = no HTTP endpoint
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
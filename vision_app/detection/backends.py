@@ -0,0 +1,204 @@
+import hashlib
+import importlib.util
+import logging
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+import torch
+from ultralytics import YOLO
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+def model_hash(path, chunk_size=1 << 20):
+    """sha256 of the model file, used as export cache key."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+class InferenceBackend(ABC):
+    """
+    Wraps one runtime behind the ultralytics YOLO predict interface, so
+    YoloDetector keeps its class filter, CONF_MIN and result format.
+    """
+    name = "base"
+    module = None
+    precisions = ("fp32",)
+
+    def __init__(self, model_path, precision="fp32"):
+        if precision not in self.precisions:
+            logger.warning(f"{self.name}: precision {precision} not supported, using fp32")
+            precision = "fp32"
+        self.model_path = model_path
+        self.precision = precision
+        self.model = None
+        self.predict_kwargs = {}
+
+    @classmethod
+    def available(cls):
+        return True
+
+    @abstractmethod
+    def load(self):
+        """Loads the model into self.model and returns self."""
+        pass
+
+    def predict(self, batch, **kwargs):
+        return self.model(batch, **self.predict_kwargs, **kwargs)
+
+    def __str__(self):
+        return f"{self.name}/{self.precision}"
+
+
+class TorchBackend(InferenceBackend):
+    name = "torch"
+    precisions = ("fp32", "fp16")
+
+    def load(self):
+        self.model = YOLO(self.model_path)
+        if self.precision == "fp16":
+            if torch.cuda.is_available():
+                self.predict_kwargs["half"] = True
+            else:
+                logger.warning("torch: fp16 needs CUDA, running fp32 on CPU")
+                self.precision = "fp32"
+        return self
+
+
+class ExportedBackend(InferenceBackend):
+    """
+    Exports the PyTorch model once per (model hash, format, precision, size)
+    into MODEL_CACHE_DIR and loads the cached artifact on later starts.
+    """
+    export_format = None
+    suffix = ""
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec(cls.module) is not None
+
+    def _cache_path(self, src_path):
+        w, h = Config.FRAME_SIZE
+        key = f"{model_hash(src_path)}-{self.export_format}-{self.precision}-{w}x{h}"
+        stem = os.path.splitext(os.path.basename(src_path))[0]
+        return os.path.join(Config.MODEL_CACHE_DIR, key, stem + self.suffix)
+
+    def _export(self, source):
+        w, h = Config.FRAME_SIZE
+        kwargs = {"format": self.export_format, "imgsz": (h, w), "dynamic": True,
+                  "batch": Config.YOLO_MAX_BATCH, "verbose": False}
+        if self.precision == "fp16":
+            kwargs["half"] = True
+        return source.export(**kwargs)
+
+    def load(self):
+        source = YOLO(self.model_path)  # downloads the .pt if needed
+        src_path = str(getattr(source, "ckpt_path", None) or self.model_path)
+        cached = self._cache_path(src_path)
+
+        if not os.path.exists(cached):
+            logger.info(f"{self}: exporting {src_path} (one-time)")
+            t0 = time.perf_counter()
+            exported = self._export(source)
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            shutil.move(str(exported), cached)
+            self._post_export(cached)
+            logger.info(f"{self}: cached {cached} in {time.perf_counter() - t0:.1f}s")
+
+        self.model = YOLO(cached, task="detect")
+        return self
+
+    def _post_export(self, path):
+        pass
+
+
+class OnnxBackend(ExportedBackend):
+    name = "onnx"
+    export_format = "onnx"
+    module = "onnxruntime"
+    suffix = ".onnx"
+    precisions = ("fp32", "fp16", "int8")
+
+    def __init__(self, model_path, precision="fp32"):
+        super().__init__(model_path, precision)
+        # Resolved before the cache key is built, so an fp32 export is never cached as fp16
+        if self.precision == "fp16" and not torch.cuda.is_available():
+            # ultralytics only exports half-precision ONNX on GPU
+            logger.warning("onnx: fp16 export needs CUDA, exporting fp32")
+            self.precision = "fp32"
+
+    def _post_export(self, path):
+        if self.precision != "int8":
+            return
+        # Dynamic (weight-only) INT8 quantization, no calibration set needed
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        tmp = path + ".fp32"
+        os.replace(path, tmp)
+        quantize_dynamic(tmp, path, weight_type=QuantType.QUInt8)
+        os.remove(tmp)
+
+
+class OpenVinoBackend(ExportedBackend):
+    name = "openvino"
+    export_format = "openvino"
+    module = "openvino"
+    suffix = "_openvino_model"
+    precisions = ("fp32", "fp16", "int8")
+
+    def _export(self, source):
+        if self.precision != "int8":
+            return super()._export(source)
+        w, h = Config.FRAME_SIZE
+        # INT8 post-training quantization (NNCF) calibrates on YOLO_INT8_DATA
+        return source.export(format="openvino", imgsz=(h, w), dynamic=True, batch=Config.YOLO_MAX_BATCH,
+                             int8=True, data=Config.YOLO_INT8_DATA, verbose=False)
+
+
+BACKENDS = {b.name: b for b in (TorchBackend, OnnxBackend, OpenVinoBackend)}
+
+def _bench(backend, runs):
+    w, h = Config.FRAME_SIZE
+    batch = torch.rand((1, 3, h, w))
+    backend.predict(batch, verbose=False)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        backend.predict(batch, verbose=False)
+    return (time.perf_counter() - t0) / runs
+
+def create_backend(model_path, name=None, precision=None):
+    """
+    Loads the requested backend, or with name "auto" benchmarks every
+    backend available on this host and keeps the fastest.
+    """
+    name = (name or Config.YOLO_BACKEND).lower()
+    precision = (precision or Config.YOLO_PRECISION).lower()
+
+    if name != "auto":
+        cls = BACKENDS.get(name)
+        if cls is None:
+            raise ValueError(f"Unknown YOLO_BACKEND {name!r}, expected one of: auto, {', '.join(BACKENDS)}")
+        if not cls.available():
+            raise RuntimeError(f"YOLO_BACKEND={name} requested but {cls.module} is not installed")
+        return cls(model_path, precision).load()
+
+    best, best_t = None, None
+    for cls in BACKENDS.values():
+        if not cls.available():
+            continue
+        try:
+            backend = cls(model_path, precision).load()
+            t = _bench(backend, Config.YOLO_BENCH_RUNS)
+        except Exception as e:
+            logger.warning(f"Backend {cls.name} unusable: {e}")
+            continue
+        logger.info(f"Backend {backend}: {1000 * t:.1f} ms/frame")
+        if best_t is None or t < best_t:
+            best, best_t = backend, t
+
+    if best is None:
+        raise RuntimeError("No usable YOLO inference backend")
+    logger.info(f"Selected inference backend: {best}")
+    return best
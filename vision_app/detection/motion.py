@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+from ..config import Config
+
+class MotionDetector:
+    """
+    Motion gate against a running-average background at 1/8 scale. Keeps its
+    own state, so every camera gets an independent instance.
+
+    Each sample is compared with the background instead of the previous
+    sample, so a slow walker at 1 fps still stands out. The background
+    follows the scene with rate alpha (slower where motion is seen), a global
+    brightness shift is subtracted before thresholding, and the per-pixel
+    threshold rises with the measured sensor noise. alpha=1 gives plain
+    frame differencing. All working buffers are preallocated.
+    """
+    def __init__(self, thresh=None, alpha=None, noise_k=None, pixel_thresh=None, size=None):
+        self.thresh = Config.MOTION_THRESH_PCT if thresh is None else thresh
+        self.alpha = Config.MOTION_BG_ALPHA if alpha is None else alpha
+        self.noise_k = Config.MOTION_NOISE_K if noise_k is None else noise_k
+        self.min_pixel_thresh = Config.MOTION_PIXEL_THRESH if pixel_thresh is None else pixel_thresh
+        self.size = size or (Config.FRAME_SIZE[0] // 8, Config.FRAME_SIZE[1] // 8)
+
+        w, h = self.size
+        self._gray = None                                # full-size luma, allocated on the first BGR frame
+        self._small = np.empty((h, w), np.uint8)
+        self._small_f = np.empty((h, w), np.float32)
+        self._bg = np.empty((h, w), np.float32)
+        self._diff = np.empty((h, w), np.float32)
+        self._mask = np.empty((h, w), np.uint8)
+        self._still = np.empty((h, w), np.uint8)
+        self._dilated = np.empty((h, w), np.uint8)
+        self._kernel = np.ones((3, 3), np.uint8)
+
+        self.has_background = False
+        self.noise = 0.0          # running mean |frame - background| of still frames
+        self.pixel_thresh = float(self.min_pixel_thresh)
+        self.score = 0.0
+        self.regions = []
+        self.frames = 0
+        self.skipped = 0
+
+    def _luma(self, frame_bgr, gray):
+        if gray is not None:
+            return gray
+        h, w = frame_bgr.shape[:2]
+        if self._gray is None or self._gray.shape != (h, w):
+            self._gray = np.empty((h, w), np.uint8)
+        return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def _regions(self, shape):
+        """
+        Connected components of the 1/8-scale mask, as (x1, y1, x2, y2)
+        boxes in full-frame coordinates. Dilation only joins nearby
+        fragments; MOTION_MIN_AREA counts the changed pixels of a component
+        before dilation, so a single noisy pixel does not become a region.
+        """
+        cv2.dilate(self._mask, self._kernel, dst=self._dilated)
+        n, labels, stats, _ = cv2.connectedComponentsWithStats(self._dilated, connectivity=8)
+        if n <= 1:
+            return []
+        changed = np.bincount(labels[self._mask > 0], minlength=n)
+
+        sx = shape[1] / self._mask.shape[1]
+        sy = shape[0] / self._mask.shape[0]
+        regions = []
+        for (x, y, w, h, _), area in zip(stats[1:n], changed[1:n]):
+            if area < Config.MOTION_MIN_AREA:
+                continue
+            regions.append((int(x * sx), int(y * sy), int((x + w) * sx), int((y + h) * sy)))
+        return regions
+
+    def update(self, frame_bgr, gray=None):
+        """
+        Compares a frame with the background and folds it in. Returns
+        (score, mask): score is the percentage of 1/8-scale pixels that
+        changed, mask the uint8 0/255 change mask. The mask is an internal
+        buffer that the next call overwrites. The first frame only seeds the
+        background and returns (inf, None).
+
+        gray: optional luma plane from the source (e.g. PiCam lores stream),
+        which saves the color conversion.
+        """
+        cv2.resize(self._luma(frame_bgr, gray), self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        np.copyto(self._small_f, self._small)
+        self.frames += 1
+
+        if not self.has_background:
+            np.copyto(self._bg, self._small_f)
+            self.has_background = True
+            self.score = float("inf")
+            return self.score, None
+
+        # |frame - background - mean shift|: a global exposure change does not count as motion
+        cv2.subtract(self._small_f, self._bg, dst=self._diff)
+        shift = cv2.mean(self._diff)[0]
+        cv2.absdiff(self._diff, (shift, 0, 0, 0), dst=self._diff)
+
+        self.pixel_thresh = max(self.min_pixel_thresh, self.noise_k * self.noise)
+        cv2.compare(self._diff, self.pixel_thresh, cv2.CMP_GT, dst=self._mask)
+        changed = cv2.countNonZero(self._mask)
+        self.score = 100.0 * changed / self._mask.size
+
+        if self.alpha >= 1.0:
+            np.copyto(self._bg, self._small_f)
+        else:
+            # Moving pixels are learned 4x slower so a walker is not absorbed into the background
+            cv2.bitwise_not(self._mask, dst=self._still)
+            cv2.accumulateWeighted(self._small_f, self._bg, self.alpha, mask=self._still)
+            if changed:
+                cv2.accumulateWeighted(self._small_f, self._bg, self.alpha / 4, mask=self._mask)
+
+        if self.score < self.thresh:
+            # Noise estimate from frames without motion only
+            self.noise += 0.1 * (cv2.mean(self._diff)[0] - self.noise)
+        return self.score, self._mask
+
+    def changed(self, frame_bgr, gray=None):
+        score, mask = self.update(frame_bgr, gray)
+        if mask is None:
+            self.regions = []  # no reference yet: full frame
+            return True
+
+        if Config.MOTION_ROI_MODE == "off":
+            self.regions = []
+            moving = score >= self.thresh
+        else:
+            # Region gate: a small moving blob counts even if the changed fraction stays low
+            self.regions = self._regions(frame_bgr.shape)
+            moving = score >= self.thresh or bool(self.regions)
+
+        if not moving:
+            self.skipped += 1
+        return moving
+
+    def reset(self):
+        self.has_background = False
+        self.noise = 0.0
+        self.regions = []
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            "noise": round(self.noise, 2),
+            "pixel_thresh": round(self.pixel_thresh, 1),
+        }
@@ -0,0 +1,114 @@
+import math
+import cv2
+import numpy as np
+from ..config import Config
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter <= 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _expand(box, shape):
+    """Pads a motion box, enforces a minimum size and the detector aspect ratio."""
+    h, w = shape[:2]
+    fw, fh = Config.FRAME_SIZE
+    x1, y1, x2, y2 = box
+    pad = Config.MOTION_ROI_PAD
+    bw, bh = (x2 - x1) * (1 + 2 * pad), (y2 - y1) * (1 + 2 * pad)
+    bw, bh = max(bw, Config.MOTION_ROI_MIN), max(bh, Config.MOTION_ROI_MIN)
+
+    # Match the detector aspect ratio so the crop is not distorted on resize
+    aspect = fw / fh
+    if bw / bh < aspect:
+        bw = bh * aspect
+    else:
+        bh = bw / aspect
+    bw, bh = min(bw, w), min(bh, h)
+
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    nx1 = int(max(0, min(cx - bw / 2, w - bw)))
+    ny1 = int(max(0, min(cy - bh / 2, h - bh)))
+    return (nx1, ny1, int(nx1 + bw), int(ny1 + bh))
+
+def plan_rois(regions, shape):
+    """
+    Turns motion regions into detector crops. Overlapping crops are merged;
+    returns [None] (= full frame) when the crops would cover most of the frame.
+    """
+    if not regions:
+        return [None]
+    rois = [_expand(r, shape) for r in regions]
+
+    merged = True
+    while merged and len(rois) > 1:
+        merged = False
+        for i in range(len(rois)):
+            for j in range(i + 1, len(rois)):
+                if _overlaps(rois[i], rois[j]):
+                    rois[i] = _expand(_union(rois[i], rois[j]), shape)
+                    del rois[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    h, w = shape[:2]
+    covered = sum((r[2] - r[0]) * (r[3] - r[1]) for r in rois)
+    if covered >= Config.MOTION_ROI_MAX_COVERAGE * w * h or len(rois) > Config.MOTION_ROI_MAX:
+        return [None]
+    return rois
+
+def build_tile(frame_bgr, rois):
+    """
+    Packs the crops into one FRAME_SIZE canvas on a grid. Returns the canvas
+    and per-cell (cell_x, cell_y, cell_w, cell_h, scale, roi) placement info.
+    """
+    fw, fh = Config.FRAME_SIZE
+    cols = math.ceil(math.sqrt(len(rois)))
+    rows = math.ceil(len(rois) / cols)
+    cw, ch = fw // cols, fh // rows
+
+    canvas = np.zeros((fh, fw, 3), dtype=np.uint8)
+    cells = []
+    for i, roi in enumerate(rois):
+        x1, y1, x2, y2 = roi
+        crop = frame_bgr[y1:y2, x1:x2]
+        s = min(cw / crop.shape[1], ch / crop.shape[0])
+        pw, ph = max(1, int(crop.shape[1] * s)), max(1, int(crop.shape[0] * s))
+        cx, cy = (i % cols) * cw, (i // cols) * ch
+        canvas[cy:cy + ph, cx:cx + pw] = cv2.resize(crop, (pw, ph))
+        cells.append((cx, cy, cw, ch, s, roi))
+    return canvas, cells
+
+def map_tile_objects(objects, cells):
+    """Maps objects detected on a tile canvas back to full-frame coordinates."""
+    out = []
+    for o in objects:
+        bx1, by1, bx2, by2 = o["box"]
+        mx, my = (bx1 + bx2) / 2, (by1 + by2) / 2
+        for cx, cy, cw, ch, s, roi in cells:
+            if cx <= mx < cx + cw and cy <= my < cy + ch:
+                box = [int(roi[0] + (min(max(v, cx), cx + cw) - cx) / s) for v in (bx1, bx2)]
+                boy = [int(roi[1] + (min(max(v, cy), cy + ch) - cy) / s) for v in (by1, by2)]
+                out.append({**o, "box": [box[0], boy[0], min(box[1], roi[2]), min(boy[1], roi[3])]})
+                break
+    return out
+
+def merge_objects(objects, iou_thresh=0.5):
+    """Drops duplicates of the same label found in overlapping crops (keeps highest confidence)."""
+    kept = []
+    for o in sorted(objects, key=lambda o: -o["confidence"]):
+        if all(o["label"] != k["label"] or _iou(o["box"], k["box"]) < iou_thresh for k in kept):
+            kept.append(o)
+    return kept
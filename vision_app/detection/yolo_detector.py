@@ -1,30 +1,189 @@
 import cv2
-from ultralytics import YOLO
+import numpy as np
+import threading
+import time
+import torch
+from concurrent.futures import Future
 from ..config import Config
+from .backends import create_backend
+from .regions import plan_rois, build_tile, map_tile_objects, merge_objects
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _clip_roi(roi, shape):
+    h, w = shape[:2]
+    x1, y1, x2, y2 = (int(round(v)) for v in roi)
+    x1, y1 = max(0, min(x1, w - 1)), max(0, min(y1, h - 1))
+    x2, y2 = max(x1 + 1, min(x2, w)), max(y1 + 1, min(y2, h))
+    return x1, y1, x2, y2
+
 class YoloDetector:
     """
     Handles object detection using the YOLO model.
     """
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-        logger.info(f"YOLO model loaded from {model_path}")
+    def __init__(self, model_path, max_batch=None, backend=None):
+        # The batch goes to the model as a raw tensor, which skips Ultralytics' letterboxing
+        w, h = Config.FRAME_SIZE
+        if w % 32 or h % 32:
+            raise ValueError(f"FRAME_SIZE must be a multiple of 32 in both dimensions, got {w},{h}")
+        self.backend = create_backend(model_path, name=backend)
+        self.model = self.backend.model
+        self.max_batch = max(1, max_batch or Config.YOLO_MAX_BATCH)
 
-    def detect(self, frame_bgr):
-        """
-        Performs object detection on a single frame.
-        """
-        small_frame = cv2.resize(frame_bgr, Config.FRAME_SIZE)
-        results = self.model(small_frame, conf=Config.CONF_MIN, classes=[0, 15], verbose=False) # 0=person, 15=cat
+        # Preallocated contiguous NHWC (BGR) batch; frames are resized straight into it
+        self._batch = np.empty((self.max_batch, h, w, 3), dtype=np.uint8)
+        self._lock = threading.Lock()
+
+        self._batcher = None
+        if Config.YOLO_MAX_WAIT_MS > 0:
+            self._batcher = MicroBatcher(self, self.max_batch, Config.YOLO_MAX_WAIT_MS / 1000.0)
+        logger.info(f"YOLO model loaded from {model_path} ({self.backend}, max batch {self.max_batch})")
 
+    def _to_result(self, result, scale):
+        x0, y0, sx, sy = scale
         objects = []
-        for r in results[0].boxes:
+        for r in result.boxes:
             label = self.model.names[int(r.cls)]
             conf = float(r.conf)
-            objects.append({"label": label, "confidence": round(conf, 3)})
+            bx1, by1, bx2, by2 = (float(v) for v in r.xyxy[0])
+            box = [int(x0 + bx1 * sx), int(y0 + by1 * sy), int(x0 + bx2 * sx), int(y0 + by2 * sy)]
+            objects.append({"label": label, "confidence": round(conf, 3), "box": box})
+        return self._summarize(objects)
 
+    @staticmethod
+    def _summarize(objects):
         summary = f"Detected {len(objects)} objects: {', '.join(o['label'] for o in objects)}"[:200]
         return {"summary": summary, "objects": objects}
+
+    def _run_chunk(self, frames_bgr, rois):
+        w, h = Config.FRAME_SIZE
+        scales = []
+        with self._lock:
+            for i, frame in enumerate(frames_bgr):
+                x0 = y0 = 0
+                roi = rois[i] if rois else None
+                if roi is not None:
+                    x0, y0, x1, y1 = _clip_roi(roi, frame.shape)
+                    frame = frame[y0:y1, x0:x1]
+                fh, fw = frame.shape[:2]
+                cv2.resize(frame, (w, h), dst=self._batch[i])
+                scales.append((x0, y0, fw / w, fh / h))
+
+            # NHWC uint8 BGR -> NCHW float RGB in [0, 1], one forward pass for the whole batch
+            batch = torch.from_numpy(self._batch[:len(frames_bgr)])
+            batch = batch.permute(0, 3, 1, 2).flip(1).float().div_(255.0).contiguous()
+            results = self.backend.predict(batch, conf=Config.CONF_MIN, classes=[0, 15], verbose=False) # 0=person, 15=cat
+
+        return [self._to_result(r, s) for r, s in zip(results, scales)]
+
+    def detect_batch(self, frames_bgr, rois=None):
+        """
+        Performs object detection on several frames in one forward pass per
+        max_batch frames. rois is an optional per-frame list of (x1, y1, x2, y2)
+        crops (None = full frame); boxes are returned in full-frame coordinates.
+        """
+        if not frames_bgr:
+            return []
+        out = []
+        for start in range(0, len(frames_bgr), self.max_batch):
+            chunk_rois = rois[start:start + self.max_batch] if rois else None
+            out.extend(self._run_chunk(frames_bgr[start:start + self.max_batch], chunk_rois))
+        return out
+
+    def detect_regions(self, frames_bgr, regions_list, mode=None):
+        """
+        Like detect_batch, but only looks at the motion regions of each frame.
+        mode "crop" runs one batch entry per merged region, "tile" packs the
+        regions of a frame into one canvas. Frames without usable regions
+        run full-frame. Results also carry the motion regions.
+        """
+        mode = mode or Config.MOTION_ROI_MODE
+        if mode == "off":
+            return self.detect_batch(frames_bgr)
+
+        jobs, job_rois, owners, tiles = [], [], [], []
+        for idx, (frame, regions) in enumerate(zip(frames_bgr, regions_list)):
+            rois = plan_rois(regions, frame.shape)
+            if rois == [None]:
+                jobs.append(frame); job_rois.append(None); owners.append(idx); tiles.append(None)
+            elif mode == "tile":
+                canvas, cells = build_tile(frame, rois)
+                jobs.append(canvas); job_rois.append(None); owners.append(idx); tiles.append(cells)
+            else:
+                for roi in rois:
+                    jobs.append(frame); job_rois.append(roi); owners.append(idx); tiles.append(None)
+
+        per_frame = [[] for _ in frames_bgr]
+        for owner, cells, res in zip(owners, tiles, self.detect_batch(jobs, job_rois)):
+            objs = res["objects"]
+            per_frame[owner].extend(map_tile_objects(objs, cells) if cells else objs)
+
+        out = []
+        for objects, regions in zip(per_frame, regions_list):
+            result = self._summarize(merge_objects(objects))
+            result["regions"] = [list(r) for r in regions or []]
+            out.append(result)
+        return out
+
+    def detect(self, frame_bgr, roi=None):
+        """
+        Performs object detection on a single frame. With micro-batching
+        enabled, concurrent callers are merged into one batch.
+        """
+        if self._batcher is not None:
+            return self._batcher.submit(frame_bgr, roi).result()
+        return self.detect_batch([frame_bgr], [roi])[0]
+
+
+class MicroBatcher:
+    """
+    Merges concurrent detect() calls into one detect_batch() call, flushing
+    when max_batch requests are pending or the oldest has waited max_wait_s.
+    """
+    def __init__(self, detector, max_batch, max_wait_s):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self._pending = []  # (frame, roi, future, arrival)
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.requests = 0
+        self._thread = threading.Thread(target=self._run, name="yolo-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame_bgr, roi=None):
+        fut = Future()
+        with self._cond:
+            self._pending.append((frame_bgr, roi, fut, time.monotonic()))
+            self._cond.notify()
+        return fut
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                deadline = self._pending[0][3] + self.max_wait_s
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+
+            try:
+                results = self.detector.detect_batch([b[0] for b in batch], [b[1] for b in batch])
+                for (_, _, fut, _), res in zip(batch, results):
+                    fut.set_result(res)
+            except Exception as e:
+                for _, _, fut, _ in batch:
+                    fut.set_exception(e)
+            self.batches += 1
+            self.requests += len(batch)
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        avg = self.requests / self.batches if self.batches else 0.0
+        return {"batches": self.batches, "requests": self.requests, "avg_batch": round(avg, 2), "pending": pending}
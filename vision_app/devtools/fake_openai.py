@@ -0,0 +1,123 @@
+"""
+Minimal OpenAI-compatible VLM stub for local testing of the analyzer,
+router and replay harness. Answers every chat completion with a fixed
+vision JSON after a configurable delay, streamed (SSE) or blocking.
+
+    python -m vision_app.devtools.fake_openai --port 1234 --latency 0.8 --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from aiohttp import web
+
+ANSWER = {
+    "objects_present": ["person", "chair"],
+    "actions_present": ["walking"],
+    "summary_text": "A person walks past a chair.",
+}
+
+class FakeOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=1234, latency=0.5, jitter=0.1, fail_rate=0.0,
+                 tokens_per_s=50.0, answer=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.tokens_per_s = tokens_per_s
+        self.answer = json.dumps(answer or ANSWER)
+        self.requests = 0
+        self.failures = 0
+        self._loop = None
+        self._runner = None
+
+    def app(self):
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_get("/v1/models", self._models)
+        app.router.add_post("/v1/chat/completions", self._chat)
+        return app
+
+    async def _models(self, request):
+        return web.json_response({"object": "list", "data": [{"id": "fake-vlm", "object": "model"}]})
+
+    async def _chat(self, request):
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if random.random() < self.fail_rate:
+            self.failures += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+
+        # Roughly 4 characters per token
+        tokens = [self.answer[i:i + 4] for i in range(0, len(self.answer), 4)]
+        if not body.get("stream"):
+            await asyncio.sleep(len(tokens) / self.tokens_per_s)
+            return web.json_response({
+                "id": "fake", "object": "chat.completion", "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer},
+                             "finish_reason": "stop"}],
+            })
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        try:
+            for tok in tokens:
+                chunk = {"id": "fake", "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": tok}}]}
+                await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                await asyncio.sleep(1.0 / self.tokens_per_s)
+            await resp.write(b"data: [DONE]\n\n")
+        except (ConnectionResetError, RuntimeError):
+            pass  # client closed early
+        return resp
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]  # port 0 = any free port
+
+    def start_in_thread(self):
+        """Serves on a background thread; returns the base URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="fake-openai", daemon=True).start()
+        ready.wait(10)
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=1234)
+    ap.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    ap.add_argument("--jitter", type=float, default=0.1)
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 503")
+    ap.add_argument("--tokens-per-s", type=float, default=50.0)
+    args = ap.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.jitter, args.fail_rate, args.tokens_per_s)
+    print(f"Fake OpenAI server on {server.start_in_thread()}/v1")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Local webhook receiver that counts and keeps the last payloads, for the
+replay harness and manual testing.
+
+    python -m vision_app.devtools.webhook_sink --port 5678
+"""
+import argparse
+import asyncio
+import threading
+import time
+from collections import deque
+from aiohttp import web
+
+class WebhookSink:
+    def __init__(self, host="127.0.0.1", port=5678, keep=100):
+        self.host = host
+        self.port = port
+        self.received = 0
+        self.events = 0
+        self.bytes = 0
+        self.payloads = deque(maxlen=keep)
+        self._loop = None
+        self._runner = None
+
+    async def _hook(self, request):
+        body = await request.read()
+        payload = await request.json()
+        self.received += 1
+        self.bytes += len(body)
+        self.events += len(payload["events"]) if isinstance(payload, dict) and "events" in payload else 1
+        self.payloads.append(payload)
+        return web.json_response({"ok": True})
+
+    async def _start(self):
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post("/{tail:.*}", self._hook)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]  # port 0 = any free port
+
+    def start_in_thread(self):
+        """Serves on a background thread; returns the webhook URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="webhook-sink", daemon=True).start()
+        ready.wait(10)
+        return f"http://{self.host}:{self.port}/webhook"
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def stats(self):
+        return {"posts": self.received, "events": self.events, "bytes": self.bytes}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5678)
+    args = ap.parse_args()
+
+    sink = WebhookSink(args.host, args.port)
+    print(f"Webhook sink on {sink.start_in_thread()}")
+    try:
+        while True:
+            time.sleep(5)
+            print(sink.stats())
+    except KeyboardInterrupt:
+        sink.stop()
+
+if __name__ == "__main__":
+    main()
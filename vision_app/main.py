@@ -4,107 +4,273 @@ from datetime import datetime, timezone
 from .config import Config, apply_ffmpeg_settings, apply_ultralytics_settings, apply_picam_settings
 from .utils.logging_setup import setup_logging
 from .streams.rtsp import RTSPStream
+from .streams.pyav import PyAVStream
 from .streams.picam import PiCamStream, is_picam_available
-from .detection.yolo_detector import YoloDetector
 from .analysis.tracker import SeenTracker
-from .analysis.lmstudio_analyzer import analyze_with_lmstudio
-from .analysis.parsers import extract_vision_objects, extract_vision_actions
+from .analysis.mot import MultiObjectTracker
+from .analysis.vision_cache import VisionCache
+from .analysis.lmstudio_analyzer import analyze_with_lmstudio, timing_stats
+from .analysis.vlm_router import router_stats
+from .analysis.parsers import extract_vision_objects, extract_vision_actions, normalize_labels
 from .outputs.tui import Dashboard
-from .outputs.webhook import send_to_webhook
+from .outputs.webhook import send_to_webhook, submit_webhook
+from .outputs.delivery import WebhookDelivery
+from .outputs.snapshot_store import SnapshotStore
+from .outputs.event_store import EventStore
+from .outputs.snapshot_encoder import SnapshotEncoder
+from .pipeline import Pipeline
+from .sampling import AdaptiveSampler
+from .cameras import load_cameras
+from .detection.motion import MotionDetector
+from .utils.io_service import get_io_service
+from .metrics import get_metrics, MetricsServer
 import cv2
-import numpy as np
 import base64
 
 logger = logging.getLogger(__name__)
 
-_prev_small = None
+_default_motion = MotionDetector()
 
-def motion_changed(frame_bgr):
-    global _prev_small
-    gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
-    small = cv2.resize(gray, (Config.FRAME_SIZE[0] // 8, Config.FRAME_SIZE[1] // 8))
+def motion_changed(frame_bgr, motion=None, gray=None):
+    return (motion or _default_motion).changed(frame_bgr, gray)
 
-    if _prev_small is None:
-        _prev_small = small
-        return True
-
-    diff = cv2.absdiff(small, _prev_small)
-    score = float(np.mean(diff))
-    _prev_small = small
-    return score >= Config.MOTION_THRESH
-
-def save_snapshot(frame_bgr):
+def encode_snapshot(frame_bgr):
     ok, enc = cv2.imencode(".jpg", frame_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), Config.JPEG_QUALITY])
     if not ok:
         raise RuntimeError("Failed to encode snapshot")
+    return enc.tobytes()
 
-    data = enc.tobytes()
+def save_snapshot(frame_bgr):
+    data = encode_snapshot(frame_bgr)
     b64 = base64.b64encode(data).decode("ascii")
     return b64
 
-def process_frame(frame, detector, trackers):
+_default_mot = MultiObjectTracker()
+
+def gate_by_tracks(result, mot, ts):
+    """
+    Assigns track ids to the detected objects. Returns False when no track is
+    new, significantly changed or due for re-analysis (no LLM call / webhook).
+    """
+    if not Config.TRACKING:
+        return True
+    mot.update(result["objects"], ts)
+    due = mot.due_for_analysis(ts)
+    result["tracks_due"] = [{"track_id": tid, "reason": reason} for tid, reason in due.items()]
+    return bool(due)
+
+def age_tracks(mot, ts):
+    """
+    Feeds a sampled frame without detections (no motion or no objects) to the
+    tracker, so tentative tracks are dropped on their miss and stale tracks
+    expire after TRACK_MAX_AGE_S even when YOLO stays quiet.
+    """
+    if Config.TRACKING:
+        mot.update([], ts)
+
+def detect_frame(frame, detector, tracker_yolo, motion=None, mot=None):
+    """
+    Motion gate + YOLO + track gate. Returns the detection result, or None if nothing to report.
+    """
     if frame is None:
         return None
 
-    if not motion_changed(frame):
+    motion = motion or _default_motion
+    mot = mot or _default_mot
+    ts = time.time()
+    if not motion_changed(frame, motion):
+        age_tracks(mot, ts)
         return None
 
-    tracker_yolo, tracker_vision, tracker_actions = trackers
-    result = detector.detect(frame)
+    result = detector.detect_regions([frame], [motion.regions])[0]
 
     if not result["objects"]:
+        age_tracks(mot, ts)
         return None
 
     # YOLO labels bijhouden
     tracker_yolo.update([o["label"] for o in result["objects"]])
 
-    # Snapshot
-    try:
-        snap_b64 = save_snapshot(frame)
-    except Exception as e:
-        logger.error(f"Snapshot error: {e}")
-        snap_b64 = None
-
-    vision = {}
-    if snap_b64:
-        vision = analyze_with_lmstudio(snap_b64) or {}
-        if vision.get("status") == "ok":
-            parsed = vision.get("parsed") or {}
-
-            if parsed:
-                objs = parsed.get("objects_present") or []
-                acts = parsed.get("actions_present") or []
-
-                if objs:
-                    tracker_vision.update(objs)
-                if acts:
-                    tracker_actions.update(acts)
-
-                # compacte tag-samenvatting
-                vision["tags_summary"] = f"objects={len(objs)} | actions={len(acts)}"
-
-                # mooie tekst-samenvatting: eerst summary_text, anders bestaande summary
-                st = parsed.get("summary_text") or vision.get("summary")
-                if st:
-                    vision["summary"] = st
-            else:
-                # JSON-pad niet gebruikt → fallback: prose analyseren
-                vsum = vision.get("summary") or ""
-                vis_objs = extract_vision_objects(vsum)
-                if vis_objs:
-                    tracker_vision.update(vis_objs)
-                vis_actions = extract_vision_actions(vsum)
-                if vis_actions:
-                    tracker_actions.update(vis_actions)
+    if not gate_by_tracks(result, mot, ts):
+        return None
+    return result
+
+def detect_packets(packets, detector, cameras, sampler=None):
+    """
+    Batched variant of detect_frame over the newest frame of several cameras.
+    Returns one result (or None) per packet.
+    """
+    metrics = get_metrics()
+    results = [None] * len(packets)
+    with metrics.timer("motion"):
+        moving = [i for i, p in enumerate(packets)
+                  if p["frame"] is not None and motion_changed(p["frame"], cameras[p["camera"]].motion, p.get("gray"))]
+    if len(moving) < len(packets):
+        metrics.inc("motion_skipped", len(packets) - len(moving))
+
+    batch = []
+    if moving:
+        with metrics.timer("detect"):
+            batch = detector.detect_regions([packets[i]["frame"] for i in moving],
+                                            [cameras[packets[i]["camera"]].motion.regions for i in moving])
+    detected = dict(zip(moving, batch))
+
+    for i, packet in enumerate(packets):
+        if packet["frame"] is None:
+            continue
+        ctx = cameras[packet["camera"]]
+        result = detected.get(i)
+        with metrics.timer("track"):
+            if result is None or not result["objects"]:
+                # Every sampled frame ages the tracks, not only frames with detections
+                age_tracks(ctx.mot, packet["ts"])
+                continue
+            metrics.inc("detections", camera=ctx.id)
+            ctx.tracker_yolo.update([o["label"] for o in result["objects"]])
+            if gate_by_tracks(result, ctx.mot, packet["ts"]):
+                results[i] = result
+
+    if sampler is not None:
+        sampler.note(bool(moving), sum(len(ctx.mot.tracks) for ctx in cameras.values()))
+    return results
+
+def _iso(ts=None):
+    when = datetime.fromtimestamp(ts, timezone.utc) if ts else datetime.now(timezone.utc)
+    return when.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def partial_event(result, fields, ts=None, camera=None):
+    """
+    Dashboard event for a streamed LM Studio answer that is still being generated.
+    """
+    objs = fields.get("objects_present") or []
+    acts = fields.get("actions_present") or []
+    summary = fields.get("summary_text") or f"objects: {', '.join(objs) or '-'} | actions: {', '.join(acts) or '-'}"
+    return {
+        "partial": True,
+        "camera": camera or Config.CAMERA_ID,
+        "timestamp": _iso(ts),
+        "summary": result["summary"],
+        "objects": result["objects"],
+        "vision": {"status": "streaming", "parsed": fields, "summary": summary},
+    }
+
+def analyze_detection(frame, result, tracker_vision, tracker_actions, ts=None, camera=None, cache=None,
+                      snapshot=None, snapshots=None, encoder=None, on_partial=None):
+    """
+    Snapshot + LM Studio analysis of a detection. Returns the event payload.
+    snapshot is an optional higher-resolution copy of the same frame;
+    with a SnapshotStore a full-frame JPEG of it is kept and the event carries
+    its snapshot_id. A SnapshotEncoder sizes a separate JPEG for the VLM
+    (crop / max edge / byte budget); it never affects the stored snapshot.
+    on_partial(fields) receives streamed LM Studio fields before the answer is complete.
+    """
+    metrics = get_metrics()
+    vision, frame_hash = None, None
+    if cache is not None:
+        frame_hash = cache.frame_hash(frame)
+        vision = cache.lookup(frame_hash, camera)
+        metrics.inc("cache_hits" if vision is not None else "cache_misses")
+
+    jpeg, archive, snapshot_id, snap_info = None, None, None, None
+    if vision is None or snapshots is not None:
+        # Snapshot
+        try:
+            with metrics.timer("snapshot"):
+                snap_frame = snapshot if snapshot is not None else frame
+                if snapshots is not None:
+                    archive = encode_snapshot(snap_frame)
+                # The VLM image is only needed when LM Studio is called (no cache hit)
+                if vision is None and encoder is not None:
+                    # Boxes are in detection-frame pixels; the snapshot may be larger
+                    sx, sy = snap_frame.shape[1] / frame.shape[1], snap_frame.shape[0] / frame.shape[0]
+                    boxes = [[o["box"][0] * sx, o["box"][1] * sy, o["box"][2] * sx, o["box"][3] * sy]
+                             for o in result["objects"] if o.get("box")]
+                    jpeg, snap_info = encoder.encode(snap_frame, boxes)
+                elif vision is None:
+                    jpeg = archive if archive is not None else encode_snapshot(snap_frame)
+        except Exception as e:
+            logger.error(f"Snapshot error: {e}")
+
+    if archive and snapshots is not None:
+        try:
+            track_ids = sorted({o["track_id"] for o in result["objects"] if o.get("track_id") is not None})
+            snapshot_id = snapshots.put(archive, ts, camera, track_ids)
+        except Exception as e:
+            logger.error(f"Snapshot store error: {e}")
+
+    if vision is None:
+        vision = {}
+        if jpeg:
+            snap_b64 = base64.b64encode(jpeg).decode("ascii")
+            t0 = time.perf_counter()
+            vision = analyze_with_lmstudio(snap_b64, on_partial) or {}
+            elapsed = time.perf_counter() - t0
+            metrics.observe("llm", elapsed)
+            metrics.inc("llm_calls")
+            if vision.get("status") != "ok":
+                metrics.inc("llm_errors")
+            if cache is not None:
+                cache.store(frame_hash, vision, elapsed, camera)
+            if snap_info is not None:
+                snap_info["llm_ms"] = round(1000 * elapsed, 1)
+                if vision.get("status") == "ok":
+                    encoder.note_llm(elapsed)
+
+    if vision.get("status") == "ok":
+        parsed = vision.get("parsed") or {}
+
+        if parsed:
+            objs = parsed.get("objects_present") or []
+            acts = parsed.get("actions_present") or []
+
+            if objs:
+                tracker_vision.update(normalize_labels(objs))
+            if acts:
+                tracker_actions.update(normalize_labels(acts))
+
+            # compacte tag-samenvatting
+            vision["tags_summary"] = f"objects={len(objs)} | actions={len(acts)}"
+
+            # mooie tekst-samenvatting: eerst summary_text, anders bestaande summary
+            st = parsed.get("summary_text") or vision.get("summary")
+            if st:
+                vision["summary"] = st
+        else:
+            # JSON-pad niet gebruikt → fallback: prose analyseren
+            vsum = vision.get("summary") or ""
+            vis_objs = extract_vision_objects(vsum)
+            if vis_objs:
+                tracker_vision.update(vis_objs)
+            vis_actions = extract_vision_actions(vsum)
+            if vis_actions:
+                tracker_actions.update(vis_actions)
 
     out = {
         "source": Config.DETECTORNAME,
-        "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        "camera": camera or Config.CAMERA_ID,
+        "timestamp": _iso(ts),
         "summary": result["summary"],   # YOLO-samenvatting
-        "objects": result["objects"],
+        "objects": result["objects"],   # incl. box [x1, y1, x2, y2] in full-frame pixels
+        "regions": result.get("regions") or [],
+        "tracks": result.get("tracks_due") or [],   # tracks that triggered this analysis
+        "snapshot_id": snapshot_id,   # JPEG in the snapshot store, if enabled
+        "snapshot": snap_info,   # size / quality / encode_ms / llm_ms of the VLM image
         "vision": vision,
     }
-    send_to_webhook(out)
+    return out
+
+def process_frame(frame, detector, trackers):
+    """
+    Runs all stages for one frame on the calling thread.
+    """
+    tracker_yolo, tracker_vision, tracker_actions = trackers
+    result = detect_frame(frame, detector, tracker_yolo)
+    if result is None:
+        return None
+
+    out = analyze_detection(frame, result, tracker_vision, tracker_actions)
+    if Config.WEBHOOK:
+        submit_webhook(out)  # fire-and-forget on the shared I/O loop
     return out
 
 
@@ -159,75 +325,170 @@ def obsolete_process_frame(frame, detector, trackers):
 
     return None
 
+class CameraContext:
+    """
+    Per-camera state: motion gate and the three seen-trackers.
+    """
+    def __init__(self, camera_id):
+        self.id = camera_id
+        self.motion = MotionDetector()
+        self.mot = MultiObjectTracker()
+        self.tracker_yolo = SeenTracker(ttl=1800)
+        self.tracker_vision = SeenTracker(ttl=3600)
+        self.tracker_actions = SeenTracker(ttl=1800)
+
+    def clear(self):
+        self.tracker_yolo.clear()
+        self.tracker_vision.clear()
+        self.tracker_actions.clear()
+        self.mot.clear()
+
+def rtsp_stream(url):
+    """
+    RTSP stream on the configured decoder backend. Returns (label, stream_provider).
+    """
+    if Config.STREAM_BACKEND == "pyav":
+        return "rtsp/pyav", PyAVStream(url)
+    return "rtsp", RTSPStream(url)
+
+def open_source():
+    """
+    Picks the configured single video source. Returns (label, stream_provider).
+    """
+    use_picam = Config.USE_PICAM and is_picam_available()
+    if use_picam:
+        return "picam", PiCamStream()
+    return rtsp_stream(Config.RTSP_URL)
+
+def build_sources():
+    """
+    Returns camera id -> open_source callable, for multi-camera or single-source mode.
+    """
+    cameras = load_cameras()
+    if not cameras:
+        return {Config.CAMERA_ID: open_source}
+    return {cam["id"]: (lambda url=cam["url"]: rtsp_stream(url)) for cam in cameras}
+
 def main_loop():
+    from .detection.yolo_detector import YoloDetector  # torch / ultralytics only when the app runs
+
     apply_ffmpeg_settings()
     apply_ultralytics_settings()
     apply_picam_settings()
     setup_logging()
+    if Config.MOTION_THRESH_LEGACY is not None:
+        logger.warning(f"MOTION_THRESH={Config.MOTION_THRESH_LEGACY} is ignored: it was a mean frame difference, "
+                       f"the motion gate now uses MOTION_THRESH_PCT (% of pixels changed, "
+                       f"currently {Config.MOTION_THRESH_PCT})")
 
     dashboard = Dashboard()
     dashboard.start()
 
+    sources = build_sources()
     detector = YoloDetector(Config.MODEL_PATH)
-    tracker_yolo = SeenTracker(ttl=1800)
-    tracker_vision = SeenTracker(ttl=3600)
-    tracker_actions = SeenTracker(ttl=1800)
-
-    dashboard.set_seen_sources(
-        yolo_fn=tracker_yolo.snapshot,
-        vision_fn=tracker_vision.snapshot,
-        actions_fn=tracker_actions.snapshot,
+    cameras = {cam_id: CameraContext(cam_id) for cam_id in sources}
+
+    for ctx in cameras.values():
+        dashboard.set_seen_sources(
+            yolo_fn=ctx.tracker_yolo.snapshot,
+            vision_fn=ctx.tracker_vision.snapshot,
+            actions_fn=ctx.tracker_actions.snapshot,
+            camera=ctx.id,
+        )
+
+    vision_cache = VisionCache() if Config.VISION_CACHE else None
+    snapshots = SnapshotStore() if Config.SNAPSHOT_STORE_MB > 0 else None
+    encoder = SnapshotEncoder()
+
+    def analyze(item):
+        ctx = cameras[item["camera"]]
+
+        def on_partial(fields):
+            pipeline.events.put(partial_event(item["result"], fields, ts=item["ts"], camera=ctx.id))
+
+        return analyze_detection(item["frame"], item["result"], ctx.tracker_vision, ctx.tracker_actions,
+                                 ts=item["ts"], camera=ctx.id, cache=vision_cache,
+                                 snapshot=item.get("snapshot"), snapshots=snapshots,
+                                 encoder=encoder, on_partial=on_partial if Config.LMSTUDIO_STREAM else None)
+
+    sampler = AdaptiveSampler() if Config.ADAPTIVE_SAMPLING else None
+
+    pipeline = Pipeline(
+        sources=sources,
+        detect_fn=lambda packets: detect_packets(packets, detector, cameras, sampler),
+        analyze_fn=analyze,
+        delivery=WebhookDelivery() if Config.WEBHOOK else None,
+        sampler=sampler,
+        store=EventStore() if Config.EVENT_STORE else None,
     )
+    def stats():
+        out = pipeline.stats()
+        if vision_cache is not None:
+            out["llm_cache"] = vision_cache.stats()
+        out["jpeg"] = encoder.stats()
+        llm = timing_stats()
+        if llm:
+            out["llm"] = llm
+        out.update({f"vlm:{name}": st for name, st in router_stats().items()})
+        if snapshots is not None:
+            out["snapshots"] = snapshots.stats()
+        out.update({f"motion:{ctx.id}": ctx.motion.stats() for ctx in cameras.values()})
+        snap = metrics.snapshot()
+        out["timing"] = snap["stages"]
+        out["counters"] = snap["counters"]
+        return out
+
+    dashboard.set_stats_source(stats)
+
+    metrics = get_metrics()
+    metrics.add_collector(pipeline.collect_metrics)
+    metrics_server = None
+    if Config.METRICS and Config.METRICS_PORT > 0:
+        try:
+            metrics_server = MetricsServer().start()
+        except Exception as e:
+            logger.error(f"Metrics endpoint not started: {e}")
 
-    last_call_t = 0.0
-    interval = 1.0 / max(1, Config.FPS_SAMPLING)
+    cam_status = {cam_id: None for cam_id in cameras}
+    cam_error = {cam_id: None for cam_id in cameras}
+    last_draw_t = 0.0
 
     try:
+        pipeline.start()
         while True:
-            use_picam = Config.USE_PICAM and is_picam_available()
-            source_label = "picam" if use_picam else "rtsp"
-            dashboard.set_cam_status(f"opening ({source_label})")
-
-            try:
-                stream_provider = PiCamStream() if use_picam else RTSPStream(Config.RTSP_URL)
-
-                with stream_provider as stream:
-                    open_timestamp = time.time()
-                    dashboard.set_cam_status(f"open ({source_label})")
-
-                    while True:
-                        if dashboard.enabled:
-                            ch = dashboard.scr.getch()
-                            if ch in (ord('q'), ord('Q')):
-                                return
-                            if ch in (ord('r'), ord('R')):
-                                tracker_yolo.clear()
-                                tracker_vision.clear()
-                                tracker_actions.clear()
-                                dashboard.set_error("Memory reset")
-
-                        if time.time() - open_timestamp > Config.REOPEN_EVERY_S:
-                            logger.debug("Reopening stream for stability")
-                            break
-
-                        now = time.time()
-                        if now - last_call_t < interval:
-                            time.sleep(0.01)
-                            continue
-
-                        last_call_t = now
-                        frame = stream.read()
-
-                        if frame is not None:
-                            result = process_frame(frame, detector, (tracker_yolo, tracker_vision, tracker_actions))
-                            if result:
-                                dashboard.update(result)
-
-            except Exception as e:
-                msg = f"Stream error: {e}"
-                logger.error(msg)
-                dashboard.set_error(msg)
-                time.sleep(5)
+            if dashboard.enabled:
+                ch = dashboard.scr.getch()
+                if ch in (ord('q'), ord('Q')):
+                    return
+                if ch in (ord('r'), ord('R')):
+                    for ctx in cameras.values():
+                        ctx.clear()
+                    dashboard.set_error("Memory reset")
+                if ch in (ord('c'), ord('C')):
+                    dashboard.next_camera()
+
+            for cam_id, capture in pipeline.captures.items():
+                if capture.status != cam_status[cam_id]:
+                    cam_status[cam_id] = capture.status
+                    dashboard.set_cam_status(capture.status, camera=cam_id)
+                if capture.last_error != cam_error[cam_id]:
+                    cam_error[cam_id] = capture.last_error
+                    dashboard.set_error(capture.last_error)
+
+            # Block on the event queue; only poll fast enough for key presses when the TUI is up
+            event = pipeline.events.get(timeout=0.1 if dashboard.enabled else 1.0)
+            if event:
+                dashboard.update(event)
+                last_draw_t = time.time()
+            elif time.time() - last_draw_t >= 1.0:
+                dashboard.draw()
+                last_draw_t = time.time()
 
     finally:
+        pipeline.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
+        get_io_service().stop()
+        if snapshots is not None:
+            snapshots.close()
         dashboard.stop()
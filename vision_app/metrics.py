@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from aiohttp import web
+from .config import Config
+from .utils.stats import Histogram, LatencyWindow
+from .utils.io_service import get_io_service
+
+logger = logging.getLogger(__name__)
+
+# Stage latencies range from sub-millisecond (motion) to tens of seconds (LM Studio)
+STAGE_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def _short(name, labels):
+    """TUI / JSON key: frames_read:front for frames_read{camera="front"}."""
+    return ":".join([name, *(str(v) for _, v in labels)])
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _fmt_le(le):
+    return "+Inf" if le == float("inf") else f"{le:g}"
+
+
+class StageTimer:
+    """
+    Context manager that records the wall time of a block into a stage histogram.
+    """
+    __slots__ = ("_metrics", "_stage", "_labels", "_t0")
+
+    def __init__(self, metrics, stage, labels):
+        self._metrics = metrics
+        self._stage = stage
+        self._labels = labels
+        self._t0 = 0.0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._stage, time.perf_counter() - self._t0, **self._labels)
+        return False
+
+
+class Metrics:
+    """
+    Process-wide counters, gauges and per-stage latency histograms.
+
+    Stages are timed with `with metrics.timer("detect"):` or observe(); each
+    keeps a cumulative Histogram for /metrics and a LatencyWindow for the
+    percentiles shown in the TUI. Gauges that are cheaper to read than to
+    maintain (queue depths, capture lag) come from collectors that run
+    whenever a snapshot is taken. Histograms owned by other components (e.g.
+    per VLM endpoint) are exported with add_histogram().
+    """
+    def __init__(self, prefix="vision_app", enabled=None):
+        self.prefix = prefix
+        self.enabled = Config.METRICS if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._gauges = {}      # (name, labels) -> value
+        self._stages = {}      # (stage, labels) -> (Histogram, LatencyWindow)
+        self._histograms = {}  # (name, labels) -> Histogram owned by the caller of add_histogram
+        self._collectors = []
+
+    def inc(self, name, n=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, stage, seconds, **labels):
+        if not self.enabled:
+            return
+        key = _key(stage, labels)
+        pair = self._stages.get(key)
+        if pair is None:
+            with self._lock:
+                pair = self._stages.setdefault(key, (Histogram(STAGE_BOUNDS), LatencyWindow()))
+        pair[0].add(seconds)
+        pair[1].add(seconds)
+
+    def timer(self, stage, **labels):
+        return StageTimer(self, stage, labels)
+
+    def add_histogram(self, name, histogram, **labels):
+        """Exports a Histogram kept elsewhere as {prefix}_{name}; it is not cleared by reset()."""
+        with self._lock:
+            self._histograms[_key(name, labels)] = histogram
+
+    def add_collector(self, fn):
+        """fn(metrics) is called before every snapshot / scrape to refresh gauges."""
+        self._collectors.append(fn)
+
+    def collect(self):
+        for fn in list(self._collectors):
+            try:
+                fn(self)
+            except Exception as e:
+                logger.debug(f"Metrics collector failed: {e}")
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._stages.clear()
+
+    def snapshot(self):
+        """
+        JSON-friendly view: {"stages": {stage: percentile summary},
+        "counters": {...}, "gauges": {...}, "histograms": {name: {"buckets":
+        {le: cumulative count}, "sum", "count"}}} with labels folded into the key.
+        """
+        self.collect()
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            stages = dict(self._stages)
+            histograms = dict(self._histograms)
+
+        def hist(h):
+            snap = h.snapshot()
+            return {"buckets": {_fmt_le(le): n for le, n in snap["buckets"]},
+                    "sum": round(snap["sum"], 6), "count": snap["count"]}
+
+        return {
+            "stages": {_short(*k): window.summary() for k, (_, window) in sorted(stages.items())},
+            "counters": {_short(*k): v for k, v in sorted(counters.items())},
+            "gauges": {_short(*k): v for k, v in sorted(gauges.items())},
+            "histograms": {_short(*k): hist(h) for k, h in sorted(histograms.items())},
+        }
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        self.collect()
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            stages = sorted(self._stages.items())
+            histograms = sorted(self._histograms.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_fmt_labels(labels)} {value}")
+
+        for (name, labels), value in gauges:
+            if value is None:
+                continue
+            metric = f"{self.prefix}_{name}"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{_fmt_labels(labels)} {value}")
+
+        metric = f"{self.prefix}_stage_seconds"
+        if stages:
+            lines.append(f"# HELP {metric} Wall time per pipeline stage.")
+            lines.append(f"# TYPE {metric} histogram")
+        for (stage, labels), (hist, _) in stages:
+            snap = hist.snapshot()
+            base = (("stage", stage),) + labels
+            for le, count in snap["buckets"]:
+                lines.append(f"{metric}_bucket{_fmt_labels(base + (('le', _fmt_le(le)),))} {count}")
+            lines.append(f"{metric}_sum{_fmt_labels(base)} {snap['sum']:.6f}")
+            lines.append(f"{metric}_count{_fmt_labels(base)} {snap['count']}")
+
+        for (name, labels), hist in histograms:
+            metric = f"{self.prefix}_{name}"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            snap = hist.snapshot()
+            for le, count in snap["buckets"]:
+                lines.append(f"{metric}_bucket{_fmt_labels(labels + (('le', _fmt_le(le)),))} {count}")
+            lines.append(f"{metric}_sum{_fmt_labels(labels)} {snap['sum']:.6f}")
+            lines.append(f"{metric}_count{_fmt_labels(labels)} {snap['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves /metrics (Prometheus text) and /metrics.json on the shared I/O loop.
+    """
+    def __init__(self, metrics=None, host=None, port=None):
+        self.metrics = metrics or get_metrics()
+        self.host = Config.METRICS_HOST if host is None else host
+        self.port = Config.METRICS_PORT if port is None else port
+        self._runner = None
+
+    async def _prometheus(self, request):
+        return web.Response(body=self.metrics.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def _json(self, request):
+        return web.json_response(self.metrics.snapshot())
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._prometheus)
+        app.router.add_get("/metrics.json", self._json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]  # port 0 = any free port
+
+    def start(self):
+        get_io_service().run(self._start(), timeout=10)
+        logger.info(f"Metrics on http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._runner is not None:
+            try:
+                get_io_service().run(self._runner.cleanup(), timeout=5)
+            except Exception as e:
+                logger.debug(f"Error stopping metrics server: {e}")
+            self._runner = None
+
+
+_metrics = Metrics()
+
+def get_metrics():
+    """
+    Returns the process-wide Metrics registry.
+    """
+    return _metrics
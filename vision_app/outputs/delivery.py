@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from ..config import Config
+from ..utils.stats import LatencyWindow
+from ..metrics import get_metrics
+from .webhook import post_webhook
+
+logger = logging.getLogger(__name__)
+
+class WebhookSpool:
+    """
+    SQLite-backed retry queue for events that could not be delivered.
+    """
+    def __init__(self, path, max_rows=None):
+        self.max_rows = Config.WEBHOOK_SPOOL_MAX if max_rows is None else max_rows
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL, attempts INTEGER, next_try REAL, payload TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS spool_next_try ON spool (next_try)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def add(self, events, attempts, next_try):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO spool (created, attempts, next_try, payload) VALUES (?, ?, ?, ?)",
+                [(now, attempts, next_try, json.dumps(e, default=str)) for e in events],
+            )
+            excess = self._count() - self.max_rows
+            if excess > 0:
+                self._db.execute("DELETE FROM spool WHERE id IN (SELECT id FROM spool ORDER BY id LIMIT ?)", (excess,))
+                self.dropped += excess
+                logger.warning(f"Webhook spool full, dropped {excess} oldest events")
+            self._db.commit()
+
+    def due(self, limit, now=None):
+        """Returns [(id, attempts, event)] whose retry time has come, oldest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, attempts, payload FROM spool WHERE next_try <= ? ORDER BY id LIMIT ?", (now, limit)
+            ).fetchall()
+        return [(row_id, attempts, json.loads(payload)) for row_id, attempts, payload in rows]
+
+    def remove(self, ids):
+        with self._lock:
+            self._db.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+
+    def reschedule(self, ids, attempts, next_try):
+        with self._lock:
+            self._db.executemany("UPDATE spool SET attempts = ?, next_try = ? WHERE id = ?",
+                                 [(attempts, next_try, i) for i in ids])
+            self._db.commit()
+
+    def _count(self):
+        return self._db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._count()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class WebhookDelivery(threading.Thread):
+    """
+    Delivers events to the webhook off the pipeline threads.
+
+    submit() never blocks: events go into a bounded in-memory queue, the
+    delivery thread groups up to batch_max of them arriving within
+    batch_window_s into one POST ({"events": [...]} when more than one).
+    Failed batches go to the SQLite spool and are retried with exponential
+    backoff; while the endpoint is backing off, new events are spooled
+    directly instead of waiting on a timeout each.
+    """
+    def __init__(self, post_fn=None, queue_size=None, batch_max=None, batch_window_s=None, spool_path=None):
+        super().__init__(name="webhook-delivery", daemon=True)
+        self.post_fn = post_fn or post_webhook
+        self.queue_size = Config.WEBHOOK_QUEUE if queue_size is None else queue_size
+        self.batch_max = max(1, Config.WEBHOOK_BATCH_MAX if batch_max is None else batch_max)
+        self.batch_window_s = Config.WEBHOOK_BATCH_WINDOW_MS / 1000.0 if batch_window_s is None else batch_window_s
+        spool_path = Config.WEBHOOK_SPOOL if spool_path is None else spool_path
+        self.spool = WebhookSpool(spool_path) if spool_path else None
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self.stop_event = threading.Event()
+        self._failures = 0          # consecutive failed POSTs
+        self._down_until = 0.0
+
+        self.submitted = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.retried = 0
+        self.latency = LatencyWindow(256)  # per POST
+
+    def submit(self, event):
+        overflow = None
+        with self._cond:
+            self.submitted += 1
+            if len(self._queue) >= self.queue_size:
+                overflow = self._queue.popleft()
+            self._queue.append(event)
+            self._cond.notify()
+        if overflow is not None:
+            self._park([overflow], attempts=0, delay=0)
+
+    def _park(self, events, attempts, delay):
+        if self.spool is None:
+            self.dropped += len(events)
+            return
+        try:
+            self.spool.add(events, attempts, time.time() + delay)
+        except sqlite3.Error as e:
+            self.dropped += len(events)
+            logger.error(f"Webhook spool write failed: {e}")
+
+    def _backoff(self, attempts):
+        return min(Config.WEBHOOK_RETRY_BASE_S * 2 ** max(0, attempts - 1), Config.WEBHOOK_RETRY_MAX_S)
+
+    def _next_batch(self, timeout):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue, timeout):
+                return []
+            deadline = time.monotonic() + self.batch_window_s
+            while len(self._queue) < self.batch_max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.stop_event.is_set():
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.batch_max, len(self._queue)))]
+
+    def _post(self, events):
+        payload = events[0] if len(events) == 1 else {"source": Config.DETECTORNAME, "events": events}
+        t0 = time.monotonic()
+        try:
+            self.post_fn(payload)
+        except Exception as e:
+            self.failed += 1
+            self._failures += 1
+            self._down_until = time.monotonic() + self._backoff(self._failures)
+            get_metrics().inc("webhook_failures")
+            logger.warning(f"Webhook delivery failed ({len(events)} events): {e!r}")
+            return False
+        elapsed = time.monotonic() - t0
+        self.latency.add(elapsed)
+        get_metrics().observe("webhook", elapsed)
+        get_metrics().inc("webhook_delivered", len(events))
+        self._failures = 0
+        self._down_until = 0.0
+        self.batches += 1
+        self.delivered += len(events)
+        return True
+
+    def _retry_spooled(self):
+        rows = self.spool.due(self.batch_max)
+        if not rows:
+            return
+        ids = [r[0] for r in rows]
+        if self._post([r[2] for r in rows]):
+            self.retried += len(rows)
+            self.spool.remove(ids)
+        else:
+            attempts = max(r[1] for r in rows) + 1
+            self.spool.reschedule(ids, attempts, time.time() + self._backoff(attempts))
+
+    def run(self):
+        while not self.stop_event.is_set():
+            backing_off = time.monotonic() < self._down_until
+            events = self._next_batch(timeout=0.5)
+            if events:
+                if backing_off:
+                    self._park(events, attempts=0, delay=0)
+                elif not self._post(events):
+                    self._park(events, attempts=1, delay=self._backoff(1))
+                continue
+
+            if self.spool is not None and not backing_off:
+                try:
+                    self._retry_spooled()
+                except sqlite3.Error as e:
+                    logger.error(f"Webhook spool read failed: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        super().join(timeout)
+        # Whatever is still queued in memory survives a restart in the spool
+        with self._cond:
+            leftover = list(self._queue)
+            self._queue.clear()
+        if leftover:
+            self._park(leftover, attempts=0, delay=0)
+        if self.spool is not None and not self.is_alive():
+            self.spool.close()
+            self.spool = None
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+        spool = self.spool
+        return {
+            "queued": queued,
+            "spooled": spool.count() if spool is not None else 0,
+            "submitted": self.submitted,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped + (spool.dropped if spool is not None else 0),
+            "post": self.latency.summary(),
+        }
@@ -0,0 +1,365 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import quote
+from datetime import datetime, timezone
+from ..config import Config
+from ..analysis.parsers import canonical_label, normalize_labels, parse_vision_text
+from ..utils.stats import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, camera TEXT, source TEXT, summary TEXT,"
+    " vision_status TEXT, snapshot_id INTEGER, payload TEXT);"
+    # One row per label occurrence; ts / camera are repeated so label queries need no join to filter
+    "CREATE TABLE IF NOT EXISTS event_labels ("
+    " event_id INTEGER, ts REAL, camera TEXT, kind TEXT, label TEXT, confidence REAL, track_id INTEGER);"
+    "CREATE TABLE IF NOT EXISTS hourly ("
+    " hour INTEGER, camera TEXT, kind TEXT, label TEXT, events INTEGER, objects INTEGER,"
+    " PRIMARY KEY (hour, camera, kind, label));"
+    "CREATE INDEX IF NOT EXISTS events_ts ON events (ts);"
+    "CREATE INDEX IF NOT EXISTS events_camera_ts ON events (camera, ts);"
+    "CREATE INDEX IF NOT EXISTS event_labels_label_ts ON event_labels (label, ts);"
+    "CREATE INDEX IF NOT EXISTS event_labels_camera_ts ON event_labels (camera, ts);"
+    "CREATE INDEX IF NOT EXISTS event_labels_event ON event_labels (event_id);"
+)
+
+def to_epoch(value):
+    """Accepts epoch seconds, a datetime or an ISO 8601 string (trailing Z allowed)."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def event_labels(event):
+    """
+    Returns [(kind, label, confidence, track_id)] for the YOLO objects and the
+    LM Studio tags of an event. Tags are canonicalized like the trackers';
+    prose answers without JSON fields go through the same fallback parser.
+    """
+    out = [("yolo", o["label"], o.get("confidence"), o.get("track_id")) for o in event.get("objects") or []]
+    vision = event.get("vision") or {}
+    parsed = vision.get("parsed") or {}
+    if parsed:
+        objects = normalize_labels(map(str, parsed.get("objects_present") or []))
+        actions = normalize_labels(map(str, parsed.get("actions_present") or []))
+    elif vision.get("status") == "ok" and vision.get("summary"):
+        objects, actions = parse_vision_text(vision["summary"])
+    else:
+        objects, actions = (), ()
+    out += [("vision", v, None, None) for v in objects]
+    out += [("action", v, None, None) for v in actions]
+    return out
+
+
+class EventStore(threading.Thread):
+    """
+    Keeps every event in a WAL-mode SQLite file, indexed by time, camera and label.
+
+    submit() only appends to a bounded in-memory queue; the store thread writes
+    up to batch_max queued events per transaction, at least every flush_s. Label
+    counts per hour are rolled up while writing, so the hourly aggregates
+    outlive the raw events: compaction drops events older than retention_days
+    and hourly rows older than hourly_days. Queries use their own connection
+    and never wait on the writer.
+
+    readonly=True only opens that query connection, with SQLite's mode=ro, for
+    reading a store that a running app writes to; the thread is not started.
+    """
+    def __init__(self, path=None, batch_max=None, flush_s=None, queue_size=None,
+                 retention_days=None, hourly_days=None, compact_every_s=None, readonly=False):
+        super().__init__(name="event-store", daemon=True)
+        self.path = Config.EVENT_STORE if path is None else path
+        self.readonly = readonly
+        self.batch_max = max(1, Config.EVENT_STORE_BATCH_MAX if batch_max is None else batch_max)
+        self.flush_s = Config.EVENT_STORE_FLUSH_MS / 1000.0 if flush_s is None else flush_s
+        self.queue_size = Config.EVENT_STORE_QUEUE if queue_size is None else queue_size
+        self.retention_days = Config.EVENT_RETENTION_DAYS if retention_days is None else retention_days
+        self.hourly_days = Config.EVENT_HOURLY_RETENTION_DAYS if hourly_days is None else hourly_days
+        self.compact_every_s = Config.EVENT_STORE_COMPACT_S if compact_every_s is None else compact_every_s
+
+        if readonly:
+            self._db = None
+            self._reader = sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")  # only takes effect on a new file
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+            self._reader = sqlite3.connect(self.path, check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+        self._read_lock = threading.Lock()
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # batch writes vs compaction
+        self.stop_event = threading.Event()
+        self._compacted = time.monotonic()
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.purged = 0
+        self.latency = LatencyWindow(256)  # per batch
+
+    def submit(self, event):
+        """Queues an event for writing; never blocks. Streaming partial events are ignored."""
+        if self.readonly:
+            raise RuntimeError("Event store is open read-only")
+        if event.get("partial"):
+            return
+        with self._cond:
+            self.submitted += 1
+            if len(self._queue) >= self.queue_size:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(event)
+            if len(self._queue) >= self.batch_max:
+                self._cond.notify()
+
+    def _next_batch(self, timeout):
+        with self._cond:
+            if len(self._queue) < self.batch_max and not self.stop_event.is_set():
+                self._cond.wait(timeout)
+            return [self._queue.popleft() for _ in range(min(self.batch_max, len(self._queue)))]
+
+    def _write(self, events):
+        t0 = time.monotonic()
+        label_rows, hourly = [], {}  # (hour, camera, kind, label) -> [events, objects]
+        with self._write_lock, self._db:
+            for event in events:
+                ts = to_epoch(event.get("timestamp")) or time.time()
+                camera = event.get("camera") or ""
+                vision = event.get("vision") or {}
+                cur = self._db.execute(
+                    "INSERT INTO events (ts, camera, source, summary, vision_status, snapshot_id, payload)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (ts, camera, event.get("source"), vision.get("summary") or event.get("summary"),
+                     vision.get("status"), event.get("snapshot_id"), json.dumps(event, default=str)),
+                )
+                labels = event_labels(event)
+                label_rows += [(cur.lastrowid, ts, camera, kind, label, conf, track_id)
+                               for kind, label, conf, track_id in labels]
+                hour = int(ts // 3600) * 3600
+                per_event = Counter((kind, label) for kind, label, _, _ in labels)
+                for (kind, label), n in per_event.items():
+                    counts = hourly.setdefault((hour, camera, kind, label), [0, 0])
+                    counts[0] += 1
+                    counts[1] += n
+
+            self._db.executemany(
+                "INSERT INTO event_labels (event_id, ts, camera, kind, label, confidence, track_id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", label_rows)
+            self._db.executemany(
+                "INSERT INTO hourly (hour, camera, kind, label, events, objects) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (hour, camera, kind, label)"
+                " DO UPDATE SET events = events + excluded.events, objects = objects + excluded.objects",
+                [(*key, events_n, objects_n) for key, (events_n, objects_n) in hourly.items()])
+        self.latency.add(time.monotonic() - t0)
+        self.written += len(events)
+        self.batches += 1
+
+    def compact(self, now=None):
+        """
+        Drops events past the retention window and hourly rows past theirs,
+        then checkpoints the WAL and returns freed pages to the filesystem.
+        Runs on the store thread every compact_every_s; safe to call directly.
+        """
+        now = time.time() if now is None else now
+        purged = 0
+        with self._write_lock:
+            if self.retention_days > 0:
+                cutoff = now - self.retention_days * 86400
+                while True:
+                    with self._db:
+                        ids = [(r[0],) for r in self._db.execute(
+                            "SELECT id FROM events WHERE ts < ? LIMIT 5000", (cutoff,))]
+                        if not ids:
+                            break
+                        self._db.executemany("DELETE FROM event_labels WHERE event_id = ?", ids)
+                        self._db.executemany("DELETE FROM events WHERE id = ?", ids)
+                    purged += len(ids)
+            if self.hourly_days > 0:
+                with self._db:
+                    self._db.execute("DELETE FROM hourly WHERE hour < ?", (now - self.hourly_days * 86400,))
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.execute("PRAGMA incremental_vacuum")
+        self.purged += purged
+        if purged:
+            logger.info(f"Event store: purged {purged} events older than {self.retention_days} days")
+        return purged
+
+    def run(self):
+        while not self.stop_event.is_set():
+            events = self._next_batch(timeout=self.flush_s)
+            if events:
+                try:
+                    self._write(events)
+                except sqlite3.Error as e:
+                    self.errors += len(events)
+                    logger.error(f"Event store write failed ({len(events)} events): {e}")
+            if self.compact_every_s > 0 and time.monotonic() - self._compacted >= self.compact_every_s:
+                self._compacted = time.monotonic()
+                try:
+                    self.compact()
+                except sqlite3.Error as e:
+                    logger.error(f"Event store compaction failed: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        super().join(timeout)
+        if self.is_alive():
+            return
+        with self._cond:
+            leftover = list(self._queue)
+            self._queue.clear()
+        try:
+            for start in range(0, len(leftover), self.batch_max):
+                self._write(leftover[start:start + self.batch_max])
+        except sqlite3.Error as e:
+            logger.error(f"Event store final flush failed: {e}")
+        self.close()
+
+    def close(self):
+        with self._read_lock:
+            self._reader.close()
+        if self._db is not None:
+            self._db.close()
+
+    def flush(self, timeout=5.0):
+        """Waits until everything submitted so far is written or dropped. Returns False on timeout."""
+        with self._cond:
+            target = self.submitted
+            self._cond.notify()
+        deadline = time.monotonic() + timeout
+        while self.written + self.errors + self.dropped < target:
+            if time.monotonic() >= deadline:
+                return False
+            with self._cond:
+                self._cond.notify()
+            time.sleep(0.01)
+        return True
+
+    def query(self, label=None, camera=None, since=None, until=None, kind="yolo", limit=100):
+        """
+        Events (newest first) with the given label (of the given kind: yolo,
+        vision or action), camera and time range. Times are epoch seconds or
+        ISO 8601 strings. Returns the stored event payloads plus their "id".
+        """
+        where, args = [], []
+        if label is not None:
+            sql = ("SELECT DISTINCT e.id, e.payload, e.ts FROM event_labels l JOIN events e ON e.id = l.event_id")
+            if kind != "yolo":
+                label = canonical_label(label)  # "Cats" finds the stored "cat"
+            where += ["l.label = ?", "l.kind = ?"]; args += [label, kind]
+            col = "l"
+        else:
+            sql = "SELECT e.id, e.payload, e.ts FROM events e"
+            col = "e"
+        if camera is not None:
+            where.append(f"{col}.camera = ?"); args.append(camera)
+        if since is not None:
+            where.append(f"{col}.ts >= ?"); args.append(to_epoch(since))
+        if until is not None:
+            where.append(f"{col}.ts < ?"); args.append(to_epoch(until))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.ts DESC LIMIT ?"
+        args.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(sql, args).fetchall()
+        return [{**json.loads(r["payload"]), "id": r["id"]} for r in rows]
+
+    def hourly(self, label=None, camera=None, since=None, until=None, kind="yolo"):
+        """
+        Per-hour counts, oldest first: [{"hour", "camera", "label", "events",
+        "objects"}] where events is the number of events with the label and
+        objects the number of boxes / tags. "hour" is the epoch of the hour start.
+        """
+        where, args = ["kind = ?"], [kind]
+        if label is not None:
+            where.append("label = ?"); args.append(canonical_label(label) if kind != "yolo" else label)
+        if camera is not None:
+            where.append("camera = ?"); args.append(camera)
+        if since is not None:
+            where.append("hour >= ?"); args.append(int(to_epoch(since) // 3600) * 3600)
+        if until is not None:
+            where.append("hour < ?"); args.append(to_epoch(until))
+        sql = ("SELECT hour, camera, label, events, objects FROM hourly WHERE " + " AND ".join(where) +
+               " ORDER BY hour, camera, label")
+        with self._read_lock:
+            rows = self._reader.execute(sql, args).fetchall()
+        return [dict(r) for r in rows]
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "purged": self.purged,
+            "write": self.latency.summary(),
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query the event store.")
+    ap.add_argument("--db", default=Config.EVENT_STORE)
+    ap.add_argument("--label")
+    ap.add_argument("--kind", default="yolo", choices=("yolo", "vision", "action"))
+    ap.add_argument("--camera")
+    ap.add_argument("--since", help="epoch seconds or ISO 8601")
+    ap.add_argument("--until", help="epoch seconds or ISO 8601")
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--hourly", action="store_true", help="print hourly aggregates instead of events")
+    ap.add_argument("--compact", action="store_true", help="apply retention and compact the file")
+    args = ap.parse_args(argv)
+    if not args.db:
+        ap.error("no event store: pass --db or set EVENT_STORE")
+
+    def num(v):
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return v
+
+    # Only compaction writes; queries must not touch the file the app is writing to
+    store = EventStore(args.db, readonly=not args.compact)
+    try:
+        if args.compact:
+            print(f"purged {store.compact()} events")
+        elif args.hourly:
+            for row in store.hourly(args.label, args.camera, num(args.since), num(args.until), args.kind):
+                hour = datetime.fromtimestamp(row["hour"], timezone.utc).strftime("%Y-%m-%d %H:00Z")
+                print(f"{hour}  {row['camera'] or '-':<12} {row['label']:<16} events={row['events']} objects={row['objects']}")
+        else:
+            for e in store.query(args.label, args.camera, num(args.since), num(args.until), args.kind, args.limit):
+                print(f"{e['id']:>8}  {e.get('timestamp')}  {e.get('camera') or '-':<12} {e.get('summary')}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
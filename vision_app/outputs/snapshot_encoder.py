@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+import cv2
+from ..config import Config
+from ..utils.stats import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+try:
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+try:
+    from turbojpeg import TurboJPEG
+    _turbo = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except Exception:  # ImportError, or the libturbojpeg shared library is missing
+    _turbo = None
+    TURBOJPEG_AVAILABLE = False
+
+def _encode_simplejpeg(img, quality):
+    return simplejpeg.encode_jpeg(img, quality=quality, colorspace="BGR")
+
+def _encode_turbojpeg(img, quality):
+    return _turbo.encode(img, quality=quality)
+
+def _encode_opencv(img, quality):
+    ok, enc = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise RuntimeError("Failed to encode snapshot")
+    return enc.tobytes()
+
+def pick_encoder(name=None):
+    """Returns (name, encode_fn); auto prefers libjpeg-turbo bindings over OpenCV."""
+    name = (name or Config.JPEG_ENCODER).lower()
+    if name in ("auto", "simplejpeg") and SIMPLEJPEG_AVAILABLE:
+        return "simplejpeg", _encode_simplejpeg
+    if name in ("auto", "turbojpeg") and TURBOJPEG_AVAILABLE:
+        return "turbojpeg", _encode_turbojpeg
+    if name not in ("auto", "opencv"):
+        logger.warning(f"JPEG encoder '{name}' not available, using OpenCV")
+    return "opencv", _encode_opencv
+
+def crop_to_boxes(frame, boxes, margin):
+    """Crops to the union of boxes plus margin (fraction of the union size). Returns (crop, (x, y))."""
+    if not boxes:
+        return frame, (0, 0)
+    h, w = frame.shape[:2]
+    x1, y1 = min(b[0] for b in boxes), min(b[1] for b in boxes)
+    x2, y2 = max(b[2] for b in boxes), max(b[3] for b in boxes)
+    mx, my = (x2 - x1) * margin, (y2 - y1) * margin
+    x1, y1 = max(0, int(x1 - mx)), max(0, int(y1 - my))
+    x2, y2 = min(w, int(x2 + mx)), min(h, int(y2 + my))
+    if x2 - x1 < 16 or y2 - y1 < 16:
+        return frame, (0, 0)
+    return frame[y1:y2, x1:x2], (x1, y1)
+
+class SnapshotEncoder:
+    """
+    Encodes event snapshots for the VLM: optional crop to the detected boxes
+    plus margin, downscale to max_edge, then the highest quality between
+    min_quality and max_quality whose JPEG fits max_bytes (bisection, seeded
+    with the last quality that fit). max_bytes = 0 encodes once at max_quality.
+    Only the LM Studio payload goes through it; the snapshot store gets its own
+    full-frame JPEG.
+    """
+    def __init__(self, max_edge=None, crop=None, crop_margin=None, max_bytes=None,
+                 min_quality=None, max_quality=None, encoder=None):
+        self.max_edge = Config.SNAPSHOT_MAX_EDGE if max_edge is None else max_edge
+        self.crop = Config.SNAPSHOT_CROP if crop is None else crop
+        self.crop_margin = Config.SNAPSHOT_CROP_MARGIN if crop_margin is None else crop_margin
+        self.max_bytes = Config.SNAPSHOT_MAX_BYTES if max_bytes is None else max_bytes
+        self.min_quality = Config.SNAPSHOT_MIN_QUALITY if min_quality is None else min_quality
+        self.max_quality = Config.JPEG_QUALITY if max_quality is None else max_quality
+        self.encoder_name, self._encode = pick_encoder(encoder)
+        self._last_quality = self.max_quality
+
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_bytes = 0
+        self.total_quality = 0
+        self.over_budget = 0
+        self.encode_time = LatencyWindow(256)
+        self.llm_time = LatencyWindow(256)
+
+    def _fit(self, img):
+        if not self.max_bytes:
+            return self._encode(img, self.max_quality), self.max_quality, 1
+
+        probes = 0
+        lo, hi = self.min_quality, self.max_quality
+        best = None
+        q = min(max(self._last_quality, lo), hi)
+        while True:
+            data = self._encode(img, q)
+            probes += 1
+            if len(data) <= self.max_bytes:
+                best = (data, q)
+                lo = q + 1
+            else:
+                hi = q - 1
+            if hi - lo < 3 or probes >= 5:  # close enough; each probe is a full encode
+                break
+            q = (lo + hi) // 2
+
+        if best is None:
+            if q != self.min_quality:
+                data = self._encode(img, self.min_quality)
+                probes += 1
+            best = (data, self.min_quality)
+            with self._lock:
+                self.over_budget += len(data) > self.max_bytes
+        return best[0], best[1], probes
+
+    def encode(self, frame, boxes=None):
+        """
+        Returns (jpeg_bytes, info) with info holding width, height, quality,
+        bytes, probes and encode_ms. boxes are (x1, y1, x2, y2) in frame pixels.
+        """
+        t0 = time.perf_counter()
+        img = frame
+        if self.crop and boxes:
+            img, _ = crop_to_boxes(img, boxes, self.crop_margin)
+
+        h, w = img.shape[:2]
+        if self.max_edge and max(w, h) > self.max_edge:
+            s = self.max_edge / max(w, h)
+            img = cv2.resize(img, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+        if not img.flags["C_CONTIGUOUS"]:
+            img = img.copy()
+
+        data, quality, probes = self._fit(img)
+        elapsed = time.perf_counter() - t0
+        self._last_quality = quality
+
+        self.encode_time.add(elapsed)
+        with self._lock:
+            self.count += 1
+            self.total_bytes += len(data)
+            self.total_quality += quality
+        return data, {
+            "width": img.shape[1],
+            "height": img.shape[0],
+            "quality": quality,
+            "bytes": len(data),
+            "probes": probes,
+            "encode_ms": round(1000 * elapsed, 1),
+        }
+
+    def note_llm(self, seconds):
+        """Records the LM Studio round-trip for a snapshot from this encoder."""
+        self.llm_time.add(seconds)
+
+    def stats(self):
+        with self._lock:
+            n = self.count
+            return {
+                "encoder": self.encoder_name,
+                "encoded": n,
+                "avg_kb": round(self.total_bytes / n / 1024, 1) if n else None,
+                "avg_quality": round(self.total_quality / n) if n else None,
+                "over_budget": self.over_budget,
+                "encode": self.encode_time.summary(),
+                "llm": self.llm_time.summary(),
+            }
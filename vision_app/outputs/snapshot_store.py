@@ -0,0 +1,172 @@
+import logging
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import quote
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+class SnapshotStore:
+    """
+    JPEG snapshots in one preallocated, memory-mapped ring file plus a SQLite
+    index (timestamp, camera, track ids). Disk use is fixed at size_mb; the
+    oldest snapshots are overwritten and dropped from the index as the write
+    position wraps. Events carry the snapshot id instead of the image bytes.
+
+    readonly=True opens an existing store next to a running app without
+    touching it: the ring keeps its current size and is mapped read-only,
+    and the index is opened with SQLite's mode=ro (no schema or cleanup).
+    """
+    def __init__(self, directory=None, size_mb=None, readonly=False):
+        self.directory = directory or Config.SNAPSHOT_DIR
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self.written = 0
+        self.bytes_written = 0
+        self.overwritten = 0
+
+        ring_path = os.path.join(self.directory, "ring.bin")
+        index_path = os.path.join(self.directory, "index.db")
+        if readonly:
+            self._fd = os.open(ring_path, os.O_RDONLY)
+            self.size = os.fstat(self._fd).st_size
+            if self.size == 0:
+                os.close(self._fd)
+                raise ValueError(f"Snapshot ring {ring_path} is empty")
+            self._map = mmap.mmap(self._fd, self.size, access=mmap.ACCESS_READ)
+            self._db = sqlite3.connect(f"file:{quote(index_path)}?mode=ro", uri=True, check_same_thread=False)
+            self._pos = None
+            return
+
+        self.size = int((Config.SNAPSHOT_STORE_MB if size_mb is None else size_mb) * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+        self._fd = os.open(ring_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size != self.size:
+            os.ftruncate(self._fd, self.size)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self._fd, 0, self.size)  # reserve the blocks up front
+        self._map = mmap.mmap(self._fd, self.size)
+
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, camera TEXT,"
+            " offset INTEGER, length INTEGER, crc INTEGER);"
+            "CREATE TABLE IF NOT EXISTS snapshot_tracks (snapshot_id INTEGER, track_id INTEGER);"
+            "CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (camera, ts);"
+            "CREATE INDEX IF NOT EXISTS snapshots_offset ON snapshots (offset);"
+            "CREATE INDEX IF NOT EXISTS snapshot_tracks_track ON snapshot_tracks (track_id);"
+            "CREATE INDEX IF NOT EXISTS snapshot_tracks_snapshot ON snapshot_tracks (snapshot_id);"
+        )
+        # Drop entries from a previous ring of a different size
+        self._db.execute("DELETE FROM snapshots WHERE offset + length > ?", (self.size,))
+        self._db.execute("DELETE FROM snapshot_tracks WHERE snapshot_id NOT IN (SELECT id FROM snapshots)")
+        self._db.commit()
+
+        last = self._db.execute("SELECT offset + length FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        self._pos = last[0] if last else 0
+
+    def put(self, jpeg, ts=None, camera=None, track_ids=()):
+        """Stores the JPEG bytes and returns the snapshot id."""
+        if self.readonly:
+            raise RuntimeError("Snapshot store is open read-only")
+        n = len(jpeg)
+        if n > self.size:
+            raise ValueError(f"Snapshot of {n} bytes does not fit the {self.size} byte ring")
+        ts = time.time() if ts is None else ts
+
+        with self._lock:
+            pos = self._pos if self._pos + n <= self.size else 0
+            end = pos + n
+            stale = [(r[0],) for r in self._db.execute(
+                "SELECT id FROM snapshots WHERE offset < ? AND offset + length > ?", (end, pos))]
+            if stale:
+                self._db.executemany("DELETE FROM snapshots WHERE id = ?", stale)
+                self._db.executemany("DELETE FROM snapshot_tracks WHERE snapshot_id = ?", stale)
+                self.overwritten += len(stale)
+            self._map[pos:end] = jpeg
+            cur = self._db.execute(
+                "INSERT INTO snapshots (ts, camera, offset, length, crc) VALUES (?, ?, ?, ?, ?)",
+                (ts, camera, pos, n, zlib.crc32(jpeg)),
+            )
+            snapshot_id = cur.lastrowid
+            if track_ids:
+                self._db.executemany("INSERT INTO snapshot_tracks (snapshot_id, track_id) VALUES (?, ?)",
+                                     [(snapshot_id, int(t)) for t in track_ids])
+            self._db.commit()
+            self._pos = end
+            self.written += 1
+            self.bytes_written += n
+        return snapshot_id
+
+    def get(self, snapshot_id):
+        """Returns the JPEG bytes, or None when the snapshot was overwritten."""
+        with self._lock:
+            row = self._db.execute("SELECT offset, length, crc FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if row is None:
+                return None
+            offset, length, crc = row
+            data = bytes(self._map[offset:offset + length])
+        if zlib.crc32(data) != crc:
+            logger.warning(f"Snapshot {snapshot_id} failed its checksum")
+            return None
+        return data
+
+    def find(self, camera=None, track_id=None, since=None, until=None, limit=50):
+        """Returns index rows (newest first) matching the filters."""
+        sql = "SELECT s.id, s.ts, s.camera, s.length FROM snapshots s"
+        where, args = [], []
+        if track_id is not None:
+            sql += " JOIN snapshot_tracks t ON t.snapshot_id = s.id"
+            where.append("t.track_id = ?"); args.append(int(track_id))
+        if camera is not None:
+            where.append("s.camera = ?"); args.append(camera)
+        if since is not None:
+            where.append("s.ts >= ?"); args.append(since)
+        if until is not None:
+            where.append("s.ts < ?"); args.append(until)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY s.id DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [{"id": r[0], "ts": r[1], "camera": r[2], "bytes": r[3]} for r in rows]
+
+    def stats(self):
+        with self._lock:
+            count, used = self._db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM snapshots").fetchone()
+        return {
+            "stored": count,
+            "used_mb": round(used / 1048576, 1),
+            "capacity_mb": round(self.size / 1048576, 1),
+            "written": self.written,
+            "overwritten": self.overwritten,
+        }
+
+    def close(self):
+        with self._lock:
+            if not self.readonly:
+                self._map.flush()
+            self._map.close()
+            os.close(self._fd)
+            self._db.close()
+
+
+if __name__ == "__main__":
+    # python -m vision_app.outputs.snapshot_store <id> [out.jpg]
+    store = SnapshotStore(readonly=True)  # the app may be writing to it
+    data = store.get(int(sys.argv[1]))
+    store.close()
+    if data is None:
+        sys.exit(f"Snapshot {sys.argv[1]} not found (overwritten?)")
+    out = sys.argv[2] if len(sys.argv) > 2 else f"snapshot-{sys.argv[1]}.jpg"
+    with open(out, "wb") as f:
+        f.write(data)
+    print(out)
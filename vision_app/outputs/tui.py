@@ -10,13 +10,11 @@ class Dashboard:
     def __init__(self):
         self.scr = None
         self.enabled = False
-        self.last_event = None
         self.last_err = None
-        self.cam_status = "initializing"
         self.event_count = 0
-        self.get_seen_yolo = None
-        self.get_seen_vision = None
-        self.get_seen_actions = None
+        self.cameras = {}  # camera id -> {status, last_event, event_count, seen}
+        self.selected = None
+        self.get_stats = None
 
     def start(self):
         try:
@@ -36,13 +34,30 @@ class Dashboard:
             curses.endwin()
             self.enabled = False
 
-    def set_seen_sources(self, yolo_fn=None, vision_fn=None, actions_fn=None):
-        self.get_seen_yolo = yolo_fn
-        self.get_seen_vision = vision_fn
-        self.get_seen_actions = actions_fn
-
-    def set_cam_status(self, status: str):
-        self.cam_status = status
+    def _camera(self, camera=None):
+        key = camera if camera is not None else (self.selected or "default")
+        cam = self.cameras.get(key)
+        if cam is None:
+            cam = {"status": "initializing", "last_event": None, "event_count": 0, "seen": (None, None, None)}
+            self.cameras[key] = cam
+            if self.selected is None:
+                self.selected = key
+        return cam
+
+    def next_camera(self):
+        ids = list(self.cameras)
+        if len(ids) > 1:
+            self.selected = ids[(ids.index(self.selected) + 1) % len(ids)]
+            self.draw()
+
+    def set_seen_sources(self, yolo_fn=None, vision_fn=None, actions_fn=None, camera=None):
+        self._camera(camera)["seen"] = (yolo_fn, vision_fn, actions_fn)
+
+    def set_stats_source(self, stats_fn=None):
+        self.get_stats = stats_fn
+
+    def set_cam_status(self, status: str, camera=None):
+        self._camera(camera)["status"] = status
         self.draw()
 
     def set_error(self, err: str):
@@ -50,8 +65,11 @@ class Dashboard:
         self.draw()
 
     def update(self, event: dict):
-        self.last_event = event
-        self.event_count += 1
+        cam = self._camera(event.get("camera"))
+        cam["last_event"] = event
+        if not event.get("partial"):  # streamed LM Studio fields, the full event follows
+            cam["event_count"] += 1
+            self.event_count += 1
         self.draw()
 
     def _render_memory(self, title, seen_fn, addln):
@@ -74,6 +92,21 @@ class Dashboard:
             addln(line_txt)
         addln()
 
+    def _render_stats(self, addln):
+        if not callable(self.get_stats):
+            return
+
+        stats = self.get_stats()
+        if not stats:
+            return
+
+        addln(" Pipeline:", curses.A_BOLD)
+        for stage, st in stats.items():
+            parts = [f"{k}_p95={v.get('p95_ms', '-')}ms" if isinstance(v, dict) else f"{k}={v}"
+                     for k, v in st.items() if k != "capacity"]
+            addln(f"  {stage:<10} " + "  ".join(parts))
+        addln()
+
     def draw(self):
         if not self.enabled:
             return
@@ -91,25 +124,32 @@ class Dashboard:
                         pass
                     line += 1
 
+            cam = self._camera()
+            last_event = cam["last_event"]
+
             addln(" RTSP/PiCam Vision Monitor  —  press q to exit ", curses.A_REVERSE)
-            addln(f" Camera: {self.cam_status}   |   Events: {self.event_count}   |   Time: {datetime.now().strftime('%H:%M:%S')}")
+            addln(f" Camera: {self.selected} {cam['status']}   |   Events: {cam['event_count']}/{self.event_count}   |   Time: {datetime.now().strftime('%H:%M:%S')}")
+            if len(self.cameras) > 1:
+                addln(" Cameras:    " + "  ".join(f"{k}={v['status']}" for k, v in self.cameras.items()))
             addln()
 
-            if self.last_event:
+            if last_event:
                 addln(" Last detection:", curses.A_BOLD)
-                addln(f"  Time:       {self.last_event.get('timestamp')}")
-                addln(f"  Summary:    {self.last_event.get('summary')}")
+                addln(f"  Time:       {last_event.get('timestamp')}")
+                addln(f"  Summary:    {last_event.get('summary')}")
 
-                objs = self.last_event.get("objects") or []
-                obj_str = ", ".join(f"{o['label']}({o['confidence']:.2f})" for o in objs) if objs else "-"
+                objs = last_event.get("objects") or []
+                obj_str = ", ".join(
+                    f"{o['label']}{'#' + str(o['track_id']) if o.get('track_id') else ''}({o['confidence']:.2f})"
+                    for o in objs) if objs else "-"
                 addln(f"  Objects:    {obj_str}")
 
-                vision = self.last_event.get("vision") or {}
+                vision = last_event.get("vision") or {}
                 vstat = vision.get("status", "-")
                 addln(f"  Vision:     {vstat}")
 
                 vsum = vision.get("summary")
-                if not vsum and vstat != "ok":
+                if not vsum and vstat not in ("ok", "streaming"):
                     verr = vision.get("error") or ""
                     vbody = vision.get("body") or ""
                     vsum = f"(error) {verr or vbody or '-'}"
@@ -123,9 +163,11 @@ class Dashboard:
                         addln("    ... (truncated)")
                 addln()
 
-            self._render_memory("Observed objects (YOLO)", self.get_seen_yolo, addln)
-            self._render_memory("Vision objects (LM Studio)", self.get_seen_vision, addln)
-            self._render_memory("Vision actions (LM Studio)", self.get_seen_actions, addln)
+            seen_yolo, seen_vision, seen_actions = cam["seen"]
+            self._render_stats(addln)
+            self._render_memory("Observed objects (YOLO)", seen_yolo, addln)
+            self._render_memory("Vision objects (LM Studio)", seen_vision, addln)
+            self._render_memory("Vision actions (LM Studio)", seen_actions, addln)
 
             if self.last_err:
                 addln(" Last error:", curses.A_BOLD)
@@ -134,7 +176,7 @@ class Dashboard:
 
             addln()
             addln(("-"* (w-1))[:w-1])
-            addln(" q = quit | r = reset memory | Logs still written to file if configured")
+            addln(" q = quit | r = reset memory | c = next camera | Logs still written to file if configured")
 
             self.scr.refresh()
         except Exception as e:
@@ -1,11 +1,20 @@
 import aiohttp
-import asyncio
 import logging
 from ..config import Config
+from ..utils.io_service import get_io_service
 
 logger = logging.getLogger(__name__)
 
-async def send_to_webhook_async(payload):
+async def post_webhook_async(payload, session):
+    """
+    POSTs a payload to the configured webhook URL. Raises on failure.
+    """
+    timeout = aiohttp.ClientTimeout(total=Config.WEBHOOK_TIMEOUT)
+    async with session.post(Config.WEBHOOK, json=payload, timeout=timeout) as resp:
+        resp.raise_for_status()
+        logger.debug("Webhook sent successfully")
+
+async def send_to_webhook_async(payload, session=None):
     """
     Sends a payload to the configured webhook URL.
     """
@@ -13,20 +22,43 @@ async def send_to_webhook_async(payload):
         return
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(Config.WEBHOOK, json=payload, timeout=15) as resp:
-                resp.raise_for_status()
-                logger.debug("Webhook sent successfully")
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await send_to_webhook_async(payload, session=own_session)
+
+        await post_webhook_async(payload, session)
     except Exception as e:
         logger.error(f"Webhook error: {e}")
 
+async def _send_pooled(payload):
+    session = get_io_service().get_session("webhook", limit=Config.WEBHOOK_CONN_LIMIT)
+    await send_to_webhook_async(payload, session=session)
+
+async def _post_pooled(payload):
+    session = get_io_service().get_session("webhook", limit=Config.WEBHOOK_CONN_LIMIT)
+    await post_webhook_async(payload, session)
+
+def post_webhook(payload):
+    """
+    Blocking POST on the shared I/O loop that raises on failure (used by the delivery queue).
+    """
+    return get_io_service().submit(_post_pooled(payload)).result(timeout=Config.WEBHOOK_TIMEOUT + 5)
+
+def submit_webhook(payload):
+    """
+    Queues a webhook POST on the shared I/O loop without blocking.
+    Returns a concurrent.futures.Future.
+    """
+    return get_io_service().submit(_send_pooled(payload))
+
 def send_to_webhook(payload):
     """
     Synchronous wrapper for sending a webhook.
     """
+    if not Config.WEBHOOK:
+        return
+
     try:
-        asyncio.run(send_to_webhook_async(payload))
-    except RuntimeError as e:
-        # This can happen if there's already an asyncio loop running.
-        # In a more complex app, you'd want to handle this more gracefully.
-        logger.error(f"Asyncio loop issue while sending webhook: {e}")
+        submit_webhook(payload).result(timeout=Config.WEBHOOK_TIMEOUT + 5)
+    except Exception as e:
+        logger.error(f"Webhook delivery issue: {repr(e)}")
@@ -0,0 +1,315 @@
+import logging
+import threading
+import time
+from collections import deque
+from .config import Config
+from .streams.reconnect import ReconnectingStream
+from .analysis.scheduler import VisionScheduler
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+def recycle_packet(packet):
+    """Returns a capture packet's frame to its source's buffer pool."""
+    recycle = packet.get("recycle")
+    if recycle is not None:
+        recycle(packet["frame"])
+
+class RingBuffer:
+    """
+    Bounded, thread-safe FIFO that drops the oldest item when full.
+    on_drop, if given, is called with every item dropped that way.
+    """
+    def __init__(self, name, maxlen=1, on_drop=None):
+        self.name = name
+        self.maxlen = max(1, int(maxlen))
+        self.on_drop = on_drop
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.drop_count = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxlen:
+                dropped = self._items.popleft()
+                self.drop_count += 1
+                if self.on_drop is not None:
+                    self.on_drop(dropped)
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Pops the oldest item. Returns None if nothing arrived within timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def latest(self, timeout=None):
+        """
+        Pops the newest item and discards everything older than it.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            item = self._items.pop()
+            self.drop_count += len(self._items)
+            if self.on_drop is not None:
+                for dropped in self._items:
+                    self.on_drop(dropped)
+            self._items.clear()
+            return item
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+    def stats(self):
+        with self._cond:
+            return {"depth": len(self._items), "capacity": self.maxlen,
+                    "put": self.put_count, "dropped": self.drop_count}
+
+
+class CaptureWorker(threading.Thread):
+    """
+    Owns the stream lifecycle of one camera and keeps its newest frames in a ring buffer.
+    Reconnects are handled by ReconnectingStream without leaving the read loop.
+    """
+    def __init__(self, camera, open_source, frames, frame_ready=None, pace_fn=None):
+        super().__init__(name=f"capture-{camera}", daemon=True)
+        self.camera = camera
+        self.open_source = open_source
+        self.frames = frames
+        self.frame_ready = frame_ready
+        self.pace_fn = pace_fn
+        self.stop_event = threading.Event()
+        self.status = "initializing"
+        self.last_error = None
+        self.frames_read = 0
+        self.read_failures = 0
+        self.last_frame_ts = None
+        self.stream = None
+
+    def run(self):
+        metrics = get_metrics()
+        backoff = 0.5
+        while not self.stop_event.is_set():
+            self.status = "opening"
+            try:
+                with ReconnectingStream(self.open_source, name=f"capture-{self.camera}") as stream:
+                    self.stream = stream
+                    backoff = 0.5
+
+                    while not self.stop_event.is_set():
+                        self.status = stream.status
+                        with metrics.timer("read", camera=self.camera):
+                            frame = stream.read()
+                        if frame is None:
+                            self.read_failures += 1
+                            metrics.inc("read_failures", camera=self.camera)
+                            self.stop_event.wait(0.05)
+                            continue
+
+                        self.frames_read += 1
+                        metrics.inc("frames_read", camera=self.camera)
+                        self.last_frame_ts = stream.last_frame_ts or time.time()
+                        self.frames.put({"camera": self.camera, "frame": frame, "gray": stream.gray(),
+                                         "snapshot": stream.snapshot(), "recycle": stream.recycle,
+                                         "ts": self.last_frame_ts})
+                        if self.frame_ready is not None:
+                            self.frame_ready.set()
+
+                        # Sources that drop frames themselves need not be read faster than we sample
+                        if self.pace_fn is not None and not stream.needs_draining:
+                            self.stop_event.wait(self.pace_fn())
+
+            except Exception as e:
+                self.stream = None
+                self.last_error = f"Stream error ({self.camera}): {e}"
+                self.status = "error"
+                logger.error(self.last_error)
+                # Only the initial open lands here; later failures are retried by ReconnectingStream
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, Config.RECONNECT_MAX_BACKOFF_S)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        stats = {"frames_read": self.frames_read, "read_failures": self.read_failures, **self.frames.stats()}
+        stream = self.stream
+        if stream is not None:
+            stats.update(stream.stats())
+        return stats
+
+
+class DetectionWorker(threading.Thread):
+    """
+    Samples the newest frame of every camera at a fixed rate and runs
+    detection on all of them in one batch.
+
+    detect_fn receives the list of packets and returns one result (or None)
+    per packet. With a sampler the interval follows scene activity.
+    """
+    def __init__(self, frames_by_camera, frame_ready, outbox, detect_fn, fps, sampler=None):
+        super().__init__(name="detection-worker", daemon=True)
+        self.frames_by_camera = frames_by_camera
+        self.frame_ready = frame_ready
+        self.outbox = outbox
+        self.detect_fn = detect_fn
+        self.interval = 1.0 / max(1, fps)
+        self.sampler = sampler
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.batches = 0
+        self.detections = 0
+        self.errors = 0
+
+    def _collect(self):
+        packets = []
+        for frames in self.frames_by_camera.values():
+            packet = frames.latest(timeout=0)
+            if packet is not None:
+                packets.append(packet)
+        return packets
+
+    def run(self):
+        next_t = time.monotonic()
+        while not self.stop_event.is_set():
+            delay = next_t - time.monotonic()
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+            interval = self.sampler.interval() if self.sampler else self.interval
+            next_t = max(next_t + interval, time.monotonic())
+
+            packets = self._collect()
+            if not packets:
+                self.frame_ready.wait(interval)
+                self.frame_ready.clear()
+                packets = self._collect()
+                if not packets:
+                    continue
+
+            try:
+                results = self.detect_fn(packets)
+                self.processed += len(packets)
+                self.batches += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"detection stage error: {e}", exc_info=True)
+                results = []
+
+            for packet, result in zip(packets, results):
+                if result:
+                    self.detections += 1
+                    # The source reuses the frame buffer once recycled; the vision stage gets its own copy
+                    self.outbox.put({**packet, "frame": packet["frame"].copy(), "gray": None, "recycle": None,
+                                     "result": result})
+            for packet in packets:
+                recycle_packet(packet)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        return {"processed": self.processed, "batches": self.batches,
+                "detections": self.detections, "errors": self.errors}
+
+
+class Pipeline:
+    """
+    Staged capture -> detection -> vision analysis -> webhook pipeline.
+
+    Capture and detection are decoupled by drop-oldest RingBuffers and the
+    vision stage by a VisionScheduler (priority queue, LMSTUDIO_SLOTS
+    concurrent calls), so a slow LM Studio call or webhook never stalls
+    capture or YOLO sampling. sources maps camera id -> open_source callable; every
+    camera gets its own capture worker, all share one detection worker.
+    delivery (e.g. WebhookDelivery) and store (e.g. EventStore) are optional
+    threads with a non-blocking submit(event) that own the outbound side.
+    """
+    def __init__(self, sources, detect_fn, analyze_fn, delivery=None, fps=None, sampler=None, store=None):
+        self.analyze_fn = analyze_fn
+        self.sampler = sampler
+        self.delivery = delivery
+        self.store = store
+
+        self.frame_ready = threading.Event()
+        self.frames = {cam: RingBuffer(f"capture:{cam}", Config.CAPTURE_BUFFER, recycle_packet)
+                       for cam in sources}
+        self.events = RingBuffer("events", 16)
+
+        self.captures = {
+            cam: CaptureWorker(cam, open_source, self.frames[cam], self.frame_ready,
+                               pace_fn=self._capture_pace if sampler else None)
+            for cam, open_source in sources.items()
+        }
+        self.vision = VisionScheduler(self._analyze, maxlen=Config.VISION_QUEUE * max(1, len(sources)))
+        self.detection = DetectionWorker(self.frames, self.frame_ready, self.vision, detect_fn,
+                                         Config.FPS_SAMPLING if fps is None else fps, sampler=sampler)
+        self._threads = [*self.captures.values(), self.detection, self.vision]
+        if delivery is not None:
+            self._threads.append(delivery)
+        if store is not None:
+            self._threads.append(store)
+
+    def _capture_pace(self):
+        # Half the sampling interval keeps frames fresh without reading every camera frame
+        return min(0.5 / self.sampler.fps, 1.0)
+
+    def _analyze(self, item):
+        event = self.analyze_fn(item)
+        if event:
+            if self.delivery is not None:
+                self.delivery.submit(event)
+            if self.store is not None:
+                self.store.submit(event)
+            self.events.put(event)
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+
+    def collect_metrics(self, metrics):
+        """
+        Metrics collector: queue depths and per-camera capture lag as gauges.
+        """
+        now = time.time()
+        for cam, capture in self.captures.items():
+            metrics.set_gauge("queue_depth", self.frames[cam].depth(), queue=f"capture:{cam}")
+            if capture.last_frame_ts is not None:
+                metrics.set_gauge("capture_lag_seconds", round(now - capture.last_frame_ts, 3), camera=cam)
+        vision = self.vision.stats()
+        metrics.set_gauge("queue_depth", vision.get("depth", 0), queue="vision")
+        metrics.set_gauge("queue_depth", self.events.depth(), queue="events")
+        if self.delivery is not None:
+            webhook = self.delivery.stats()
+            metrics.set_gauge("queue_depth", webhook.get("queued", 0), queue="webhook")
+            metrics.set_gauge("queue_depth", webhook.get("spooled", 0), queue="webhook_spool")
+        if self.store is not None:
+            metrics.set_gauge("queue_depth", self.store.stats()["queued"], queue="event_store")
+
+    def stop(self, timeout=2.0):
+        for t in self._threads:
+            t.stop()
+        for t in self._threads:
+            t.join(timeout)
+
+    def stats(self):
+        """
+        Returns per-stage queue depth, drop and throughput counters.
+        """
+        stats = {f"capture:{cam}": w.stats() for cam, w in self.captures.items()}
+        if self.sampler is not None:
+            stats["sampling"] = self.sampler.stats()
+        stats["detection"] = self.detection.stats()
+        stats["vision"] = self.vision.stats()
+        if self.delivery is not None:
+            stats["webhook"] = self.delivery.stats()
+        if self.store is not None:
+            stats["event_db"] = self.store.stats()
+        return stats
@@ -0,0 +1,250 @@
+"""
+Offline replay of a recorded video file or a directory of frames through
+the detection pipeline (motion gate, YOLO, track gate, snapshot + LM Studio
+analysis, webhook), as fast as the stages allow.
+
+    python -m vision_app.replay clip.mp4 --llm fake --webhook sink --out run.json
+    python -m vision_app.replay frames/ --fps 10 --baseline run.json
+
+Settings (MOTION_THRESH_PCT, FRAME_SIZE, CONF_MIN, ...) come from the environment
+as usual. Timestamps follow the video clock, so sampling and track gating
+behave as they would live. Results are printed and written as JSON.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+import cv2
+from .config import Config, apply_ultralytics_settings
+from .utils.stats import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def iter_frames(path, fps=None):
+    """Yields (frame_bgr, video_time_s) from a video file or a directory of images."""
+    if os.path.isdir(path):
+        files = sorted(f for f in glob.glob(os.path.join(path, "*")) if f.lower().endswith(IMAGE_EXTS))
+        fps = fps or 10.0
+        for i, f in enumerate(files):
+            frame = cv2.imread(f)
+            if frame is not None:
+                yield frame, i / fps
+        return
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open {path}")
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 25.0
+    i = 0
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield frame, i / fps
+            i += 1
+    finally:
+        cap.release()
+
+class Replay:
+    """
+    Runs the stages of main.py synchronously over recorded frames and keeps
+    per-stage latency windows.
+    """
+    STAGES = ("decode", "motion", "detect", "track", "encode", "llm", "analyze", "webhook")
+
+    def __init__(self, detector, sample_fps=None, llm=True, webhook=True):
+        from .main import CameraContext
+        from .outputs.snapshot_encoder import SnapshotEncoder
+
+        self.detector = detector
+        self.sample_fps = Config.FPS_SAMPLING if sample_fps is None else sample_fps
+        self.llm = llm
+        self.webhook = webhook
+        self.ctx = CameraContext(Config.CAMERA_ID)
+        self.encoder = SnapshotEncoder()
+        self.stages = {name: LatencyWindow(size=1_000_000) for name in self.STAGES}
+        self.counts = {"frames": 0, "sampled": 0, "motion": 0, "detections": 0, "events": 0,
+                       "llm_calls": 0, "llm_errors": 0, "webhook_errors": 0}
+        self.events = []
+        self.video_s = 0.0
+
+    def _timed(self, stage, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.stages[stage].add(time.perf_counter() - t0)
+
+    def _analyze(self, frame, result, ts):
+        from .main import analyze_detection, _iso
+
+        if not self.llm:
+            jpeg, info = self._timed("encode", self.encoder.encode, frame,
+                                     [o["box"] for o in result["objects"] if o.get("box")])
+            return {"camera": self.ctx.id, "timestamp": _iso(ts), "summary": result["summary"],
+                    "objects": result["objects"], "tracks": result.get("tracks_due") or [],
+                    "snapshot": info, "vision": {"status": "disabled"}}
+
+        event = self._timed("analyze", analyze_detection, frame, result, self.ctx.tracker_vision,
+                            self.ctx.tracker_actions, ts=ts, camera=self.ctx.id, encoder=self.encoder)
+        snap = event.get("snapshot") or {}
+        if "encode_ms" in snap:
+            self.stages["encode"].add(snap["encode_ms"] / 1000)
+        if "llm_ms" in snap:
+            self.stages["llm"].add(snap["llm_ms"] / 1000)
+            self.counts["llm_calls"] += 1
+            if (event.get("vision") or {}).get("status") != "ok":
+                self.counts["llm_errors"] += 1
+        return event
+
+    def run(self, frames, max_frames=None):
+        from .main import age_tracks, gate_by_tracks
+        from .outputs.webhook import post_webhook
+
+        base_ts = time.time()
+        next_sample = 0.0
+        it = iter(frames)
+        t_start = time.perf_counter()
+        while max_frames is None or self.counts["frames"] < max_frames:
+            t0 = time.perf_counter()
+            try:
+                frame, vt = next(it)
+            except StopIteration:
+                break
+            self.stages["decode"].add(time.perf_counter() - t0)
+            self.counts["frames"] += 1
+            self.video_s = vt
+
+            if self.sample_fps > 0 and vt + 1e-6 < next_sample:
+                continue
+            next_sample = vt + (1.0 / self.sample_fps if self.sample_fps > 0 else 0.0)
+            self.counts["sampled"] += 1
+            ts = base_ts + vt
+
+            if not self._timed("motion", self.ctx.motion.changed, frame):
+                age_tracks(self.ctx.mot, ts)
+                continue
+            self.counts["motion"] += 1
+
+            result = self._timed("detect", self.detector.detect_regions, [frame], [self.ctx.motion.regions])[0]
+            if not result["objects"]:
+                age_tracks(self.ctx.mot, ts)
+                continue
+            self.counts["detections"] += 1
+            self.ctx.tracker_yolo.update([o["label"] for o in result["objects"]])
+            if not self._timed("track", gate_by_tracks, result, self.ctx.mot, ts):
+                continue
+
+            event = self._analyze(frame, result, ts)
+            self.counts["events"] += 1
+            self.events.append({k: event.get(k) for k in ("timestamp", "summary", "tracks")})
+
+            if self.webhook and Config.WEBHOOK:
+                try:
+                    self._timed("webhook", post_webhook, event)
+                except Exception as e:
+                    self.counts["webhook_errors"] += 1
+                    logger.warning(f"Replay webhook failed: {e!r}")
+
+        self.wall_s = time.perf_counter() - t_start
+        return self.report()
+
+    def report(self):
+        video_min = max(self.video_s, 1e-9) / 60.0
+        return {
+            "frames": self.counts["frames"],
+            "video_s": round(self.video_s, 2),
+            "wall_s": round(self.wall_s, 2),
+            "speedup": round(self.video_s / self.wall_s, 2) if self.wall_s else None,
+            "fps": round(self.counts["frames"] / self.wall_s, 2) if self.wall_s else None,
+            "counts": self.counts,
+            "events_per_min": round(self.counts["events"] / video_min, 2),
+            "llm_calls_per_min": round(self.counts["llm_calls"] / video_min, 2),
+            "stages": {name: w.summary() for name, w in self.stages.items() if w.count},
+            "jpeg": self.encoder.stats(),
+        }
+
+def compare(current, baseline):
+    """Prints the relative change of the headline metrics against a previous run."""
+    def pct(new, old):
+        return f"{100.0 * (new - old) / old:+.1f}%" if old else "n/a"
+
+    print("vs baseline:")
+    for key in ("fps", "speedup", "events_per_min", "llm_calls_per_min"):
+        if current.get(key) is not None and baseline.get(key) is not None:
+            print(f"  {key:<18} {baseline[key]:>10} -> {current[key]:<10} {pct(current[key], baseline[key])}")
+    for stage, st in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage, {})
+        if "p95_ms" in st and "p95_ms" in old:
+            print(f"  {stage + ' p95':<18} {str(old['p95_ms']) + 'ms':>10} -> {str(st['p95_ms']) + 'ms':<10} "
+                  f"{pct(st['p95_ms'], old['p95_ms'])}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay a recording through the detection pipeline.")
+    ap.add_argument("source", help="video file or directory of frames")
+    ap.add_argument("--fps", type=float, default=None, help="source frame rate (default: from the file, 10 for a directory)")
+    ap.add_argument("--sample-fps", type=float, default=None, help="detection rate on the video clock (default FPS_SAMPLING, 0 = every frame)")
+    ap.add_argument("--max-frames", type=int, default=None)
+    ap.add_argument("--model", default=Config.MODEL_PATH)
+    ap.add_argument("--llm", choices=("fake", "live", "off"), default="fake",
+                    help="fake = local stub server, live = LMSTUDIO_URL / LMSTUDIO_ENDPOINTS")
+    ap.add_argument("--llm-latency", type=float, default=0.5, help="fake server latency (s)")
+    ap.add_argument("--webhook", choices=("sink", "live", "off"), default="sink",
+                    help="sink = local receiver, live = N8N_URL")
+    ap.add_argument("--out", default=None, help="write results as JSON")
+    ap.add_argument("--baseline", default=None, help="previous JSON result to compare against")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=Config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    apply_ultralytics_settings()
+
+    servers = []
+    if args.llm == "fake":
+        from .devtools.fake_openai import FakeOpenAIServer
+        fake = FakeOpenAIServer(port=0, latency=args.llm_latency)
+        Config.LMSTUDIO_URL = fake.start_in_thread()
+        Config.LMSTUDIO_ENDPOINTS = ""
+        servers.append(fake)
+    if args.webhook == "sink":
+        from .devtools.webhook_sink import WebhookSink
+        sink = WebhookSink(port=0)
+        Config.WEBHOOK = sink.start_in_thread()
+        servers.append(sink)
+    elif args.webhook == "off":
+        Config.WEBHOOK = None
+
+    from .detection.yolo_detector import YoloDetector
+    from .utils.io_service import get_io_service
+
+    detector = YoloDetector(args.model)
+    replay = Replay(detector, sample_fps=args.sample_fps, llm=args.llm != "off", webhook=args.webhook != "off")
+    try:
+        report = replay.run(iter_frames(args.source, args.fps), max_frames=args.max_frames)
+    finally:
+        get_io_service().stop()
+        for server in servers:
+            server.stop()
+
+    report["source"] = args.source
+    report["llm"] = args.llm
+    report["config"] = {k: getattr(Config, k) for k in (
+        "FRAME_SIZE", "CONF_MIN", "MOTION_THRESH_PCT", "MOTION_BG_ALPHA", "MOTION_NOISE_K", "MOTION_ROI_MODE",
+        "FPS_SAMPLING", "YOLO_BACKEND", "YOLO_PRECISION", "TRACKING", "SNAPSHOT_MAX_EDGE", "SNAPSHOT_MAX_BYTES", "LMSTUDIO_STREAM")}
+    if args.webhook == "sink":
+        report["webhook_sink"] = sink.stats()
+
+    print(json.dumps({k: v for k, v in report.items() if k not in ("config",)}, indent=2, default=str))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({**report, "events": replay.events}, f, indent=2, default=str)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+import time
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+def read_cpu_temp():
+    """SoC temperature in °C (Raspberry Pi / most Linux boards), or None."""
+    try:
+        with open(THERMAL_ZONE, "r") as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+def read_cpu_load():
+    """1-minute load average per core, or None."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return None
+
+class AdaptiveSampler:
+    """
+    Chooses the detection rate from scene activity: burst while motion or
+    tracked objects are present, FPS_SAMPLING shortly after, and a low idle
+    rate once nothing has happened for IDLE_AFTER_S. The rate is halved
+    (down to the idle rate) while CPU load or SoC temperature is over budget.
+    """
+    def __init__(self, idle_fps=None, active_fps=None, burst_fps=None, idle_after_s=None, burst_hold_s=None,
+                 max_load=None, max_temp_c=None):
+        self.idle_fps = Config.FPS_IDLE if idle_fps is None else idle_fps
+        self.active_fps = Config.FPS_SAMPLING if active_fps is None else active_fps
+        self.burst_fps = Config.FPS_BURST if burst_fps is None else burst_fps
+        self.idle_after_s = Config.IDLE_AFTER_S if idle_after_s is None else idle_after_s
+        self.burst_hold_s = Config.BURST_HOLD_S if burst_hold_s is None else burst_hold_s
+        self.max_load = Config.CPU_LOAD_MAX if max_load is None else max_load
+        self.max_temp_c = Config.CPU_TEMP_MAX_C if max_temp_c is None else max_temp_c
+
+        self._lock = threading.Lock()
+        self.last_activity = time.monotonic()
+        self.active_tracks = 0
+        self.mode = "active"
+        self.fps = self.active_fps
+        self.load = None
+        self.temp_c = None
+        self.throttled = False
+        self._budget_checked = 0.0
+
+    def note(self, motion, tracks=0):
+        """Reports the outcome of one detection tick."""
+        with self._lock:
+            self.active_tracks = tracks
+            if motion or tracks:
+                self.last_activity = time.monotonic()
+
+    def _check_budget(self, now):
+        if now - self._budget_checked < 2.0:
+            return
+        self._budget_checked = now
+        self.load = read_cpu_load()
+        self.temp_c = read_cpu_temp()
+        self.throttled = bool((self.load is not None and self.load > self.max_load) or
+                              (self.temp_c is not None and self.temp_c > self.max_temp_c))
+
+    def interval(self):
+        """Seconds until the next detection tick."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_budget(now)
+            quiet_for = now - self.last_activity
+            if self.active_tracks or quiet_for < self.burst_hold_s:
+                self.mode, fps = "burst", self.burst_fps
+            elif quiet_for < self.idle_after_s:
+                self.mode, fps = "active", self.active_fps
+            else:
+                self.mode, fps = "idle", self.idle_fps
+
+            if self.throttled:
+                fps = max(self.idle_fps, fps / 2)
+            self.fps = max(fps, 0.01)
+            return 1.0 / self.fps
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode + (" (throttled)" if self.throttled else ""),
+                "fps": round(self.fps, 2),
+                "load": round(self.load, 2) if self.load is not None else None,
+                "temp_c": self.temp_c,
+            }
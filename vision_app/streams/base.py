@@ -5,6 +5,14 @@ class VideoStream(ABC):
     Abstract base class for video streams.
     Defines a common interface for different video sources.
     """
+    # True when frames queue up (e.g. RTSP decoder buffer) unless read continuously.
+    # Sources that keep only the latest frame can be read at the sampling rate instead.
+    needs_draining = True
+    # Wall-clock time the last frame returned by read() was captured/decoded, if known
+    last_frame_ts = None
+    # False when a second instance cannot be opened while this one is live (reconnects release first)
+    supports_overlap = True
+
     @abstractmethod
     def __enter__(self):
         """Initializes and returns the video capture object."""
@@ -24,3 +32,19 @@ class VideoStream(ABC):
     def release(self):
         """Releases the video capture object."""
         pass
+
+    def gray(self):
+        """Returns the luma plane of the last frame read, if the source provides one."""
+        return None
+
+    def recycle(self, frame):
+        """Hands a frame returned by read() back once no consumer uses it any more (pooled sources)."""
+        pass
+
+    def snapshot(self):
+        """Returns a higher-resolution copy of the last frame read, or None to use that frame."""
+        return None
+
+    def stats(self):
+        """Returns source-specific counters (decode rate, latency, ...)."""
+        return {}
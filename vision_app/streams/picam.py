@@ -1,30 +1,90 @@
-import cv2
 import logging
+import threading
+import cv2
+import numpy as np
 from .base import VideoStream
+from ..config import Config
 
 logger = logging.getLogger(__name__)
 
 try:
-    from picamera2 import Picamera2
+    from picamera2 import Picamera2, MappedArray
     PICAM_AVAILABLE = True
 except ImportError:
     PICAM_AVAILABLE = False
 
+class _BufferPool:
+    """
+    Free list of preallocated (frame, luma) array pairs. A pair is handed
+    out by acquire() and only reused after release(); when the list is
+    empty a new pair is allocated, and at most size pairs are kept.
+    """
+    def __init__(self, frame_shape, gray_shape, size=4):
+        self.frame_shape = frame_shape
+        self.gray_shape = gray_shape
+        self.size = size
+        self._free = []
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.allocations += 1
+        return np.empty(self.frame_shape, dtype=np.uint8), np.empty(self.gray_shape, dtype=np.uint8)
+
+    def release(self, pair):
+        with self._lock:
+            if len(self._free) < self.size:
+                self._free.append(pair)
+
+def _even(v):
+    return max(2, int(v) // 2 * 2)
+
 class PiCamStream(VideoStream):
     """
     Represents a video stream from a PiCamera.
+
+    The main stream is configured at FRAME_SIZE in RGB888 (which Picamera2
+    lays out as B, G, R: OpenCV order, no conversion needed) and is what
+    detection sees. A YUV420 lores stream at motion resolution provides the
+    luma plane for motion detection. Frames are copied out of the camera
+    buffers into pooled arrays and the request is released immediately; the
+    pipeline hands each frame back through recycle() once it is done with it.
+
+    With PICAM_SNAPSHOT_SIZE the main stream runs at that size instead: each
+    request is copied out whole as the snapshot of that exact frame and
+    scaled down to the detection size, so boxes and crops line up with the
+    still. That costs a full-resolution copy and resize per frame.
     """
+    needs_draining = False  # Picamera2 recycles its buffers, every request is a fresh frame
+    supports_overlap = False  # the camera can only be opened once
+
     def __init__(self):
         if not PICAM_AVAILABLE:
             raise RuntimeError("Picamera2 not available. Please install it.")
 
+        self.main_size = Config.PICAM_MAIN_SIZE or Config.FRAME_SIZE
+        self.still_size = Config.PICAM_SNAPSHOT_SIZE
+        self.lores_size = (_even(Config.FRAME_SIZE[0] // 8), _even(Config.FRAME_SIZE[1] // 8))
+
         self.picam2 = Picamera2()
         cfg = self.picam2.create_video_configuration(
-            main={"size": (1280, 720), "format": "RGB888"}
+            main={"size": self.still_size or self.main_size, "format": "RGB888"},
+            lores={"size": self.lores_size, "format": "YUV420"},
         )
         self.picam2.configure(cfg)
+
+        w, h = self.main_size
+        lw, lh = self.lores_size
+        self._pool = _BufferPool((h, w, 3), (lh, lw), Config.CAPTURE_BUFFER + 2)
+        self._in_use = {}  # id(frame) -> (frame, gray) handed out by read()
+        self._gray = None
+        self._still = None
+
         self.picam2.start()
-        logger.debug("PiCamera stream initialized")
+        logger.debug(f"PiCamera stream initialized (main {self.main_size}, lores {self.lores_size})")
 
     def __enter__(self):
         return self
@@ -33,9 +93,45 @@ class PiCamStream(VideoStream):
         self.release()
 
     def read(self):
-        frame_rgb = self.picam2.capture_array()
-        frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
-        return frame_bgr
+        w, h = self.main_size
+        lw, lh = self.lores_size
+        frame, gray = pair = self._pool.acquire()
+
+        still = None
+        request = self.picam2.capture_request()
+        try:
+            with MappedArray(request, "main") as m:
+                if self.still_size:
+                    sw, sh = self.still_size
+                    still = m.array[:sh, :sw, :3].copy()
+                    cv2.resize(still, (w, h), dst=frame, interpolation=cv2.INTER_AREA)
+                else:
+                    np.copyto(frame, m.array[:h, :w, :3])
+            with MappedArray(request, "lores") as m:
+                # YUV420 planar: the first lh rows are the Y (luma) plane
+                np.copyto(gray, m.array[:lh, :lw])
+        except Exception:
+            self._pool.release(pair)
+            raise
+        finally:
+            request.release()
+
+        self._in_use[id(frame)] = pair
+        self._gray = gray
+        self._still = still
+        return frame
+
+    def gray(self):
+        return self._gray
+
+    def recycle(self, frame):
+        pair = self._in_use.pop(id(frame), None)
+        if pair is not None:
+            self._pool.release(pair)
+
+    def snapshot(self):
+        """Full-resolution copy of the last frame read, only when PICAM_SNAPSHOT_SIZE is set."""
+        return self._still
 
     def release(self):
         if self.picam2:
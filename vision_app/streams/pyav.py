@@ -0,0 +1,144 @@
+import cv2
+import logging
+import time
+import numpy as np
+from .base import VideoStream
+from .reader import LatestFrameReader
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+_LUMA_FIRST = {"yuv420p", "yuvj420p", "yuv422p", "yuvj422p", "yuv444p", "yuvj444p", "nv12", "nv21", "gray"}
+
+class PyAVStream(VideoStream):
+    """
+    RTSP (or file) stream decoded with PyAV/FFmpeg directly.
+
+    Compared to cv2.VideoCapture this lets us pick the decoder thread count,
+    skip non-keyframes inside the decoder (PYAV_KEYFRAMES_ONLY), scale
+    during pixel-format conversion (PYAV_SIZE) or use decoder lowres where
+    the codec supports it, and hand the luma plane straight to motion
+    detection without a BGR -> gray conversion.
+    """
+    def __init__(self, url):
+        if not PYAV_AVAILABLE:
+            raise RuntimeError("PyAV not available. Please install it (pip install av).")
+        self.url = url
+        self.container = None
+        self.reader = None
+        self.last_frame_ts = None
+        self._frames = None
+        self._gray = None
+        self._decoded = 0
+        self.motion_size = (Config.FRAME_SIZE[0] // 8, Config.FRAME_SIZE[1] // 8)
+
+    def _open(self):
+        timeout_s = Config.FFMPEG_TIMEOUT / 1e6
+        self.container = av.open(
+            self.url,
+            options={
+                "rtsp_transport": "tcp",
+                "fflags": "discardcorrupt+nobuffer",
+                "flags": "low_delay",
+                "max_delay": "500000",
+            },
+            timeout=(timeout_s, timeout_s),
+        )
+        stream = self.container.streams.video[0]
+        stream.thread_type = "AUTO"
+        ctx = stream.codec_context
+        ctx.thread_count = Config.PYAV_THREADS
+        if Config.PYAV_KEYFRAMES_ONLY:
+            ctx.skip_frame = "NONKEY"
+        if Config.PYAV_LOWRES:
+            ctx.options = {"lowres": str(Config.PYAV_LOWRES)}  # only honoured by some codecs (e.g. MJPEG)
+        self._frames = self.container.decode(stream)
+
+    def __enter__(self):
+        max_attempts = Config.MAX_RECONNECT_ATTEMPTS
+        for attempt in range(max_attempts):
+            try:
+                self._open()
+                # Check if we can decode a frame
+                self._next_frame()
+                self.reader = LatestFrameReader("pyav", self._next_frame, Config.RTSP_STALL_S)
+                self.reader.start()
+                logger.debug("PyAV stream opened successfully")
+                return self
+            except Exception as e:
+                logger.error(f"PyAV open failed (attempt {attempt+1}/{max_attempts}): {e}")
+                self._close_container()
+                if attempt < max_attempts - 1:
+                    time.sleep(2 ** attempt)
+
+        raise RuntimeError(f"Failed to open stream after {max_attempts} attempts")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def _luma(self, frame):
+        if frame.format.name not in _LUMA_FIRST:
+            return None
+        plane = frame.planes[0]
+        y = np.frombuffer(plane, dtype=np.uint8).reshape(plane.height, plane.line_size)[:, :plane.width]
+        return cv2.resize(y, self.motion_size, interpolation=cv2.INTER_AREA)
+
+    def _next_frame(self):
+        """Runs on the reader thread."""
+        try:
+            frame = next(self._frames)
+        except StopIteration:
+            raise RuntimeError("end of stream")
+
+        self._decoded += 1
+        if self._decoded % max(1, Config.RTSP_DECODE_EVERY):
+            return None, None
+
+        size = Config.PYAV_SIZE or (frame.width, frame.height)
+        img = frame.to_ndarray(format="bgr24", width=size[0], height=size[1])
+        gray = self._luma(frame)
+        pts = float(frame.pts * frame.time_base) if frame.pts is not None and frame.time_base else None
+        return (img, gray), pts
+
+    def read(self):
+        """Reads the latest frame from the stream (blocks until a new one is decoded)."""
+        planes, _, ts = self.reader.read(timeout=1.0)
+        if planes is None:
+            return None
+        self.last_frame_ts = ts
+        frame, self._gray = planes
+        return frame
+
+    def gray(self):
+        return self._gray
+
+    def stats(self):
+        if self.reader is None:
+            return {}
+        return {**self.reader.stats(), "decoder_frames": self._decoded}
+
+    def _close_container(self):
+        if self.container is not None:
+            try:
+                self.container.close()
+            except Exception as e:
+                logger.debug(f"Error closing PyAV container: {e}")
+            self.container = None
+            self._frames = None
+
+    def release(self):
+        if self.reader:
+            self.reader.stop(timeout=Config.FFMPEG_TIMEOUT / 1e6 + 1)
+            self.reader = None
+        if self.container is not None:
+            self._close_container()
+            logger.debug("PyAV stream released")
+
+def is_pyav_available():
+    return PYAV_AVAILABLE
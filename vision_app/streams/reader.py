@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from ..utils.stats import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+class LatestFrameReader:
+    """
+    Pulls frames from a decoder on a background thread and keeps only the
+    newest one, so consumers never see a backlog of stale frames.
+
+    next_frame() returns (frame, pts_seconds), or (None, None) when it
+    produced nothing this round (skipped or failed grab). Exceptions end
+    the reader and are re-raised to the consumer.
+    """
+    def __init__(self, name, next_frame, stall_s):
+        self.name = name
+        self.next_frame = next_frame
+        self.stall_s = stall_s
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._frame = None
+        self._pts = None
+        self._frame_ts = None
+        self._seq = 0
+        self._read_seq = 0
+        self.error = None
+        self.frames_decoded = 0
+        self.frames_consumed = 0
+        self.started_at = None
+        self.last_frame_mono = None
+        self.latency = LatencyWindow()   # frame decoded -> handed to consumer
+        self.intervals = LatencyWindow()  # time between decoded frames
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                frame, pts = self.next_frame()
+            except Exception as e:
+                self.error = e
+                logger.warning(f"{self.name} reader stopped: {e}")
+                with self._cond:
+                    self._cond.notify_all()
+                return
+
+            if frame is None:
+                continue
+
+            now = time.monotonic()
+            if self.last_frame_mono is not None:
+                self.intervals.add(now - self.last_frame_mono)
+            with self._cond:
+                self._frame, self._pts, self._frame_ts = frame, pts, time.time()
+                self.last_frame_mono = now
+                self._seq += 1
+                self.frames_decoded += 1
+                self._cond.notify_all()
+
+    @property
+    def stalled(self):
+        last = self.last_frame_mono or self.started_at
+        return last is not None and time.monotonic() - last > self.stall_s
+
+    def read(self, timeout=None):
+        """
+        Returns (frame, pts, wall_ts) of the newest frame not yet consumed,
+        or (None, None, None) on timeout. Raises when the reader died or the
+        stream stalled for longer than stall_s.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > self._read_seq or self.error is not None, timeout)
+            if self.error is not None:
+                raise RuntimeError(f"{self.name} reader failed: {self.error}")
+            if self._seq == self._read_seq:
+                if self.stalled:
+                    raise RuntimeError(f"{self.name} stalled: no frame for {self.stall_s:.0f}s")
+                return None, None, None
+            self._read_seq = self._seq
+            self.frames_consumed += 1
+            frame, pts, ts = self._frame, self._pts, self._frame_ts
+
+        self.latency.add(max(0.0, time.time() - ts))
+        return frame, pts, ts
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        iv = self.intervals.summary()
+        fps = round(1000.0 / iv["avg_ms"], 1) if iv.get("avg_ms") else None
+        return {
+            "decoded": self.frames_decoded,
+            "skipped": self.frames_decoded - self.frames_consumed,
+            "decode_fps": fps,
+            "last_pts": round(self._pts, 3) if self._pts is not None else None,
+            "latency": self.latency.summary(),
+        }
@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from .base import VideoStream
+from ..config import Config
+from ..utils.stats import LatencyWindow
+from ..metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+class ReconnectingStream(VideoStream):
+    """
+    Wraps an open_source() callable and keeps a healthy stream behind it.
+
+    A watchdog on read() flags the stream when no good frame arrived for
+    stall_s or max_bad_frames bad reads (exception, None, empty or
+    wrong-shape frame) happened in a row. The replacement is then opened on
+    a background thread while the old stream keeps delivering, and swapped
+    in on the next read. Sources that cannot be opened twice
+    (supports_overlap = False, e.g. the PiCamera) are released first.
+    REOPEN_EVERY_S > 0 adds a planned rotation through the same path.
+    """
+    def __init__(self, open_source, name="stream", stall_s=None, max_bad_frames=None, rotate_s=None):
+        self.open_source = open_source
+        self.name = name
+        self.stall_s = Config.STREAM_STALL_S if stall_s is None else stall_s
+        self.max_bad_frames = Config.STREAM_MAX_BAD_FRAMES if max_bad_frames is None else max_bad_frames
+        self.rotate_s = Config.REOPEN_EVERY_S if rotate_s is None else rotate_s
+
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._active = None
+        self._pending = None  # (label, stream) opened in the background, not yet swapped in
+        self._opener = None
+        self._gray = None
+        self._snapshot = None
+        self.label = None
+        self.opened_at = None
+        self.last_good = None
+        self.last_frame_ts = None
+        self.frame_shape = None
+        self.bad_frames = 0
+        self.unhealthy_since = None
+        self.unhealthy_reason = None
+        self.last_error = None
+
+        self.reconnects = 0
+        self.rotations = 0
+        self.open_failures = 0
+        self.reconnect_latency = LatencyWindow(64)  # watchdog trip -> replacement live
+        self.frame_gap = LatencyWindow(64)          # last good frame -> first good frame after swap
+        self._gap_from = None
+
+    @property
+    def needs_draining(self):
+        active = self._active
+        return active.needs_draining if active is not None else True
+
+    @property
+    def status(self):
+        if self._active is None or self.unhealthy_since is not None:
+            return f"reconnecting ({self.label})"
+        return f"open ({self.label})"
+
+    def __enter__(self):
+        self.label, provider = self.open_source()
+        self._active = provider.__enter__()
+        self.opened_at = self.last_good = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def _valid(self, frame):
+        if frame is None or getattr(frame, "size", 0) == 0:
+            return False
+        if self.frame_shape is not None and frame.shape != self.frame_shape:
+            return False
+        return True
+
+    def read(self):
+        self._maybe_swap()
+        stream = self._active
+        if stream is None:
+            # Exclusive source being reopened
+            return None
+
+        try:
+            frame = stream.read()
+        except Exception as e:
+            self.last_error = str(e)
+            frame = None
+
+        now = time.monotonic()
+        if self._valid(frame):
+            self.bad_frames = 0
+            self.last_good = now
+            self.frame_shape = frame.shape
+            self.last_frame_ts = stream.last_frame_ts
+            self._gray = stream.gray()
+            self._snapshot = stream.snapshot()
+            if self._gap_from is not None:
+                self.frame_gap.add(now - self._gap_from)
+                self._gap_from = None
+            if self.unhealthy_since is None and self.rotate_s > 0 and now - self.opened_at > self.rotate_s:
+                self._replace("rotate")
+            return frame
+
+        if frame is not None:
+            stream.recycle(frame)
+        self.bad_frames += 1
+        if self.bad_frames >= self.max_bad_frames:
+            self._replace(f"{self.bad_frames} bad frames" + (f" ({self.last_error})" if self.last_error else ""))
+        elif now - self.last_good > self.stall_s:
+            self._replace(f"stalled for {now - self.last_good:.1f}s")
+        return None
+
+    def _replace(self, reason):
+        with self._lock:
+            if self._opener is not None or self._closed.is_set():
+                return
+            self.unhealthy_since = time.monotonic()
+            self.unhealthy_reason = reason
+            old = None
+            if not getattr(self._active, "supports_overlap", True):
+                old, self._active = self._active, None
+                self._gap_from = self.last_good
+            self._opener = threading.Thread(target=self._open_replacement, args=(old,),
+                                            name=f"{self.name}-reconnect", daemon=True)
+            self._opener.start()
+        logger.info(f"{self.name}: opening replacement stream ({reason})")
+
+    def _open_replacement(self, old):
+        if old is not None:
+            self._release_stream(old)
+        delay = 0.5
+        while not self._closed.is_set():
+            try:
+                label, provider = self.open_source()
+                stream = provider.__enter__()
+            except Exception as e:
+                self.open_failures += 1
+                self.last_error = str(e)
+                logger.warning(f"{self.name}: replacement open failed: {e}")
+                self._closed.wait(delay)
+                delay = min(delay * 2, Config.RECONNECT_MAX_BACKOFF_S)
+                continue
+
+            with self._lock:
+                if not self._closed.is_set():
+                    self._pending = (label, stream)
+                    return
+            self._release_stream(stream)
+            return
+
+    def _maybe_swap(self):
+        with self._lock:
+            if self._pending is None:
+                return
+            (self.label, new), self._pending = self._pending, None
+            old, self._active = self._active, new
+            self._opener = None
+
+        now = time.monotonic()
+        if self.unhealthy_reason == "rotate":
+            self.rotations += 1
+            get_metrics().inc("rotations", stream=self.name)
+        else:
+            self.reconnects += 1
+            get_metrics().inc("reconnects", stream=self.name)
+        self.reconnect_latency.add(now - self.unhealthy_since)
+        if self._gap_from is None:
+            self._gap_from = self.last_good
+        logger.info(f"{self.name}: swapped in new stream after {now - self.unhealthy_since:.2f}s ({self.unhealthy_reason})")
+        self.unhealthy_since = self.unhealthy_reason = None
+        self.opened_at = self.last_good = now
+        self.bad_frames = 0
+        self.frame_shape = None
+        if old is not None:
+            # Releasing can block on the FFmpeg timeout; keep it off the capture thread
+            threading.Thread(target=self._release_stream, args=(old,), name=f"{self.name}-release", daemon=True).start()
+
+    def _release_stream(self, stream):
+        try:
+            stream.__exit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"{self.name}: error releasing stream: {e}")
+
+    def gray(self):
+        return self._gray
+
+    def recycle(self, frame):
+        # Frames of a stream that was swapped out since are simply dropped with it
+        active = self._active
+        if active is not None:
+            active.recycle(frame)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def stats(self):
+        active = self._active
+        stats = active.stats() if active is not None else {}
+        return {
+            **stats,
+            "source": self.label,
+            "reconnects": self.reconnects,
+            "rotations": self.rotations,
+            "open_failures": self.open_failures,
+            "reconnect": self.reconnect_latency.summary(),
+            "gap": self.frame_gap.summary(),
+        }
+
+    def release(self):
+        self._closed.set()
+        with self._lock:
+            streams = [s for s in (self._active, self._pending[1] if self._pending else None) if s is not None]
+            self._active = self._pending = None
+        for stream in streams:
+            self._release_stream(stream)
@@ -2,6 +2,7 @@ import cv2
 import logging
 import time
 from .base import VideoStream
+from .reader import LatestFrameReader
 from ..config import Config
 
 logger = logging.getLogger(__name__)
@@ -9,10 +10,20 @@ logger = logging.getLogger(__name__)
 class RTSPStream(VideoStream):
     """
     Represents a video stream from an RTSP source.
+
+    A background reader thread grabs continuously so the decoder never
+    builds a backlog, and only the newest frame is kept. With
+    RTSP_DECODE_EVERY=N only every Nth grabbed frame is retrieved
+    (color-converted and copied). OpenCV's FFmpeg backend still decodes
+    every frame inside grab(); for keyframe-only decoding use the PyAV backend.
     """
     def __init__(self, url):
         self.url = url
         self.cap = None
+        self.reader = None
+        self.last_frame_ts = None
+        self._grabs = 0
+        self._grab_failures = 0
 
     def __enter__(self):
         max_attempts = Config.MAX_RECONNECT_ATTEMPTS
@@ -29,6 +40,8 @@ class RTSPStream(VideoStream):
                 if not ok:
                     raise RuntimeError("No valid frames received from stream")
 
+                self.reader = LatestFrameReader("rtsp", self._next_frame, Config.RTSP_STALL_S)
+                self.reader.start()
                 logger.debug("RTSP stream opened successfully")
                 return self
 
@@ -44,19 +57,42 @@ class RTSPStream(VideoStream):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.release()
 
-    def read(self):
-        """Reads the latest frame from the stream."""
-        # Grab the latest frame to reduce latency
-        for _ in range(5):
-             self.cap.grab()
+    def _next_frame(self):
+        """Runs on the reader thread."""
+        if not self.cap.grab():
+            self._grab_failures += 1
+            time.sleep(0.05)
+            return None, None
+
+        self._grab_failures = 0
+        self._grabs += 1
+        if self._grabs % max(1, Config.RTSP_DECODE_EVERY):
+            return None, None
 
         ok, frame = self.cap.retrieve()
         if not ok:
-            logger.warning("Failed to read frame from RTSP stream")
+            return None, None
+        return frame, self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def read(self):
+        """Reads the latest frame from the stream (blocks until a new one is decoded)."""
+        frame, _, ts = self.reader.read(timeout=1.0)
+        if frame is None:
+            logger.debug("No new frame from RTSP stream")
             return None
+        self.last_frame_ts = ts
         return frame
 
+    def stats(self):
+        if self.reader is None:
+            return {}
+        return {**self.reader.stats(), "grab_failures": self._grab_failures}
+
     def release(self):
+        if self.reader:
+            # grab() can block up to the FFmpeg timeout; never release cap under the reader
+            self.reader.stop(timeout=Config.FFMPEG_TIMEOUT / 1e6 + 1)
+            self.reader = None
         if self.cap:
             self.cap.release()
             self.cap = None
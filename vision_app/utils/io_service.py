@@ -0,0 +1,102 @@
+import aiohttp
+import asyncio
+import logging
+import threading
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+class AsyncIOService:
+    """
+    Owns one long-lived asyncio event loop on a background thread, plus pooled
+    keep-alive aiohttp sessions shared by the LM Studio and webhook clients.
+    """
+    def __init__(self):
+        self.loop = None
+        self._thread = None
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="aio-service", daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.debug("Async I/O service started")
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def get_session(self, name, limit=None, timeout=None):
+        """
+        Returns the pooled session for name. Must be called on the service loop.
+        """
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=limit or Config.HTTP_CONN_LIMIT,
+                keepalive_timeout=Config.HTTP_KEEPALIVE_S,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=timeout) if timeout else aiohttp.ClientTimeout(),
+            )
+            self._sessions[name] = session
+        return session
+
+    def submit(self, coro):
+        """
+        Schedules a coroutine on the service loop from any thread.
+        Returns a concurrent.futures.Future.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """
+        Blocking variant of submit().
+        """
+        return self.submit(coro).result(timeout)
+
+    async def _close_sessions(self):
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions.clear()
+
+    def stop(self, timeout=5.0):
+        with self._lock:
+            if not (self._thread and self._thread.is_alive()):
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_sessions(), self.loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Error closing HTTP sessions: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            logger.debug("Async I/O service stopped")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_io_service():
+    """
+    Returns the process-wide AsyncIOService, starting it on first use.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AsyncIOService()
+    _service.start()
+    return _service
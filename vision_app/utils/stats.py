@@ -0,0 +1,76 @@
+import bisect
+import threading
+from collections import deque
+
+class LatencyWindow:
+    """
+    Rolling window of latency samples (seconds) with percentile summaries.
+    """
+    def __init__(self, size=512):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, p):
+        with self._lock:
+            data = sorted(self._samples)
+        if not data:
+            return None
+        k = min(len(data) - 1, max(0, int(round(p / 100.0 * (len(data) - 1)))))
+        return data[k]
+
+    def summary(self):
+        with self._lock:
+            data = sorted(self._samples)
+            count, total = self.count, self.total
+        if not data:
+            return {"count": count}
+
+        def pct(p):
+            return round(1000 * data[min(len(data) - 1, int(round(p / 100.0 * (len(data) - 1))))], 1)
+
+        return {
+            "count": count,
+            "avg_ms": round(1000 * total / count, 1),
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(1000 * data[-1], 1),
+        }
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (seconds) with cumulative, Prometheus-style buckets.
+    """
+    DEFAULT_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+    def __init__(self, bounds=None):
+        self.bounds = tuple(bounds or self.DEFAULT_BOUNDS)
+        self._counts = [0] * (len(self.bounds) + 1)  # last bucket = +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        """Returns {"buckets": [(le, cumulative_count), ...], "sum", "count"}; le of the last bucket is inf."""
+        with self._lock:
+            counts, total, count = list(self._counts), self.total, self.count
+        buckets, running = [], 0
+        for le, n in zip(self.bounds + (float("inf"),), counts):
+            running += n
+            buckets.append((le, running))
+        return {"buckets": buckets, "sum": total, "count": count}